@@ -1,37 +1,52 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, BackgroundTasks
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import os
 import json
 import asyncio
+import hashlib
 import logging
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from anyio import to_thread
+
 # Import des modules personnalisés
 from services.ai_generator import AIGenerator
 from services.brand_generator import BrandGenerator
 from services.content_scraper import ContentScraper
 from services.site_builder import SiteBuilder
-from services.asset_manager import AssetManager
+from services.asset_manager import AssetManager, UploadTooLargeError, STREAM_UPLOAD_MAX_SIZE
+from services.http_client import create_http_client
+from services.redis_cache import close_redis
+from services.openai_client import close_openai_client
 from models.schemas import (
     SiteGenerationRequest,
     BrandingRequest,
     ContentAnalysisRequest,
-    SiteGenerationResponse,
+    SiteGenerationJobResponse,
     BrandingResponse
 )
+from tasks import enqueue_site_generation, get_site_status as get_queued_site_status
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Limites de concurrence (threadpool et générations IA simultanées)
+THREADPOOL_SIZE = int(os.getenv('THREADPOOL_SIZE', 16))
+MAX_CONCURRENT_GEN = int(os.getenv('MAX_CONCURRENT_GEN', 4))
+MAX_BRANDING_BATCH_SIZE = int(os.getenv('MAX_BRANDING_BATCH_SIZE', 100))
+
 # Initialisation de l'application FastAPI
 app = FastAPI(
     title="KLM Pegasus AI Service",
     description="Service IA pour la génération automatique de sites e-commerce",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Configuration CORS
@@ -54,89 +69,99 @@ asset_manager = AssetManager()
 async def startup_event():
     """Initialisation des services au démarrage"""
     logger.info("Démarrage du service IA KLM Pegasus")
+    # Threadpool borné: évite qu'un pic d'appels bloquants affame la boucle
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=THREADPOOL_SIZE)
+    )
+    app.state.gen_sem = asyncio.Semaphore(MAX_CONCURRENT_GEN)
+    _refresh_probe_payloads()
+    app.state.probe_ticker = asyncio.create_task(_tick_probe_payloads())
+    app.state.http = create_http_client()
     await ai_generator.initialize()
     await brand_generator.initialize()
+    await content_scraper.initialize(http_client=app.state.http)
+    await asset_manager.initialize(http_client=app.state.http)
     logger.info("Services IA initialisés avec succès")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Libération des ressources partagées à l'arrêt"""
+    app.state.probe_ticker.cancel()
+    await asset_manager.shutdown()
+    await content_scraper.shutdown()
+    await app.state.http.aclose()
+    await close_openai_client()
+    await close_redis()
+    logger.info("Arrêt du service IA KLM Pegasus")
+
+# Réponses pré-sérialisées de / et /health (sondes fréquentes),
+# horodatage rafraîchi une fois par seconde par _tick_probe_payloads
+_root_payload = {
+    "message": "Service IA KLM Pegasus",
+    "version": "1.0.0",
+    "status": "actif",
+    "timestamp": None
+}
+_health_payload = {
+    "status": "healthy",
+    "services": {
+        "ai_generator": "active",
+        "brand_generator": "active",
+        "content_scraper": "active",
+        "site_builder": "active",
+        "asset_manager": "active"
+    },
+    "timestamp": None
+}
+_probe_bodies: Dict[str, bytes] = {}
+
+def _refresh_probe_payloads():
+    """Met à jour l'horodatage et re-sérialise les réponses des sondes"""
+    now = datetime.now()
+    _root_payload["timestamp"] = now
+    _health_payload["timestamp"] = now
+    _probe_bodies["root"] = orjson.dumps(_root_payload)
+    _probe_bodies["health"] = orjson.dumps(_health_payload)
+
+async def _tick_probe_payloads():
+    """Rafraîchit les réponses des sondes chaque seconde"""
+    while True:
+        _refresh_probe_payloads()
+        await asyncio.sleep(1)
+
 @app.get("/")
 async def root():
     """Point d'entrée racine"""
-    return {
-        "message": "Service IA KLM Pegasus",
-        "version": "1.0.0",
-        "status": "actif",
-        "timestamp": datetime.now().isoformat()
-    }
+    return Response(content=_probe_bodies["root"], media_type="application/json")
 
 @app.get("/health")
 async def health_check():
     """Vérification de l'état de santé du service"""
-    return {
-        "status": "healthy",
-        "services": {
-            "ai_generator": "active",
-            "brand_generator": "active",
-            "content_scraper": "active",
-            "site_builder": "active",
-            "asset_manager": "active"
-        },
-        "timestamp": datetime.now().isoformat()
-    }
+    return Response(content=_probe_bodies["health"], media_type="application/json")
 
-@app.post("/generate-site", response_model=SiteGenerationResponse)
-async def generate_site(request: SiteGenerationRequest, background_tasks: BackgroundTasks):
+@app.post("/generate-site", response_model=SiteGenerationJobResponse, status_code=202)
+async def generate_site(request: SiteGenerationRequest):
     """
-    Génère un site e-commerce complet basé sur les informations fournies
+    Met en file d'attente la génération d'un site e-commerce complet.
+    Le pipeline (branding, structure, assets, construction, déploiement)
+    est exécuté par les workers Celery; suivre l'avancement via /site/{site_id}/status
     """
     try:
-        logger.info(f"Génération de site pour: {request.business_name}")
+        logger.info("Mise en file d'attente du site pour: %s", request.business_name)
         
-        # Étape 1: Analyse du secteur d'activité et génération du branding
-        branding_data = await brand_generator.generate_branding(
-            business_name=request.business_name,
-            industry=request.industry,
-            description=request.description,
-            target_audience=request.target_audience
-        )
+        site_id = await asyncio.to_thread(enqueue_site_generation, request)
         
-        # Étape 2: Génération du contenu et de la structure du site
-        site_structure = await ai_generator.generate_site_structure(
-            business_info=request,
-            branding=branding_data
-        )
-        
-        # Étape 3: Génération des assets (images, logos)
-        assets = await asset_manager.generate_assets(
-            branding_data=branding_data,
-            site_structure=site_structure
-        )
-        
-        # Étape 4: Construction du site final
-        site_data = await site_builder.build_site(
-            structure=site_structure,
-            branding=branding_data,
-            assets=assets
-        )
-        
-        # Étape 5: Sauvegarde et déploiement en arrière-plan
-        background_tasks.add_task(
-            save_and_deploy_site,
-            site_data,
-            request.user_id
-        )
-        
-        return SiteGenerationResponse(
+        return SiteGenerationJobResponse(
             success=True,
-            site_id=site_data["site_id"],
-            preview_url=site_data["preview_url"],
-            branding=branding_data,
-            structure=site_structure,
-            assets=assets,
-            estimated_completion_time=300  # 5 minutes
+            site_id=site_id,
+            status_url=f"/site/{site_id}/status",
+            estimated_completion_time=300,  # 5 minutes
+            message="Génération du site en file d'attente"
         )
         
     except Exception as e:
-        logger.error(f"Erreur lors de la génération du site: {str(e)}")
+        logger.error("Erreur lors de la mise en file d'attente du site: %s", e)
         raise HTTPException(status_code=500, detail=f"Erreur de génération: {str(e)}")
 
 @app.post("/generate-branding", response_model=BrandingResponse)
@@ -145,14 +170,16 @@ async def generate_branding(request: BrandingRequest):
     Génère un branding complet (logo, couleurs, typographie) pour une entreprise
     """
     try:
-        logger.info(f"Génération de branding pour: {request.business_name}")
+        logger.info("Génération de branding pour: %s", request.business_name)
         
-        branding_data = await brand_generator.generate_complete_branding(
-            business_name=request.business_name,
-            industry=request.industry,
-            style_preferences=request.style_preferences,
-            color_preferences=request.color_preferences
-        )
+        async with app.state.gen_sem:
+            branding_data = await brand_generator.generate_complete_branding(
+                business_name=request.business_name,
+                industry=request.industry,
+                style_preferences=request.style_preferences,
+                color_preferences=request.color_preferences,
+                ai_visual_identity=request.ai_visual_identity
+            )
         
         return BrandingResponse(
             success=True,
@@ -160,7 +187,37 @@ async def generate_branding(request: BrandingRequest):
         )
         
     except Exception as e:
-        logger.error(f"Erreur lors de la génération du branding: {str(e)}")
+        logger.error("Erreur lors de la génération du branding: %s", e)
+        raise HTTPException(status_code=500, detail=f"Erreur de branding: {str(e)}")
+
+@app.post("/generate-branding/batch", response_model=List[BrandingResponse])
+async def generate_branding_batch(requests: List[BrandingRequest]):
+    """
+    Génère le branding de plusieurs entreprises en un seul appel (générations en parallèle)
+    """
+    try:
+        if len(requests) > MAX_BRANDING_BATCH_SIZE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Lot trop volumineux (maximum {MAX_BRANDING_BATCH_SIZE} requêtes)"
+            )
+        
+        logger.info("Génération de branding par lot: %s entreprises", len(requests))
+        
+        # Une place de gen_sem par génération, pas une pour tout le lot
+        branding_list = await brand_generator.generate_branding_batch(
+            requests, admission=app.state.gen_sem
+        )
+        
+        return [
+            BrandingResponse(success=True, branding=branding_data)
+            for branding_data in branding_list
+        ]
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Erreur lors de la génération du branding par lot: %s", e)
         raise HTTPException(status_code=500, detail=f"Erreur de branding: {str(e)}")
 
 @app.post("/analyze-content")
@@ -169,10 +226,10 @@ async def analyze_content(request: ContentAnalysisRequest):
     Analyse le contenu d'un site web concurrent pour extraire des insights
     """
     try:
-        logger.info(f"Analyse de contenu pour: {request.url}")
+        logger.info("Analyse de contenu pour: %s", request.url)
         
         analysis = await content_scraper.analyze_website(
-            url=request.url,
+            url=str(request.url),
             analysis_type=request.analysis_type
         )
         
@@ -184,7 +241,7 @@ async def analyze_content(request: ContentAnalysisRequest):
         }
         
     except Exception as e:
-        logger.error(f"Erreur lors de l'analyse de contenu: {str(e)}")
+        logger.error("Erreur lors de l'analyse de contenu: %s", e)
         raise HTTPException(status_code=500, detail=f"Erreur d'analyse: {str(e)}")
 
 @app.post("/upload-assets")
@@ -197,20 +254,25 @@ async def upload_assets(
     Upload et traitement d'assets (images, logos, etc.)
     """
     try:
-        logger.info(f"Upload d'assets pour le site: {site_id}")
+        logger.info("Upload d'assets pour le site: %s", site_id)
         
-        uploaded_assets = []
-        for file in files:
-            asset_url = await asset_manager.upload_asset(
+        # Uploads en parallèle: chaque fichier est envoyé en flux vers le stockage
+        asset_urls = await asyncio.gather(*[
+            asset_manager.upload_asset(
                 file=file,
                 site_id=site_id,
                 asset_type=asset_type
             )
-            uploaded_assets.append({
+            for file in files
+        ])
+        uploaded_assets = [
+            {
                 "filename": file.filename,
                 "url": asset_url,
                 "type": asset_type
-            })
+            }
+            for file, asset_url in zip(files, asset_urls)
+        ]
         
         return {
             "success": True,
@@ -219,7 +281,80 @@ async def upload_assets(
         }
         
     except Exception as e:
-        logger.error(f"Erreur lors de l'upload d'assets: {str(e)}")
+        logger.error("Erreur lors de l'upload d'assets: %s", e)
+        raise HTTPException(status_code=500, detail=f"Erreur d'upload: {str(e)}")
+
+@app.post("/upload-assets/presigned")
+async def create_asset_upload_url(
+    site_id: str = Form(...),
+    asset_type: str = Form(...),
+    filename: str = Form(...),
+    content_type: str = Form(...)
+):
+    """
+    Fournit une URL d'upload direct vers S3 (POST présigné): le fichier ne transite
+    pas par le service. /upload-assets reste disponible pour les petits fichiers
+    """
+    try:
+        logger.info("Création d'une URL d'upload direct pour le site: %s", site_id)
+        
+        upload = await asset_manager.create_upload_url(
+            site_id=site_id,
+            asset_type=asset_type,
+            filename=filename,
+            content_type=content_type
+        )
+        
+        return {
+            "success": True,
+            "upload": upload
+        }
+        
+    except Exception as e:
+        logger.error("Erreur lors de la création de l'URL d'upload: %s", e)
+        raise HTTPException(status_code=500, detail=f"Erreur d'upload: {str(e)}")
+
+@app.post("/upload-assets-stream")
+async def upload_assets_stream(
+    http_request: Request,
+    site_id: str,
+    asset_type: str,
+    filename: str
+):
+    """
+    Upload d'un asset volumineux envoyé en corps brut (application/octet-stream),
+    transmis au stockage au fil de la réception
+    """
+    try:
+        logger.info("Upload d'asset en flux pour le site: %s", site_id)
+        
+        # Refus immédiat si la taille annoncée dépasse la limite (revérifiée en flux)
+        content_length = http_request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > STREAM_UPLOAD_MAX_SIZE:
+            raise UploadTooLargeError(f"Fichier trop volumineux (maximum {STREAM_UPLOAD_MAX_SIZE} octets)")
+        
+        asset_url = await asset_manager.upload_asset_stream(
+            chunks=http_request.stream(),
+            site_id=site_id,
+            asset_type=asset_type,
+            filename=filename,
+            content_type=http_request.headers.get("content-type", "application/octet-stream")
+        )
+        
+        return {
+            "success": True,
+            "asset": {
+                "filename": filename,
+                "url": asset_url,
+                "type": asset_type
+            },
+            "message": "Asset uploadé avec succès"
+        }
+        
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        logger.error("Erreur lors de l'upload d'asset en flux: %s", e)
         raise HTTPException(status_code=500, detail=f"Erreur d'upload: {str(e)}")
 
 @app.post("/optimize-content")
@@ -232,13 +367,14 @@ async def optimize_content(
     Optimise le contenu pour le SEO et la conversion
     """
     try:
-        logger.info(f"Optimisation de contenu: {optimization_type}")
+        logger.info("Optimisation de contenu: %s", optimization_type)
         
-        optimized_content = await ai_generator.optimize_content(
-            content=content,
-            optimization_type=optimization_type,
-            target_keywords=target_keywords.split(",") if target_keywords else []
-        )
+        async with app.state.gen_sem:
+            optimized_content = await ai_generator.optimize_content(
+                content=content,
+                optimization_type=optimization_type,
+                target_keywords=target_keywords.split(",") if target_keywords else []
+            )
         
         return {
             "success": True,
@@ -248,16 +384,26 @@ async def optimize_content(
         }
         
     except Exception as e:
-        logger.error(f"Erreur lors de l'optimisation de contenu: {str(e)}")
+        logger.error("Erreur lors de l'optimisation de contenu: %s", e)
         raise HTTPException(status_code=500, detail=f"Erreur d'optimisation: {str(e)}")
 
 @app.get("/site/{site_id}/status")
-async def get_site_status(site_id: str):
+async def get_site_status(site_id: str, http_request: Request, response: Response):
     """
     Récupère le statut de génération d'un site
+    (ETag sur le contenu du statut: 304 si le statut n'a pas changé)
     """
     try:
-        status = await site_builder.get_site_status(site_id)
+        status = await asyncio.to_thread(get_queued_site_status, site_id)
+        if status is None:
+            status = await site_builder.get_site_status(site_id)
+
+        # Empreinte du statut complet: un passage en erreur sans nouvelle date change aussi l'ETag
+        etag = f'W/"{hashlib.sha1(status.model_dump_json().encode()).hexdigest()}"'
+        if http_request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+
+        response.headers["ETag"] = etag
         return {
             "success": True,
             "site_id": site_id,
@@ -265,34 +411,21 @@ async def get_site_status(site_id: str):
         }
         
     except Exception as e:
-        logger.error(f"Erreur lors de la récupération du statut: {str(e)}")
+        logger.error("Erreur lors de la récupération du statut: %s", e)
         raise HTTPException(status_code=500, detail=f"Erreur de statut: {str(e)}")
 
-async def save_and_deploy_site(site_data: Dict[str, Any], user_id: str):
-    """
-    Sauvegarde et déploie le site en arrière-plan
-    """
-    try:
-        logger.info(f"Sauvegarde et déploiement du site pour l'utilisateur: {user_id}")
-        
-        # Sauvegarde en base de données
-        await site_builder.save_site_to_database(site_data, user_id)
-        
-        # Déploiement sur CDN
-        await site_builder.deploy_site(site_data)
-        
-        logger.info(f"Site déployé avec succès: {site_data['site_id']}")
-        
-    except Exception as e:
-        logger.error(f"Erreur lors du déploiement: {str(e)}")
-
 if __name__ == "__main__":
     import uvicorn
+    dev_mode = os.getenv("ENV") == "dev"
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        # Le rechargement automatique impose un seul worker: réservé au développement
+        reload=dev_mode,
+        workers=None if dev_mode else int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        loop="uvloop",
+        http="httptools",
         log_level="info"
     )
 
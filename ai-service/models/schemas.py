@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl
 from typing import List, Optional, Dict, Any, Union
 from enum import Enum
 from datetime import datetime
@@ -25,6 +25,9 @@ class StylePreference(str, Enum):
     PROFESSIONAL = "professionnel"
 
 class ColorScheme(BaseModel):
+    # Immuable: instances internées et partagées entre brandings
+    model_config = ConfigDict(frozen=True)
+
     primary: str = Field(..., description="Couleur principale en hex")
     secondary: str = Field(..., description="Couleur secondaire en hex")
     accent: str = Field(..., description="Couleur d'accent en hex")
@@ -32,6 +35,9 @@ class ColorScheme(BaseModel):
     text: str = Field(..., description="Couleur du texte en hex")
 
 class Typography(BaseModel):
+    # Immuable: une instance par style, partagée entre brandings
+    model_config = ConfigDict(frozen=True)
+
     heading_font: str = Field(..., description="Police pour les titres")
     body_font: str = Field(..., description="Police pour le corps de texte")
     font_sizes: Dict[str, str] = Field(..., description="Tailles de police")
@@ -44,26 +50,28 @@ class BrandingData(BaseModel):
     brand_values: List[str] = Field(..., description="Valeurs de la marque")
     tagline: str = Field(..., description="Slogan de la marque")
 
+    @property
+    def brand_values_joined(self) -> str:
+        """Valeurs de la marque jointes (calcul trivial: jamais périmé après modification ou copie)"""
+        return ', '.join(self.brand_values)
+
 class SiteGenerationRequest(BaseModel):
     user_id: str = Field(..., description="ID de l'utilisateur")
     business_name: str = Field(..., min_length=1, max_length=100)
     industry: IndustryType
     description: str = Field(..., min_length=10, max_length=1000)
     target_audience: str = Field(..., min_length=5, max_length=500)
-    competitor_urls: Optional[List[str]] = Field(default=[], max_items=5)
+    competitor_urls: Optional[List[HttpUrl]] = Field(default=[], max_length=5)
     style_preferences: Optional[List[StylePreference]] = Field(default=[])
     color_preferences: Optional[List[str]] = Field(default=[])
     features_required: Optional[List[str]] = Field(default=[])
     budget_range: Optional[str] = None
     launch_timeline: Optional[str] = None
 
-    @validator('competitor_urls')
-    def validate_urls(cls, v):
-        if v:
-            for url in v:
-                if not url.startswith(('http://', 'https://')):
-                    raise ValueError(f"URL invalide: {url}")
-        return v
+    @property
+    def features_required_joined(self) -> str:
+        """Fonctionnalités requises jointes (calcul trivial: jamais périmé après modification ou copie)"""
+        return ', '.join(self.features_required or [])
 
 class BrandingRequest(BaseModel):
     business_name: str = Field(..., min_length=1, max_length=100)
@@ -72,24 +80,29 @@ class BrandingRequest(BaseModel):
     color_preferences: Optional[List[str]] = Field(default=[])
     brand_personality: Optional[str] = None
     target_demographic: Optional[str] = None
+    ai_visual_identity: bool = Field(default=True, description="Couleurs et typographie générées par IA (False: palette calculée en HSL, sans appel IA)")
 
 class ContentAnalysisRequest(BaseModel):
-    url: str = Field(..., description="URL du site à analyser")
+    url: HttpUrl = Field(..., description="URL du site à analyser")
     analysis_type: str = Field(default="complete", description="Type d'analyse")
     focus_areas: Optional[List[str]] = Field(default=[])
 
-    @validator('url')
-    def validate_url(cls, v):
-        if not v.startswith(('http://', 'https://')):
-            raise ValueError("URL doit commencer par http:// ou https://")
-        return v
+class PageSection(BaseModel):
+    section_type: str  # hero, features, products, testimonials, etc.
+    content: Dict[str, Any] = Field(default={})
+    settings: Dict[str, Any] = Field(default={})
+
+class PageMetaData(BaseModel):
+    title: str = ""
+    description: str = ""
+    keywords: List[str] = Field(default=[])
 
 class PageStructure(BaseModel):
     page_id: str
     page_name: str
     page_type: str  # home, product, about, contact, etc.
-    sections: List[Dict[str, Any]]
-    meta_data: Dict[str, str]
+    sections: List[PageSection]
+    meta_data: PageMetaData
     seo_data: Dict[str, str]
 
 class SiteStructure(BaseModel):
@@ -103,6 +116,7 @@ class AssetData(BaseModel):
     asset_id: str
     asset_type: str  # logo, image, icon, etc.
     url: str
+    url_webp: Optional[str] = None  # Variante WebP (<picture>, avec url en repli)
     alt_text: Optional[str] = None
     dimensions: Optional[Dict[str, int]] = None
     file_size: Optional[int] = None
@@ -117,6 +131,13 @@ class SiteGenerationResponse(BaseModel):
     estimated_completion_time: int  # en secondes
     message: Optional[str] = None
 
+class SiteGenerationJobResponse(BaseModel):
+    success: bool
+    site_id: str
+    status_url: str
+    estimated_completion_time: int  # en secondes
+    message: Optional[str] = None
+
 class BrandingResponse(BaseModel):
     success: bool
     branding: BrandingData
@@ -1,10 +1,12 @@
-import openai
 import json
+import orjson
 import asyncio
+import hashlib
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, TypeVar
 from datetime import datetime
 import os
+from cachetools import TTLCache
 from models.schemas import (
     SiteGenerationRequest, 
     BrandingData, 
@@ -13,28 +15,187 @@ from models.schemas import (
     ContentOptimization,
     AIInsight
 )
+from services.redis_cache import redis_cache
+from services.coalesce import coalesce
+from services.rate_limiter import openai_rate_limiter, count_tokens
+from services.openai_client import (
+    get_openai_client,
+    with_retries,
+    OPENAI_MAX_RETRIES,
+    completion_timeout,
+    OPENAI_LONG_GENERATION_TOKENS
+)
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Au-delà de cette taille, le parsing JSON est déporté dans un thread pour ne pas bloquer la boucle
+JSON_THREAD_THRESHOLD = 64_000
+
+# Messages système partagés par tous les appels (alloués une seule fois)
+_SYS_STRUCTURE = {
+    "role": "system",
+    "content": "Tu es un expert en création de sites e-commerce. Tu génères des structures de site optimisées pour la conversion et l'expérience utilisateur."
+}
+_SYS_CONTENT = {
+    "role": "system",
+    "content": "Tu es un rédacteur expert en e-commerce. Tu crées du contenu engageant et optimisé pour la conversion."
+}
+_SYS_OPTIMIZE = {
+    "role": "system",
+    "content": "Tu es un expert en optimisation de contenu SEO et conversion."
+}
+_SYS_PRODUCT = {
+    "role": "system",
+    "content": "Tu es un expert en rédaction de descriptions de produits e-commerce."
+}
+_SYS_INSIGHTS = {
+    "role": "system",
+    "content": "Tu es un analyste de marché expert en e-commerce."
+}
+
+def _truncate_strings(data: Any, max_length: int) -> Any:
+    """Copie de données JSON avec les chaînes tronquées à max_length caractères"""
+    if isinstance(data, str):
+        return data if len(data) <= max_length else data[:max_length] + "…"
+    if isinstance(data, list):
+        return [_truncate_strings(item, max_length) for item in data]
+    if isinstance(data, dict):
+        return {key: _truncate_strings(value, max_length) for key, value in data.items()}
+    return data
+
 class AIGenerator:
     """Service de génération de contenu et de structure de site par IA"""
     
     def __init__(self):
         self.client = None
-        self.model = "gpt-4"
+        # Modèle par tâche (compatibles mode JSON), surchargeable via OPENAI_MODEL_<TÂCHE>
+        default_models = {
+            "structure": "gpt-4o",
+            "content": "gpt-4o",
+            "optimize": "gpt-4o-mini",
+            "product": "gpt-4o-mini",
+            "insights": "gpt-4o"
+        }
+        self.models = {
+            task: os.getenv(f"OPENAI_MODEL_{task.upper()}", model)
+            for task, model in default_models.items()
+        }
         self.max_tokens = 4000
         self.temperature = 0.7
+        # Graine fixe: réponses reproductibles pour des entrées identiques (cohérent avec le cache)
+        self.seed = int(os.getenv('OPENAI_SEED', 42))
+        
+        # Appels parallèles bornés (le débit est limité globalement dans _chat)
+        self.max_concurrency = int(os.getenv('OPENAI_MAX_CONCURRENCY', 10))
+        
+        # Produits décrits par requête (borné par la limite de tokens en sortie)
+        self.product_batch_size = int(os.getenv('OPENAI_PRODUCT_BATCH_SIZE', 4))
+        
+        # Reprises sur erreurs transitoires (délai par tentative: completion_timeout)
+        self.max_retries = OPENAI_MAX_RETRIES
+        
+        # Budget de tokens des données injectées dans les prompts (contexte, concurrents)
+        self.context_token_budget = int(os.getenv('OPENAI_CONTEXT_TOKEN_BUDGET', 2000))
+        
+        # Cache des réponses validées pour les prompts identiques (régénération d'un même profil)
+        self.response_cache = TTLCache(
+            maxsize=int(os.getenv('OPENAI_CACHE_SIZE', 10000)),
+            ttl=int(os.getenv('OPENAI_CACHE_TTL', 3600))
+        )
         
     async def initialize(self):
         """Initialise le client OpenAI"""
         try:
             # Le client OpenAI est déjà configuré via les variables d'environnement
-            self.client = openai.OpenAI()
+            # Reprises gérées par _chat (with_retries: Retry-After, backoff avec jitter)
+            # Client partagé du processus: pool HTTP/2 élargi, appels concurrents multiplexés
+            self.client = get_openai_client()
+            # Chargement des encodages tiktoken hors de la boucle (téléchargement au premier usage)
+            for model in set(self.models.values()):
+                await asyncio.to_thread(count_tokens, "", model)
             logger.info("Client OpenAI initialisé avec succès")
         except Exception as e:
-            logger.error(f"Erreur lors de l'initialisation d'OpenAI: {e}")
+            logger.error("Erreur lors de l'initialisation d'OpenAI: %s", e)
             raise
 
+    async def _chat(
+        self,
+        convert: Optional[Callable[[Any], T]] = None,
+        cache: bool = True,
+        **kwargs
+    ) -> T:
+        """
+        Appel chat.completions avec cache exact (modèle, température, messages),
+        partage des appels identiques simultanés et reprises (with_retries) sur
+        limite de débit, erreur réseau/timeout et erreur serveur.
+        Renvoie la réponse JSON parsée, convertie par `convert` si fourni.
+        cache=False quand l'appelant met déjà son résultat en cache (un seul niveau)
+        """
+        cache_key = hashlib.sha256(json.dumps(kwargs, sort_keys=True).encode()).hexdigest()
+        content = self.response_cache.get(cache_key) if cache else None
+        if content is None:
+            # Appels identiques simultanés: une seule requête partagée
+            content = await coalesce(
+                f"openai:{cache_key}", lambda: self._chat_request(cache_key, kwargs, convert, cache)
+            )
+        
+        # Chaque appelant reçoit ses propres objets (jamais partagés via le cache)
+        data = await self._parse_json(content)
+        return convert(data) if convert else data
+
+    async def _chat_request(
+        self,
+        cache_key: str,
+        kwargs: Dict[str, Any],
+        convert: Optional[Callable[[Any], Any]],
+        cache: bool
+    ) -> str:
+        """
+        Exécute l'appel chat.completions (limiteur, reprises) et renvoie le contenu.
+        Mis en cache seulement si la réponse est complète et passe parsing et conversion
+        """
+        await self._reserve_rate(kwargs)
+        
+        # Toutes les réponses attendues sont des objets JSON: mode JSON imposé.
+        # Délai proportionnel à max_tokens; pas de reprise d'une longue génération expirée
+        response = await with_retries(
+            lambda: self.client.chat.completions.create(
+                response_format={"type": "json_object"},
+                seed=self.seed,
+                timeout=completion_timeout(kwargs["max_tokens"]),
+                **kwargs
+            ),
+            self.max_retries,
+            retry_timeouts=kwargs["max_tokens"] <= OPENAI_LONG_GENERATION_TOKENS
+        )
+        
+        choice = response.choices[0]
+        data = await self._parse_json(choice.message.content)
+        if convert:
+            convert(data)
+        
+        # Réponse tronquée (max_tokens) ou filtrée: jamais rejouée depuis le cache
+        if choice.finish_reason != "stop":
+            logger.warning("Réponse OpenAI non mise en cache (finish_reason=%s)", choice.finish_reason)
+        elif cache:
+            self.response_cache[cache_key] = choice.message.content
+        return choice.message.content
+
+    async def _parse_json(self, text: str) -> Any:
+        """Parse une réponse JSON (dans un thread si elle est volumineuse)"""
+        if len(text) > JSON_THREAD_THRESHOLD:
+            return await asyncio.to_thread(orjson.loads, text)
+        return orjson.loads(text)
+
+    async def _reserve_rate(self, kwargs: Dict[str, Any]):
+        """Réservation proactive RPM/TPM (prompt + tokens de sortie maximaux)"""
+        prompt_tokens = sum(
+            count_tokens(message["content"], kwargs["model"]) for message in kwargs["messages"]
+        )
+        await openai_rate_limiter.acquire(prompt_tokens + kwargs.get("max_tokens", 0))
+
     async def generate_site_structure(
         self, 
         business_info: SiteGenerationRequest, 
@@ -44,18 +205,17 @@ class AIGenerator:
         Génère la structure complète d'un site e-commerce
         """
         try:
-            logger.info(f"Génération de la structure pour: {business_info.business_name}")
+            logger.info("Génération de la structure pour: %s", business_info.business_name)
             
             # Prompt pour la génération de structure
             prompt = self._create_structure_prompt(business_info, branding)
             
-            response = self.client.chat.completions.create(
-                model=self.model,
+            # Conversion en SiteStructure (validée avant mise en cache)
+            site_structure = await self._chat(
+                lambda structure_data: self._parse_site_structure(structure_data, business_info),
+                model=self.models["structure"],
                 messages=[
-                    {
-                        "role": "system",
-                        "content": "Tu es un expert en création de sites e-commerce. Tu génères des structures de site optimisées pour la conversion et l'expérience utilisateur."
-                    },
+                    _SYS_STRUCTURE,
                     {
                         "role": "user",
                         "content": prompt
@@ -65,17 +225,50 @@ class AIGenerator:
                 temperature=self.temperature
             )
             
-            # Parse la réponse JSON
-            structure_data = json.loads(response.choices[0].message.content)
+            logger.info("Structure générée avec %s pages", len(site_structure.pages))
+            return site_structure
             
-            # Convertit en objet SiteStructure
-            site_structure = self._parse_site_structure(structure_data, business_info)
+        except Exception as e:
+            logger.error("Erreur lors de la génération de structure: %s", e)
+            raise
+
+    async def generate_full_site(
+        self,
+        business_info: SiteGenerationRequest,
+        branding: BrandingData
+    ) -> Dict[str, Any]:
+        """
+        Génère la structure, le contenu de chaque page et les insights marché.
+        Après la structure, les appels indépendants sont lancés en parallèle
+        """
+        try:
+            site_structure = await self.generate_site_structure(business_info, branding)
             
-            logger.info(f"Structure générée avec {len(site_structure.pages)} pages")
-            return site_structure
+            page_coros = [
+                self.generate_page_content(page.page_type, business_info, branding)
+                for page in site_structure.pages
+            ]
+            insights_coro = self.generate_market_insights(
+                industry=business_info.industry.value,
+                target_audience=business_info.target_audience
+            )
+            
+            pages_content, market_insights = await asyncio.gather(
+                asyncio.gather(*page_coros),
+                insights_coro
+            )
+            
+            return {
+                "structure": site_structure,
+                "pages_content": {
+                    page.page_id: content
+                    for page, content in zip(site_structure.pages, pages_content)
+                },
+                "market_insights": market_insights
+            }
             
         except Exception as e:
-            logger.error(f"Erreur lors de la génération de structure: {e}")
+            logger.error("Erreur lors de la génération complète du site: %s", e)
             raise
 
     async def generate_page_content(
@@ -91,13 +284,10 @@ class AIGenerator:
         try:
             prompt = self._create_content_prompt(page_type, business_info, branding, additional_context)
             
-            response = self.client.chat.completions.create(
-                model=self.model,
+            content_data = await self._chat(
+                model=self.models["content"],
                 messages=[
-                    {
-                        "role": "system",
-                        "content": "Tu es un rédacteur expert en e-commerce. Tu crées du contenu engageant et optimisé pour la conversion."
-                    },
+                    _SYS_CONTENT,
                     {
                         "role": "user",
                         "content": prompt
@@ -106,14 +296,13 @@ class AIGenerator:
                 max_tokens=self.max_tokens,
                 temperature=self.temperature
             )
-            
-            content_data = json.loads(response.choices[0].message.content)
             return content_data
             
         except Exception as e:
-            logger.error(f"Erreur lors de la génération de contenu: {e}")
+            logger.error("Erreur lors de la génération de contenu: %s", e)
             raise
 
+    @redis_cache(ttl=86400, model=ContentOptimization)
     async def optimize_content(
         self, 
         content: str, 
@@ -147,13 +336,19 @@ class AIGenerator:
             }}
             """
             
-            response = self.client.chat.completions.create(
-                model=self.model,
+            return await self._chat(
+                lambda optimization_data: ContentOptimization(
+                    original_content=content,
+                    optimized_content=optimization_data["optimized_content"],
+                    improvements=optimization_data["improvements"],
+                    seo_score=optimization_data.get("seo_score"),
+                    readability_score=optimization_data.get("readability_score")
+                ),
+                # Résultat déjà mis en cache dans Redis par @redis_cache
+                cache=False,
+                model=self.models["optimize"],
                 messages=[
-                    {
-                        "role": "system",
-                        "content": "Tu es un expert en optimisation de contenu SEO et conversion."
-                    },
+                    _SYS_OPTIMIZE,
                     {
                         "role": "user",
                         "content": prompt
@@ -163,18 +358,8 @@ class AIGenerator:
                 temperature=0.3
             )
             
-            optimization_data = json.loads(response.choices[0].message.content)
-            
-            return ContentOptimization(
-                original_content=content,
-                optimized_content=optimization_data["optimized_content"],
-                improvements=optimization_data["improvements"],
-                seo_score=optimization_data.get("seo_score"),
-                readability_score=optimization_data.get("readability_score")
-            )
-            
         except Exception as e:
-            logger.error(f"Erreur lors de l'optimisation de contenu: {e}")
+            logger.error("Erreur lors de l'optimisation de contenu: %s", e)
             raise
 
     async def generate_product_descriptions(
@@ -184,71 +369,89 @@ class AIGenerator:
         target_audience: str
     ) -> List[Dict]:
         """
-        Génère des descriptions de produits optimisées
+        Génère des descriptions de produits optimisées.
+        Les produits sont regroupés par lots (une requête par lot), lots en parallèle
         """
         try:
-            enhanced_products = []
+            semaphore = asyncio.Semaphore(self.max_concurrency)
             
-            for product in products:
+            async def describe_batch(batch: List[Dict]) -> List[Dict]:
+                products_list = "\n".join(
+                    f"""
+                {index}. Nom du produit: {product.get('name', '')}
+                   Catégorie: {product.get('category', '')}
+                   Caractéristiques: {product.get('features', [])}
+                   Prix: {product.get('price', '')}"""
+                    for index, product in enumerate(batch, start=1)
+                )
                 prompt = f"""
-                Génère une description de produit engageante pour:
-                
-                Nom du produit: {product.get('name', '')}
-                Catégorie: {product.get('category', '')}
-                Caractéristiques: {product.get('features', [])}
-                Prix: {product.get('price', '')}
+                Génère une description de produit engageante pour chacun des {len(batch)} produits suivants:
+                {products_list}
                 
                 Ton de marque: {brand_voice}
                 Audience cible: {target_audience}
                 
-                Fournis:
+                Fournis pour chaque produit:
                 1. Titre accrocheur
                 2. Description courte (50 mots)
                 3. Description longue (150-200 mots)
                 4. Points clés (3-5 bullet points)
                 5. Mots-clés SEO
                 
-                Format JSON:
+                Format JSON, exactement {len(batch)} descriptions dans l'ordre des produits:
                 {{
-                    "title": "...",
-                    "short_description": "...",
-                    "long_description": "...",
-                    "key_points": ["..."],
-                    "seo_keywords": ["..."]
+                    "products": [
+                        {{
+                            "title": "...",
+                            "short_description": "...",
+                            "long_description": "...",
+                            "key_points": ["..."],
+                            "seo_keywords": ["..."]
+                        }}
+                    ]
                 }}
                 """
                 
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "Tu es un expert en rédaction de descriptions de produits e-commerce."
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    max_tokens=1000,
-                    temperature=0.7
-                )
+                def parse_descriptions(data: Dict[str, Any]) -> List[Dict]:
+                    descriptions = data["products"]
+                    if len(descriptions) != len(batch):
+                        raise ValueError(
+                            f"{len(descriptions)} descriptions reçues pour {len(batch)} produits"
+                        )
+                    return descriptions
                 
-                description_data = json.loads(response.choices[0].message.content)
+                async with semaphore:
+                    descriptions = await self._chat(
+                        parse_descriptions,
+                        model=self.models["product"],
+                        messages=[
+                            _SYS_PRODUCT,
+                            {
+                                "role": "user",
+                                "content": prompt
+                            }
+                        ],
+                        max_tokens=min(1000 * len(batch), 4096),
+                        temperature=0.7
+                    )
                 
-                enhanced_product = {
-                    **product,
-                    **description_data
-                }
-                enhanced_products.append(enhanced_product)
-                
-                # Pause pour éviter les limites de taux
-                await asyncio.sleep(0.5)
+                return [
+                    {**product, **description_data}
+                    for product, description_data in zip(batch, descriptions)
+                ]
             
-            return enhanced_products
+            batches = [
+                products[i:i + self.product_batch_size]
+                for i in range(0, len(products), self.product_batch_size)
+            ]
+            
+            # L'ordre des produits est conservé par gather
+            results = await asyncio.gather(*[describe_batch(batch) for batch in batches])
+            
+            return [product for batch_result in results for product in batch_result]
             
         except Exception as e:
-            logger.error(f"Erreur lors de la génération de descriptions: {e}")
+            logger.error("Erreur lors de la génération de descriptions: %s", e)
             raise
 
     async def generate_market_insights(
@@ -265,7 +468,7 @@ class AIGenerator:
             Analyse le marché pour:
             Secteur: {industry}
             Audience cible: {target_audience}
-            Données concurrents: {json.dumps(competitor_data) if competitor_data else 'Aucune'}
+            Données concurrents: {self._fit_to_budget(competitor_data, self.models["insights"]) if competitor_data else 'Aucune'}
             
             Fournis des insights sur:
             1. Tendances du marché
@@ -288,13 +491,13 @@ class AIGenerator:
             }}
             """
             
-            response = self.client.chat.completions.create(
-                model=self.model,
+            return await self._chat(
+                lambda insights_data: [
+                    AIInsight(**insight_data) for insight_data in insights_data["insights"]
+                ],
+                model=self.models["insights"],
                 messages=[
-                    {
-                        "role": "system",
-                        "content": "Tu es un analyste de marché expert en e-commerce."
-                    },
+                    _SYS_INSIGHTS,
                     {
                         "role": "user",
                         "content": prompt
@@ -304,19 +507,41 @@ class AIGenerator:
                 temperature=0.6
             )
             
-            insights_data = json.loads(response.choices[0].message.content)
-            
-            insights = []
-            for insight_data in insights_data["insights"]:
-                insight = AIInsight(**insight_data)
-                insights.append(insight)
-            
-            return insights
-            
         except Exception as e:
-            logger.error(f"Erreur lors de la génération d'insights: {e}")
+            logger.error("Erreur lors de la génération d'insights: %s", e)
             raise
 
+    def _fit_to_budget(self, data: Any, model: str) -> str:
+        """
+        Sérialise des données pour un prompt en respectant le budget de tokens:
+        raccourcit d'abord les longues chaînes, puis retire les éléments les moins
+        importants (listes triées par "score" si présent, dernières clés des dicts)
+        """
+        budget = self.context_token_budget
+        text = orjson.dumps(data).decode()
+        if count_tokens(text, model) <= budget:
+            return text
+        
+        data = _truncate_strings(data, max_length=300)
+        text = orjson.dumps(data).decode()
+        
+        if isinstance(data, list):
+            items = sorted(
+                data,
+                key=lambda item: item.get("score", 0) if isinstance(item, dict) else 0,
+                reverse=True
+            )
+            while len(items) > 1 and count_tokens(text, model) > budget:
+                items.pop()
+                text = orjson.dumps(items).decode()
+        elif isinstance(data, dict):
+            keys = list(data)
+            while len(keys) > 1 and count_tokens(text, model) > budget:
+                keys.pop()
+                text = orjson.dumps({key: data[key] for key in keys}).decode()
+        
+        return text
+
     def _create_structure_prompt(
         self, 
         business_info: SiteGenerationRequest, 
@@ -330,11 +555,11 @@ class AIGenerator:
         Secteur: {business_info.industry}
         Description: {business_info.description}
         Audience cible: {business_info.target_audience}
-        Fonctionnalités requises: {business_info.features_required}
+        Fonctionnalités requises: {business_info.features_required_joined}
         
         Branding:
         - Ton de marque: {branding.brand_voice}
-        - Valeurs: {', '.join(branding.brand_values)}
+        - Valeurs: {branding.brand_values_joined}
         - Slogan: {branding.tagline}
         
         Génère une structure avec:
@@ -395,10 +620,10 @@ class AIGenerator:
         
         Branding:
         - Ton: {branding.brand_voice}
-        - Valeurs: {', '.join(branding.brand_values)}
+        - Valeurs: {branding.brand_values_joined}
         - Slogan: {branding.tagline}
         
-        Contexte additionnel: {json.dumps(context)}
+        Contexte additionnel: {self._fit_to_budget(context, self.models["content"])}
         
         Génère un contenu engageant, optimisé SEO et orienté conversion.
         Inclus des appels à l'action pertinents et du contenu persuasif.
@@ -413,27 +638,10 @@ class AIGenerator:
     ) -> SiteStructure:
         """Parse les données de structure en objet SiteStructure"""
         try:
-            pages = []
-            for page_data in structure_data["pages"]:
-                page = PageStructure(
-                    page_id=page_data["page_id"],
-                    page_name=page_data["page_name"],
-                    page_type=page_data["page_type"],
-                    sections=page_data["sections"],
-                    meta_data=page_data["meta_data"],
-                    seo_data=page_data["seo_data"]
-                )
-                pages.append(page)
-            
-            return SiteStructure(
-                site_id=structure_data["site_id"],
-                pages=pages,
-                navigation=structure_data["navigation"],
-                global_settings=structure_data["global_settings"],
-                integrations=structure_data["integrations"]
-            )
+            # Validation de tout l'arbre (pages, sections, méta) en un seul appel pydantic-core
+            return SiteStructure.model_validate(structure_data)
             
         except Exception as e:
-            logger.error(f"Erreur lors du parsing de structure: {e}")
+            logger.error("Erreur lors du parsing de structure: %s", e)
             raise
 
@@ -1,29 +1,68 @@
 import asyncio
 import aiofiles
-import aiohttp
+import functools
+import hashlib
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
+import httpx
 import logging
 import uuid
 import os
+import shutil
 import json
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, BinaryIO, AsyncIterator, Union
 from datetime import datetime
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageColor, ImageDraw, ImageFont, features
+import numpy as np
 import io
 import base64
 from fastapi import UploadFile
-from models.schemas import AssetData, BrandingData, SiteStructure
+from models.schemas import AssetData, BrandingData, ColorScheme
+from services.http_client import create_http_client
 
 logger = logging.getLogger(__name__)
 
+ASSET_PROCESS_WORKERS = int(os.getenv('ASSET_PROCESS_WORKERS', 0))  # 0: rendu dans des threads
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 Mo par morceau pour les uploads en flux
+S3_MIN_PART_SIZE = 5 << 20  # Taille minimale d'une part multipart S3 (hors dernière)
+S3_MAX_POOL_CONNECTIONS = int(os.getenv('S3_MAX_POOL_CONNECTIONS', 50))
+S3_UPLOAD_CONCURRENCY = int(os.getenv('S3_UPLOAD_CONCURRENCY', 16))  # Uploads simultanés par processus
+S3_DELETE_CONCURRENCY = 4  # Lots delete_objects (1000 clés) simultanés
+PRESIGNED_UPLOAD_MAX_SIZE = int(os.getenv('PRESIGNED_UPLOAD_MAX_SIZE', 50 << 20))
+PRESIGNED_UPLOAD_EXPIRES = 900  # Validité (secondes) d'une URL d'upload direct
+FAVICON_SIZES = [(16, 16), (32, 32), (48, 48)]
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'  # Clés jamais réécrites
+WEBP_PARAMS = {'quality': 82, 'method': 6}  # Encodage WebP des images web
+S3_MULTIPART_THRESHOLD = 8 << 20  # Au-delà: upload multipart, parts envoyées en parallèle
+STREAM_UPLOAD_MAX_SIZE = int(os.getenv('STREAM_UPLOAD_MAX_SIZE', 500 << 20))  # Corps d'upload en flux
+S3_STREAM_PART_CONCURRENCY = 4  # Parts en vol par upload en flux (mémoire bornée à 4 x 5 Mo)
+
+
+class UploadTooLargeError(ValueError):
+    """Corps d'upload supérieur à STREAM_UPLOAD_MAX_SIZE"""
+
+
 class AssetManager:
     """Service de gestion des assets (images, logos, etc.)"""
     
     def __init__(self):
         self.s3_client = None
+        self.http_client = None
+        self.process_pool: Optional[ProcessPoolExecutor] = None
+        self.transfer_config = TransferConfig(
+            multipart_threshold=S3_MULTIPART_THRESHOLD,
+            max_concurrency=8,
+            use_threads=True
+        )
         self.bucket_name = os.getenv('AWS_S3_BUCKET', 'klm-pegasus-assets')
         self.cdn_base_url = os.getenv('CDN_BASE_URL', 'https://cdn.klmpegasus.com')
+        # Préfixe des URLs publiques (S3 ou CDN), fixé une fois le stockage choisi
+        self.url_prefix = self.cdn_base_url
         self.local_storage_path = '/tmp/assets'
+        # Borne les uploads simultanés (tous sites confondus) sous le pool de connexions S3
+        self.upload_semaphore = asyncio.Semaphore(S3_UPLOAD_CONCURRENCY)
         
         # Configuration pour la génération d'images
         self.image_sizes = {
@@ -34,75 +73,87 @@ class AssetManager:
             'banner': (1200, 300)
         }
         
-    async def initialize(self):
+    async def initialize(self, http_client: Optional[httpx.AsyncClient] = None):
         """Initialise le service de gestion des assets"""
         try:
+            # Client HTTP partagé pour les téléchargements d'images
+            self.http_client = http_client or create_http_client()
+            
             # Initialisation du client S3
             if os.getenv('AWS_ACCESS_KEY_ID'):
                 self.s3_client = boto3.client(
                     's3',
                     aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
                     aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-                    region_name=os.getenv('AWS_REGION', 'eu-west-1')
+                    region_name=os.getenv('AWS_REGION', 'eu-west-1'),
+                    # Pool assez large pour les uploads parallèles (10 connexions par défaut)
+                    config=BotoConfig(max_pool_connections=S3_MAX_POOL_CONNECTIONS)
                 )
+                self.url_prefix = f"https://{self.bucket_name}.s3.amazonaws.com"
+            
+            # Pool de processus pour le rendu d'images (désactivé par défaut:
+            # les processus enfants des workers Celery prefork ne peuvent pas en créer)
+            if ASSET_PROCESS_WORKERS > 0 and self.process_pool is None:
+                self.process_pool = ProcessPoolExecutor(max_workers=ASSET_PROCESS_WORKERS)
             
             # Création du dossier local si nécessaire
             os.makedirs(self.local_storage_path, exist_ok=True)
             
+            # Encodage/décodage JPEG: libjpeg-turbo attendu (voir Dockerfile)
+            if not features.check_feature('libjpeg_turbo'):
+                logger.warning("Pillow n'est pas lié à libjpeg-turbo (libjpeg %s): JPEG plus lent", features.version('jpg'))
+            
             logger.info("Service de gestion des assets initialisé avec succès")
             
         except Exception as e:
-            logger.error(f"Erreur lors de l'initialisation des assets: {e}")
+            logger.error("Erreur lors de l'initialisation des assets: %s", e)
             raise
 
+    async def shutdown(self):
+        """Arrête le pool de processus de rendu"""
+        if self.process_pool:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
+            self.process_pool = None
+
+    async def _run_cpu(self, func, *args):
+        """
+        Exécute un rendu PIL: pool de processus si configuré (hors GIL, tous les cœurs),
+        sinon thread. Les fonctions et arguments doivent être sérialisables (pickle)
+        """
+        if self.process_pool:
+            return await asyncio.get_running_loop().run_in_executor(self.process_pool, func, *args)
+        return await asyncio.to_thread(func, *args)
+
     async def generate_assets(
         self,
         branding_data: BrandingData,
-        site_structure: SiteStructure
+        site_id: str
     ) -> List[AssetData]:
         """
-        Génère tous les assets nécessaires pour un site
+        Génère tous les assets nécessaires pour un site.
+        Ne dépend que du branding: peut s'exécuter en parallèle de la structure
         """
         try:
-            logger.info(f"Génération des assets pour le site: {site_structure.site_id}")
-            
-            generated_assets = []
-            
-            # Génération du logo
-            logo_asset = await self._generate_logo(
-                site_structure.site_id,
-                branding_data
+            logger.info("Génération des assets pour le site: %s", site_id)
+            
+            # Logo, hero, produits et icônes sont indépendants: générés en parallèle
+            logo_asset, hero_assets, product_assets, icon_assets = await asyncio.gather(
+                self._generate_logo(site_id, branding_data),
+                self._generate_hero_images(site_id, branding_data),
+                self._generate_product_placeholders(site_id, branding_data),
+                self._generate_icons(site_id, branding_data)
             )
-            if logo_asset:
-                generated_assets.append(logo_asset)
-            
-            # Génération des images hero
-            hero_assets = await self._generate_hero_images(
-                site_structure.site_id,
-                branding_data,
-                site_structure
-            )
-            generated_assets.extend(hero_assets)
             
-            # Génération des images de produits placeholder
-            product_assets = await self._generate_product_placeholders(
-                site_structure.site_id,
-                branding_data
-            )
+            generated_assets = [logo_asset] if logo_asset else []
+            generated_assets.extend(hero_assets)
             generated_assets.extend(product_assets)
-            
-            # Génération des icônes
-            icon_assets = await self._generate_icons(
-                site_structure.site_id,
-                branding_data
-            )
             generated_assets.extend(icon_assets)
             
-            logger.info(f"Génération terminée: {len(generated_assets)} assets créés")
+            logger.info("Génération terminée: %s assets créés", len(generated_assets))
             return generated_assets
             
         except Exception as e:
-            logger.error(f"Erreur lors de la génération d'assets: {e}")
+            logger.error("Erreur lors de la génération d'assets: %s", e)
             raise
 
     async def upload_asset(
@@ -115,84 +166,273 @@ class AssetManager:
         Upload un asset vers le stockage
         """
         try:
-            logger.info(f"Upload d'asset: {file.filename} pour le site {site_id}")
+            logger.info("Upload d'asset: %s pour le site %s", file.filename, site_id)
             
             # Génération d'un nom de fichier unique
             file_extension = os.path.splitext(file.filename)[1]
             unique_filename = f"{site_id}/{asset_type}/{uuid.uuid4()}{file_extension}"
             
-            # Lecture du contenu du fichier
-            content = await file.read()
+            # Upload en flux depuis le fichier temporaire (pas de lecture complète en mémoire)
+            await file.seek(0)
+            asset_url = await self._upload_stream_to_storage(
+                unique_filename, file.file, file.content_type
+            )
+            
+            logger.info("Asset uploadé avec succès: %s", asset_url)
+            return asset_url
+            
+        except Exception as e:
+            logger.error("Erreur lors de l'upload d'asset: %s", e)
+            raise
+
+    async def create_upload_url(
+        self,
+        site_id: str,
+        asset_type: str,
+        filename: str,
+        content_type: str
+    ) -> Dict[str, Any]:
+        """
+        Crée un POST S3 présigné: le client envoie le fichier directement à S3,
+        sans transiter par le service
+        """
+        try:
+            if not self.s3_client:
+                raise ValueError("Upload direct indisponible sans stockage S3")
+            
+            file_extension = os.path.splitext(filename)[1]
+            unique_filename = f"{site_id}/{asset_type}/{uuid.uuid4()}{file_extension}"
+            
+            presigned = await asyncio.to_thread(
+                self.s3_client.generate_presigned_post,
+                Bucket=self.bucket_name,
+                Key=unique_filename,
+                Fields={'acl': 'public-read', 'Content-Type': content_type},
+                Conditions=[
+                    ['content-length-range', 0, PRESIGNED_UPLOAD_MAX_SIZE],
+                    {'acl': 'public-read'},
+                    {'Content-Type': content_type}
+                ],
+                ExpiresIn=PRESIGNED_UPLOAD_EXPIRES
+            )
+            
+            return {
+                "upload_url": presigned['url'],
+                "fields": presigned['fields'],
+                "asset_url": f"{self.url_prefix}/{unique_filename}",
+                "expires_in": PRESIGNED_UPLOAD_EXPIRES
+            }
+            
+        except Exception as e:
+            logger.error("Erreur lors de la création de l'URL d'upload: %s", e)
+            raise
+
+    async def upload_asset_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        site_id: str,
+        asset_type: str,
+        filename: str,
+        content_type: str
+    ) -> str:
+        """
+        Upload un asset reçu en flux brut (corps de requête) sans fichier temporaire.
+        Lève UploadTooLargeError au-delà de STREAM_UPLOAD_MAX_SIZE (upload abandonné)
+        """
+        chunks = self._limit_stream(chunks, STREAM_UPLOAD_MAX_SIZE)
+        try:
+            logger.info("Upload d'asset en flux: %s pour le site %s", filename, site_id)
             
-            # Upload vers S3 ou stockage local
-            asset_url = await self._upload_to_storage(unique_filename, content, file.content_type)
+            file_extension = os.path.splitext(filename)[1]
+            unique_filename = f"{site_id}/{asset_type}/{uuid.uuid4()}{file_extension}"
             
-            logger.info(f"Asset uploadé avec succès: {asset_url}")
+            if self.s3_client:
+                asset_url = await self._multipart_upload_to_s3(unique_filename, chunks, content_type)
+            else:
+                local_path = os.path.join(self.local_storage_path, unique_filename)
+                os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                
+                try:
+                    async with aiofiles.open(local_path, 'wb') as f:
+                        async for chunk in chunks:
+                            await f.write(chunk)
+                except BaseException:
+                    # Pas de fichier partiel en cas de dépassement ou de déconnexion
+                    if os.path.exists(local_path):
+                        os.remove(local_path)
+                    raise
+                
+                asset_url = f"{self.url_prefix}/{unique_filename}"
+            
+            logger.info("Asset uploadé avec succès: %s", asset_url)
             return asset_url
             
         except Exception as e:
-            logger.error(f"Erreur lors de l'upload d'asset: {e}")
+            logger.error("Erreur lors de l'upload d'asset en flux: %s", e)
+            raise
+
+    @staticmethod
+    async def _limit_stream(chunks: AsyncIterator[bytes], max_size: int) -> AsyncIterator[bytes]:
+        """Relaie le flux et lève UploadTooLargeError dès que max_size est dépassé"""
+        received = 0
+        async for chunk in chunks:
+            received += len(chunk)
+            if received > max_size:
+                raise UploadTooLargeError(f"Fichier trop volumineux (maximum {max_size} octets)")
+            yield chunk
+
+    async def _multipart_upload_to_s3(
+        self,
+        file_path: str,
+        chunks: AsyncIterator[bytes],
+        content_type: str
+    ) -> str:
+        """
+        Upload multipart S3: chaque part complète est envoyée en tâche de fond pendant
+        la lecture de la suite du flux (S3_STREAM_PART_CONCURRENCY parts en vol au plus)
+        """
+        upload = await asyncio.to_thread(
+            self.s3_client.create_multipart_upload,
+            Bucket=self.bucket_name,
+            Key=file_path,
+            ContentType=content_type,
+            ACL='public-read'
+        )
+        upload_id = upload['UploadId']
+        parts = []
+        pending = set()
+        buffer = bytearray()
+        part_count = 0
+        
+        async def upload_part(part_number: int, body: bytes):
+            async with self.upload_semaphore:
+                result = await asyncio.to_thread(
+                    self.s3_client.upload_part,
+                    Bucket=self.bucket_name,
+                    Key=file_path,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=body
+                )
+            parts.append({'ETag': result['ETag'], 'PartNumber': part_number})
+        
+        async def submit_part(body: bytes):
+            nonlocal part_count
+            # Attend qu'une part se termine avant d'en bufferiser une nouvelle
+            while len(pending) >= S3_STREAM_PART_CONCURRENCY:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                pending.difference_update(done)
+                for task in done:
+                    task.result()
+            part_count += 1
+            pending.add(asyncio.ensure_future(upload_part(part_count, body)))
+        
+        try:
+            async for chunk in chunks:
+                buffer.extend(chunk)
+                if len(buffer) >= S3_MIN_PART_SIZE:
+                    await submit_part(bytes(buffer))
+                    buffer.clear()
+            
+            # Dernière part (peut être inférieure à 5 Mo)
+            if buffer or not part_count:
+                await submit_part(bytes(buffer))
+            
+            await asyncio.gather(*pending)
+            parts.sort(key=lambda part: part['PartNumber'])
+            
+            await asyncio.to_thread(
+                self.s3_client.complete_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=file_path,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+            return f"{self.url_prefix}/{file_path}"
+            
+        except BaseException:
+            # Y compris l'annulation (client déconnecté): aucune part orpheline facturée
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            await asyncio.to_thread(
+                self.s3_client.abort_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=file_path,
+                UploadId=upload_id
+            )
             raise
 
     async def optimize_image(
         self,
         image_path: str,
         optimization_type: str = "web"
-    ) -> str:
+    ) -> Dict[str, Optional[str]]:
         """
-        Optimise une image pour le web
+        Optimise une image pour le web: {"url": JPEG, "url_webp": variante WebP (web uniquement)}
         """
         try:
-            logger.info(f"Optimisation de l'image: {image_path}")
+            logger.info("Optimisation de l'image: %s", image_path)
             
             # Chargement de l'image
             if image_path.startswith('http'):
                 # Image distante
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(image_path) as response:
-                        image_data = await response.read()
-                        image = Image.open(io.BytesIO(image_data))
+                response = await self.http_client.get(image_path)
+                source = io.BytesIO(response.content)
             else:
                 # Image locale
-                image = Image.open(image_path)
-            
-            # Optimisation selon le type
-            if optimization_type == "web":
-                # Redimensionnement si trop grande
-                max_size = (1200, 1200)
-                image.thumbnail(max_size, Image.Resampling.LANCZOS)
-                
-                # Conversion en RGB si nécessaire
-                if image.mode in ('RGBA', 'LA', 'P'):
-                    background = Image.new('RGB', image.size, (255, 255, 255))
-                    if image.mode == 'P':
-                        image = image.convert('RGBA')
-                    background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-                    image = background
-            
-            # Sauvegarde optimisée
-            optimized_path = f"{self.local_storage_path}/optimized_{uuid.uuid4()}.jpg"
-            image.save(optimized_path, 'JPEG', quality=85, optimize=True)
-            
-            # Upload de l'image optimisée
-            with open(optimized_path, 'rb') as f:
-                content = f.read()
-            
-            optimized_url = await self._upload_to_storage(
-                f"optimized/{uuid.uuid4()}.jpg",
-                content,
-                "image/jpeg"
-            )
-            
-            # Nettoyage du fichier temporaire
-            os.remove(optimized_path)
+                source = image_path
+            
+            # Décodage, redimensionnement et encodage (CPU) hors de la boucle
+            jpeg, webp = await self._run_cpu(self._optimize_image_data, source, optimization_type)
+            
+            # JPEG toujours fourni (clients sans WebP); WebP (~30% plus léger) en plus pour le web
+            name = f"optimized/{uuid.uuid4()}"
+            uploads = [self._upload_to_storage(
+                f"{name}.jpg", jpeg, "image/jpeg", cache_control=IMMUTABLE_CACHE_CONTROL
+            )]
+            if webp is not None:
+                uploads.append(self._upload_to_storage(
+                    f"{name}.webp", webp, "image/webp", cache_control=IMMUTABLE_CACHE_CONTROL
+                ))
+            urls = await asyncio.gather(*uploads)
             
-            return optimized_url
+            return {"url": urls[0], "url_webp": urls[1] if webp is not None else None}
             
         except Exception as e:
-            logger.error(f"Erreur lors de l'optimisation d'image: {e}")
+            logger.error("Erreur lors de l'optimisation d'image: %s", e)
             raise
 
+    @staticmethod
+    def _optimize_image_data(source: Union[str, io.BytesIO], optimization_type: str) -> tuple:
+        """Décode, redimensionne et ré-encode une image: (JPEG, WebP pour le web sinon None)"""
+        image = Image.open(source)
+        webp = None
+        
+        # Optimisation selon le type
+        if optimization_type == "web":
+            # Redimensionnement si trop grande: JPEG décodé directement à l'échelle IDCT
+            # la plus proche (libjpeg-turbo) avant le LANCZOS
+            max_size = (1200, 1200)
+            image.draft('RGB', max_size)
+            image.thumbnail(max_size, Image.Resampling.LANCZOS)
+            
+            # WebP gère la transparence: encodé avant l'aplatissement sur fond blanc
+            webp = AssetManager._encode_image_buffer(image, 'WEBP', **WEBP_PARAMS)
+        
+        # Conversion en RGB si nécessaire (les JPEG sont déjà en RGB)
+        image = AssetManager._flatten_to_rgb(image)
+        return AssetManager._encode_image_buffer(image, 'JPEG', quality=85, optimize=True), webp
+
+    @staticmethod
+    def _flatten_to_rgb(image: Image.Image) -> Image.Image:
+        """Aplatit une image avec transparence sur fond blanc (composition C en une passe)"""
+        if image.mode not in ('RGBA', 'LA', 'P', 'PA'):
+            return image
+        
+        background = Image.new('RGBA', image.size, (255, 255, 255, 255))
+        return Image.alpha_composite(background, image.convert('RGBA')).convert('RGB')
+
     async def generate_favicon(
         self,
         site_id: str,
@@ -202,36 +442,18 @@ class AssetManager:
         Génère un favicon pour le site
         """
         try:
-            logger.info(f"Génération du favicon pour le site: {site_id}")
-            
-            # Création d'une image 32x32 avec les couleurs de la marque
-            favicon = Image.new('RGB', (32, 32), branding_data.color_scheme.primary)
-            draw = ImageDraw.Draw(favicon)
+            logger.info("Génération du favicon pour le site: %s", site_id)
             
-            # Ajout d'un élément graphique simple
-            draw.ellipse([8, 8, 24, 24], fill=branding_data.color_scheme.accent)
-            
-            # Sauvegarde temporaire
-            favicon_path = f"{self.local_storage_path}/favicon_{site_id}.ico"
-            favicon.save(favicon_path, 'ICO')
-            
-            # Upload
-            with open(favicon_path, 'rb') as f:
-                content = f.read()
-            
-            favicon_url = await self._upload_to_storage(
-                f"{site_id}/favicon.ico",
-                content,
-                "image/x-icon"
+            # Encodage (mis en cache par couleurs) hors de la boucle, puis upload
+            content = await self._run_cpu(
+                self._render_favicon, branding_data.color_scheme.primary, branding_data.color_scheme.accent
             )
-            
-            # Nettoyage
-            os.remove(favicon_path)
+            favicon_url = await self._upload_immutable(f"{site_id}/favicon.ico", content, "image/x-icon")
             
             return favicon_url
             
         except Exception as e:
-            logger.error(f"Erreur lors de la génération du favicon: {e}")
+            logger.error("Erreur lors de la génération du favicon: %s", e)
             raise
 
     async def _generate_logo(
@@ -245,45 +467,12 @@ class AssetManager:
             # Dans une implémentation complète, ceci utiliserait un service de génération d'images IA
             
             logo_width, logo_height = self.image_sizes['logo']
-            logo = Image.new('RGBA', (logo_width, logo_height), (255, 255, 255, 0))
-            draw = ImageDraw.Draw(logo)
-            
-            # Couleurs de la marque
-            primary_color = branding_data.color_scheme.primary
-            
-            # Dessin d'un rectangle de fond
-            draw.rectangle([10, 20, logo_width-10, logo_height-20], fill=primary_color)
             
-            # Ajout du nom de l'entreprise (simplifié)
-            # Note: Dans un vrai projet, utiliser une police personnalisée
-            business_name = "LOGO"  # Placeholder
-            
-            # Calcul de la position du texte
-            text_bbox = draw.textbbox((0, 0), business_name)
-            text_width = text_bbox[2] - text_bbox[0]
-            text_height = text_bbox[3] - text_bbox[1]
-            
-            text_x = (logo_width - text_width) // 2
-            text_y = (logo_height - text_height) // 2
-            
-            draw.text((text_x, text_y), business_name, fill="white")
-            
-            # Sauvegarde temporaire
-            logo_path = f"{self.local_storage_path}/logo_{site_id}.png"
-            logo.save(logo_path, 'PNG')
-            
-            # Upload
-            with open(logo_path, 'rb') as f:
-                content = f.read()
-            
-            logo_url = await self._upload_to_storage(
-                f"{site_id}/logo.png",
-                content,
-                "image/png"
+            # Encodage (mis en cache par couleur et taille) hors de la boucle, puis upload
+            content = await self._run_cpu(
+                self._render_logo, branding_data.color_scheme.primary, logo_width, logo_height
             )
-            
-            # Nettoyage
-            os.remove(logo_path)
+            logo_url = await self._upload_immutable(f"{site_id}/logo.png", content, "image/png")
             
             return AssetData(
                 asset_id=f"logo_{site_id}",
@@ -294,14 +483,13 @@ class AssetManager:
             )
             
         except Exception as e:
-            logger.error(f"Erreur lors de la génération du logo: {e}")
+            logger.error("Erreur lors de la génération du logo: %s", e)
             return None
 
     async def _generate_hero_images(
         self,
         site_id: str,
-        branding_data: BrandingData,
-        site_structure: SiteStructure
+        branding_data: BrandingData
     ) -> List[AssetData]:
         """Génère les images hero pour le site"""
         try:
@@ -309,38 +497,25 @@ class AssetManager:
             
             # Génération d'une image hero principale
             hero_width, hero_height = self.image_sizes['hero']
-            hero_image = Image.new('RGB', (hero_width, hero_height), branding_data.color_scheme.secondary)
-            draw = ImageDraw.Draw(hero_image)
-            
-            # Gradient simple (simulation)
-            for y in range(hero_height):
-                alpha = y / hero_height
-                # Interpolation entre couleur primaire et secondaire
-                draw.line([(0, y), (hero_width, y)], fill=branding_data.color_scheme.primary)
-            
-            # Overlay semi-transparent
-            overlay = Image.new('RGBA', (hero_width, hero_height), (0, 0, 0, 100))
-            hero_image = Image.alpha_composite(hero_image.convert('RGBA'), overlay)
-            
-            # Sauvegarde et upload
-            hero_path = f"{self.local_storage_path}/hero_{site_id}.jpg"
-            hero_image.convert('RGB').save(hero_path, 'JPEG', quality=90)
-            
-            with open(hero_path, 'rb') as f:
-                content = f.read()
-            
-            hero_url = await self._upload_to_storage(
-                f"{site_id}/hero.jpg",
-                content,
-                "image/jpeg"
+            hero_jpeg, hero_webp = await self._run_cpu(
+                self._render_hero_image,
+                hero_width,
+                hero_height,
+                branding_data.color_scheme.primary,
+                branding_data.color_scheme.secondary
             )
             
-            os.remove(hero_path)
+            # Upload des deux variantes: WebP pour les navigateurs récents, JPEG en repli
+            hero_url, hero_webp_url = await asyncio.gather(
+                self._upload_immutable(f"{site_id}/hero.jpg", hero_jpeg, "image/jpeg"),
+                self._upload_immutable(f"{site_id}/hero.webp", hero_webp, "image/webp")
+            )
             
             hero_assets.append(AssetData(
                 asset_id=f"hero_{site_id}",
                 asset_type="hero",
                 url=hero_url,
+                url_webp=hero_webp_url,
                 alt_text="Image hero principale",
                 dimensions={"width": hero_width, "height": hero_height}
             ))
@@ -348,7 +523,7 @@ class AssetManager:
             return hero_assets
             
         except Exception as e:
-            logger.error(f"Erreur lors de la génération des images hero: {e}")
+            logger.error("Erreur lors de la génération des images hero: %s", e)
             return []
 
     async def _generate_product_placeholders(
@@ -358,57 +533,66 @@ class AssetManager:
     ) -> List[AssetData]:
         """Génère des images placeholder pour les produits"""
         try:
-            product_assets = []
-            product_width, product_height = self.image_sizes['product']
-            
-            # Génération de 6 images produits placeholder
-            for i in range(6):
-                product_image = Image.new('RGB', (product_width, product_height), branding_data.color_scheme.background)
-                draw = ImageDraw.Draw(product_image)
-                
-                # Bordure
-                draw.rectangle([0, 0, product_width-1, product_height-1], outline=branding_data.color_scheme.primary, width=2)
-                
-                # Texte placeholder
-                text = f"PRODUIT {i+1}"
-                text_bbox = draw.textbbox((0, 0), text)
-                text_width = text_bbox[2] - text_bbox[0]
-                text_height = text_bbox[3] - text_bbox[1]
-                
-                text_x = (product_width - text_width) // 2
-                text_y = (product_height - text_height) // 2
-                
-                draw.text((text_x, text_y), text, fill=branding_data.color_scheme.text)
-                
-                # Sauvegarde et upload
-                product_path = f"{self.local_storage_path}/product_{site_id}_{i}.jpg"
-                product_image.save(product_path, 'JPEG', quality=85)
-                
-                with open(product_path, 'rb') as f:
-                    content = f.read()
-                
-                product_url = await self._upload_to_storage(
-                    f"{site_id}/products/product_{i}.jpg",
-                    content,
-                    "image/jpeg"
-                )
-                
-                os.remove(product_path)
-                
-                product_assets.append(AssetData(
-                    asset_id=f"product_{site_id}_{i}",
-                    asset_type="product",
-                    url=product_url,
-                    alt_text=f"Image produit {i+1}",
-                    dimensions={"width": product_width, "height": product_height}
-                ))
-            
-            return product_assets
+            # Les 6 placeholders sont dessinés et uploadés en parallèle
+            return list(await asyncio.gather(*[
+                self._make_product_placeholder(site_id, i, branding_data)
+                for i in range(6)
+            ]))
             
         except Exception as e:
-            logger.error(f"Erreur lors de la génération des placeholders produits: {e}")
+            logger.error("Erreur lors de la génération des placeholders produits: %s", e)
             return []
 
+    async def _make_product_placeholder(
+        self,
+        site_id: str,
+        index: int,
+        branding_data: BrandingData
+    ) -> AssetData:
+        """Dessine (thread ou processus de rendu) puis uploade un placeholder produit"""
+        product_width, product_height = self.image_sizes['product']
+        content = await self._run_cpu(
+            self._render_product_placeholder,
+            index,
+            (product_width, product_height),
+            branding_data.color_scheme
+        )
+        
+        product_url = await self._upload_immutable(
+            f"{site_id}/products/product_{index}.jpg",
+            content,
+            "image/jpeg"
+        )
+        
+        return AssetData(
+            asset_id=f"product_{site_id}_{index}",
+            asset_type="product",
+            url=product_url,
+            alt_text=f"Image produit {index+1}",
+            dimensions={"width": product_width, "height": product_height}
+        )
+
+    @staticmethod
+    def _render_product_placeholder(index: int, size: tuple, color_scheme: ColorScheme) -> bytes:
+        """Dessine un placeholder produit et l'encode en JPEG"""
+        product_width, product_height = size
+        product_image = Image.new('RGB', (product_width, product_height), color_scheme.background)
+        draw = ImageDraw.Draw(product_image)
+        
+        # Bordure
+        draw.rectangle([0, 0, product_width-1, product_height-1], outline=color_scheme.primary, width=2)
+        
+        # Texte placeholder
+        text = f"PRODUIT {index+1}"
+        text_width, text_height = AssetManager._text_size(text)
+        
+        text_x = (product_width - text_width) // 2
+        text_y = (product_height - text_height) // 2
+        
+        draw.text((text_x, text_y), text, fill=color_scheme.text, font=AssetManager._default_font())
+        
+        return AssetManager._encode_image(product_image, 'JPEG', quality=85)
+
     async def _generate_icons(
         self,
         site_id: str,
@@ -416,79 +600,244 @@ class AssetManager:
     ) -> List[AssetData]:
         """Génère des icônes pour le site"""
         try:
-            icon_assets = []
             icon_names = ['shipping', 'support', 'security', 'quality']
             
-            for icon_name in icon_names:
-                # Génération d'icône simple 64x64
-                icon = Image.new('RGBA', (64, 64), (255, 255, 255, 0))
-                draw = ImageDraw.Draw(icon)
-                
-                # Cercle de fond
-                draw.ellipse([8, 8, 56, 56], fill=branding_data.color_scheme.accent)
-                
-                # Forme simple au centre
-                draw.ellipse([24, 24, 40, 40], fill="white")
-                
-                # Sauvegarde et upload
-                icon_path = f"{self.local_storage_path}/icon_{icon_name}_{site_id}.png"
-                icon.save(icon_path, 'PNG')
-                
-                with open(icon_path, 'rb') as f:
-                    content = f.read()
-                
-                icon_url = await self._upload_to_storage(
-                    f"{site_id}/icons/{icon_name}.png",
-                    content,
-                    "image/png"
-                )
-                
-                os.remove(icon_path)
-                
-                icon_assets.append(AssetData(
+            # Même visuel pour toutes les icônes: rendu mis en cache par couleur, uploadé une
+            # seule fois par site, sous le préfixe du site (supprimé avec lui par cleanup_assets)
+            content = await self._run_cpu(self._render_icon, branding_data.color_scheme.accent)
+            icon_url = await self._upload_immutable(f"{site_id}/icons/icon.png", content, "image/png")
+            
+            return [
+                AssetData(
                     asset_id=f"icon_{icon_name}_{site_id}",
                     asset_type="icon",
                     url=icon_url,
                     alt_text=f"Icône {icon_name}",
                     dimensions={"width": 64, "height": 64}
-                ))
-            
-            return icon_assets
+                )
+                for icon_name in icon_names
+            ]
             
         except Exception as e:
-            logger.error(f"Erreur lors de la génération des icônes: {e}")
+            logger.error("Erreur lors de la génération des icônes: %s", e)
             return []
 
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _default_font() -> ImageFont.ImageFont:
+        """Police par défaut, chargée une seule fois par processus"""
+        return ImageFont.load_default()
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _text_size(text: str) -> tuple:
+        """Largeur et hauteur d'un texte dans la police par défaut (métriques mises en cache)"""
+        left, top, right, bottom = AssetManager._default_font().getbbox(text)
+        return right - left, bottom - top
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _render_icon(accent: str) -> bytes:
+        """
+        Dessine une icône simple 64x64 et l'encode en PNG à palette 2 bits
+        (3 couleurs: transparent, accent, blanc)
+        """
+        icon = Image.new('P', (64, 64), 0)
+        icon.putpalette([255, 255, 255, *ImageColor.getrgb(accent)[:3], 255, 255, 255])
+        draw = ImageDraw.Draw(icon)
+        
+        # Cercle de fond
+        draw.ellipse([8, 8, 56, 56], fill=1)
+        
+        # Forme simple au centre
+        draw.ellipse([24, 24, 40, 40], fill=2)
+        
+        return AssetManager._encode_image(icon, 'PNG', transparency=0, bits=2, optimize=True)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _render_logo(primary: str, logo_width: int, logo_height: int) -> bytes:
+        """Dessine un logo textuel simple et l'encode en PNG"""
+        # Pour l'instant, génération d'un logo textuel simple
+        # Dans une implémentation complète, ceci utiliserait un service de génération d'images IA
+        logo = Image.new('RGBA', (logo_width, logo_height), (255, 255, 255, 0))
+        draw = ImageDraw.Draw(logo)
+        
+        # Dessin d'un rectangle de fond
+        draw.rectangle([10, 20, logo_width-10, logo_height-20], fill=primary)
+        
+        # Ajout du nom de l'entreprise (simplifié)
+        # Note: Dans un vrai projet, utiliser une police personnalisée
+        business_name = "LOGO"  # Placeholder
+        
+        # Calcul de la position du texte
+        text_width, text_height = AssetManager._text_size(business_name)
+        
+        text_x = (logo_width - text_width) // 2
+        text_y = (logo_height - text_height) // 2
+        
+        draw.text((text_x, text_y), business_name, fill="white", font=AssetManager._default_font())
+        
+        return AssetManager._encode_image(logo, 'PNG')
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _render_favicon(primary: str, accent: str) -> bytes:
+        """
+        Dessine un favicon aux couleurs de la marque et l'encode en ICO multi-tailles
+        (16, 32 et 48 px dans un seul fichier; source en 48 px pour ne jamais agrandir)
+        """
+        favicon = Image.new('RGB', (48, 48), primary)
+        draw = ImageDraw.Draw(favicon)
+        
+        # Ajout d'un élément graphique simple
+        draw.ellipse([12, 12, 36, 36], fill=accent)
+        
+        return AssetManager._encode_image(favicon, 'ICO', sizes=FAVICON_SIZES)
+
+    @staticmethod
+    def _render_hero_image(width: int, height: int, primary: str, secondary: str) -> tuple:
+        """Dessine l'image hero et l'encode en JPEG et en WebP"""
+        hero_image = AssetManager._render_hero_gradient(width, height, primary, secondary)
+        return (
+            AssetManager._encode_image_buffer(hero_image, 'JPEG', quality=90),
+            AssetManager._encode_image_buffer(hero_image, 'WEBP', **WEBP_PARAMS)
+        )
+
+    @staticmethod
+    def _render_hero_gradient(width: int, height: int, primary: str, secondary: str) -> Image.Image:
+        """Dégradé vertical primaire → secondaire assombri (overlay noir alpha 100), calculé par NumPy"""
+        t = np.linspace(0, 1, height, dtype=np.float32)[:, None, None]
+        start = np.array(ImageColor.getrgb(primary)[:3], dtype=np.float32)
+        end = np.array(ImageColor.getrgb(secondary)[:3], dtype=np.float32)
+        
+        # Overlay noir d'opacité 100/255 appliqué directement comme facteur
+        rows = (start * (1 - t) + end * t) * (155 / 255)
+        pixels = np.repeat(rows.astype(np.uint8), width, axis=1)
+        return Image.fromarray(pixels, 'RGB')
+
+    @staticmethod
+    def _encode_image(image: Image.Image, image_format: str, **params) -> bytes:
+        """Encode une image en mémoire (pas de fichier temporaire)"""
+        return AssetManager._encode_image_buffer(image, image_format, **params).getvalue()
+
+    @staticmethod
+    def _encode_image_buffer(image: Image.Image, image_format: str, **params) -> io.BytesIO:
+        """Encode une image dans un tampon prêt à être uploadé (sans copie getvalue())"""
+        buffer = io.BytesIO()
+        image.save(buffer, image_format, **params)
+        buffer.seek(0)
+        return buffer
+
     async def _upload_to_storage(
         self,
         file_path: str,
-        content: bytes,
+        content: Union[bytes, io.BytesIO],
+        content_type: str,
+        cache_control: Optional[str] = None
+    ) -> str:
+        """Upload un fichier (octets ou tampon en mémoire) vers le stockage (S3 ou local)"""
+        try:
+            # Un tampon est transmis tel quel (botocore le lit en flux), sans copie en bytes
+            is_buffer = isinstance(content, io.BytesIO)
+            size = content.getbuffer().nbytes if is_buffer else len(content)
+            
+            extra_args = {'ContentType': content_type, 'ACL': 'public-read'}
+            if cache_control:
+                extra_args['CacheControl'] = cache_control
+            
+            async with self.upload_semaphore:
+                if self.s3_client:
+                    # Upload vers S3 (client boto3 bloquant: exécuté hors de la boucle)
+                    if size > S3_MULTIPART_THRESHOLD:
+                        # Gros fichier: parts multipart envoyées en parallèle
+                        await asyncio.to_thread(
+                            self.s3_client.upload_fileobj,
+                            content if is_buffer else io.BytesIO(content),
+                            self.bucket_name,
+                            file_path,
+                            ExtraArgs=extra_args,
+                            Config=self.transfer_config
+                        )
+                    else:
+                        await asyncio.to_thread(
+                            self.s3_client.put_object,
+                            Bucket=self.bucket_name,
+                            Key=file_path,
+                            Body=content,
+                            **extra_args
+                        )
+                    return f"{self.url_prefix}/{file_path}"
+                else:
+                    # Stockage local
+                    local_path = os.path.join(self.local_storage_path, file_path)
+                    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                    
+                    async with aiofiles.open(local_path, 'wb') as f:
+                        await f.write(content.getbuffer() if is_buffer else content)
+                    
+                    return f"{self.url_prefix}/{file_path}"
+                
+        except Exception as e:
+            logger.error("Erreur lors de l'upload vers le stockage: %s", e)
+            raise
+
+    async def _upload_immutable(
+        self,
+        file_path: str,
+        content: Union[bytes, io.BytesIO],
         content_type: str
     ) -> str:
-        """Upload un fichier vers le stockage (S3 ou local)"""
+        """
+        Upload sous une clé suffixée par l'empreinte du contenu ({nom}.{empreinte}.{ext}):
+        un contenu modifié change d'URL, le CDN peut donc le cacher sans revalidation
+        """
+        name, extension = os.path.splitext(file_path)
+        return await self._upload_to_storage(
+            f"{name}.{self._content_digest(content)}{extension}",
+            content,
+            content_type,
+            cache_control=IMMUTABLE_CACHE_CONTROL
+        )
+
+    @staticmethod
+    def _content_digest(content: Union[bytes, io.BytesIO]) -> str:
+        """Empreinte courte (blake2b, 16 hex) d'un contenu"""
+        data = content.getbuffer() if isinstance(content, io.BytesIO) else content
+        return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+    async def _upload_stream_to_storage(
+        self,
+        file_path: str,
+        fileobj: BinaryIO,
+        content_type: str
+    ) -> str:
+        """Upload un fichier par morceaux vers le stockage (multipart S3 ou local)"""
         try:
             if self.s3_client:
-                # Upload vers S3
-                self.s3_client.put_object(
-                    Bucket=self.bucket_name,
-                    Key=file_path,
-                    Body=content,
-                    ContentType=content_type,
-                    ACL='public-read'
+                # upload_fileobj découpe en parts multipart; exécuté hors de la boucle
+                await asyncio.to_thread(
+                    self.s3_client.upload_fileobj,
+                    fileobj,
+                    self.bucket_name,
+                    file_path,
+                    ExtraArgs={'ContentType': content_type, 'ACL': 'public-read'},
+                    Config=self.transfer_config
                 )
-                return f"https://{self.bucket_name}.s3.amazonaws.com/{file_path}"
+                return f"{self.url_prefix}/{file_path}"
             else:
                 # Stockage local
                 local_path = os.path.join(self.local_storage_path, file_path)
                 os.makedirs(os.path.dirname(local_path), exist_ok=True)
                 
                 async with aiofiles.open(local_path, 'wb') as f:
-                    await f.write(content)
+                    while chunk := await asyncio.to_thread(fileobj.read, UPLOAD_CHUNK_SIZE):
+                        await f.write(chunk)
                 
-                return f"{self.cdn_base_url}/{file_path}"
+                return f"{self.url_prefix}/{file_path}"
                 
         except Exception as e:
-            logger.error(f"Erreur lors de l'upload vers le stockage: {e}")
+            logger.error("Erreur lors de l'upload vers le stockage: %s", e)
             raise
 
     async def download_and_process_image(
@@ -498,21 +847,22 @@ class AssetManager:
     ) -> str:
         """Télécharge et traite une image externe"""
         try:
-            logger.info(f"Téléchargement et traitement de l'image: {image_url}")
+            logger.info("Téléchargement et traitement de l'image: %s", image_url)
             
             # Téléchargement de l'image
-            async with aiohttp.ClientSession() as session:
-                async with session.get(image_url) as response:
-                    if response.status == 200:
-                        image_data = await response.read()
-                        image = Image.open(io.BytesIO(image_data))
-                    else:
-                        raise Exception(f"Erreur de téléchargement: {response.status}")
+            response = await self.http_client.get(image_url)
+            if response.status_code == 200:
+                image = Image.open(io.BytesIO(response.content))
+            else:
+                raise Exception(f"Erreur de téléchargement: {response.status_code}")
             
             # Traitement selon les options
             if processing_options:
                 if 'resize' in processing_options:
                     size = processing_options['resize']
+                    # JPEG: décodage directement à une échelle réduite (IDCT libjpeg) avant le LANCZOS
+                    # (thumbnail() le fait déjà via reducing_gap dans optimize_image)
+                    image.draft(None, tuple(size))
                     image = image.resize(size, Image.Resampling.LANCZOS)
                 
                 if 'crop' in processing_options:
@@ -521,72 +871,68 @@ class AssetManager:
                 
                 if 'format' in processing_options:
                     # Conversion de format si nécessaire
-                    if processing_options['format'].upper() == 'JPEG' and image.mode in ('RGBA', 'LA', 'P'):
-                        background = Image.new('RGB', image.size, (255, 255, 255))
-                        if image.mode == 'P':
-                            image = image.convert('RGBA')
-                        background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-                        image = background
-            
-            # Sauvegarde temporaire
-            processed_path = f"{self.local_storage_path}/processed_{uuid.uuid4()}.jpg"
-            image.save(processed_path, 'JPEG', quality=85)
-            
-            # Upload
-            with open(processed_path, 'rb') as f:
-                content = f.read()
+                    if processing_options['format'].upper() == 'JPEG':
+                        image = self._flatten_to_rgb(image)
             
+            # Encodage en mémoire et upload
             processed_url = await self._upload_to_storage(
                 f"processed/{uuid.uuid4()}.jpg",
-                content,
-                "image/jpeg"
+                self._encode_image_buffer(image, 'JPEG', quality=85),
+                "image/jpeg",
+                cache_control=IMMUTABLE_CACHE_CONTROL
             )
             
-            # Nettoyage
-            os.remove(processed_path)
-            
             return processed_url
             
         except Exception as e:
-            logger.error(f"Erreur lors du téléchargement et traitement: {e}")
+            logger.error("Erreur lors du téléchargement et traitement: %s", e)
             raise
 
     async def cleanup_assets(self, site_id: str):
         """Nettoie les assets d'un site supprimé"""
         try:
-            logger.info(f"Nettoyage des assets pour le site: {site_id}")
+            logger.info("Nettoyage des assets pour le site: %s", site_id)
             
             if self.s3_client:
                 # Suppression des objets S3
-                response = self.s3_client.list_objects_v2(
-                    Bucket=self.bucket_name,
-                    Prefix=f"{site_id}/"
-                )
-                
-                if 'Contents' in response:
-                    objects_to_delete = [{'Key': obj['Key']} for obj in response['Contents']]
-                    
-                    if objects_to_delete:
-                        self.s3_client.delete_objects(
-                            Bucket=self.bucket_name,
-                            Delete={'Objects': objects_to_delete}
-                        )
+                await self._delete_s3_prefix(f"{site_id}/")
             else:
                 # Suppression locale
+                # Parcours du répertoire exécuté hors de la boucle d'événements
                 site_path = os.path.join(self.local_storage_path, site_id)
-                if os.path.exists(site_path):
-                    import shutil
-                    shutil.rmtree(site_path)
+                await asyncio.to_thread(shutil.rmtree, site_path, ignore_errors=True)
             
-            logger.info(f"Assets nettoyés pour le site: {site_id}")
+            logger.info("Assets nettoyés pour le site: %s", site_id)
             
         except Exception as e:
-            logger.error(f"Erreur lors du nettoyage des assets: {e}")
+            logger.error("Erreur lors du nettoyage des assets: %s", e)
+
+    async def _delete_s3_prefix(self, prefix: str):
+        """
+        Supprime tous les objets d'un préfixe: listing paginé (1000 clés par page,
+        le maximum de delete_objects), chaque page supprimée pendant la lecture de la suivante
+        """
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        pages = iter(paginator.paginate(Bucket=self.bucket_name, Prefix=prefix))
+        semaphore = asyncio.Semaphore(S3_DELETE_CONCURRENCY)
+        
+        async def delete_batch(objects: List[Dict[str, str]]):
+            async with semaphore:
+                await asyncio.to_thread(
+                    self.s3_client.delete_objects,
+                    Bucket=self.bucket_name,
+                    Delete={'Objects': objects, 'Quiet': True}
+                )
+        
+        deletions = []
+        while page := await asyncio.to_thread(next, pages, None):
+            objects = [{'Key': obj['Key']} for obj in page.get('Contents', [])]
+            if objects:
+                deletions.append(asyncio.create_task(delete_batch(objects)))
+        
+        await asyncio.gather(*deletions)
 
     def get_asset_url(self, site_id: str, asset_type: str, asset_name: str) -> str:
         """Génère l'URL d'un asset"""
-        if self.s3_client:
-            return f"https://{self.bucket_name}.s3.amazonaws.com/{site_id}/{asset_type}/{asset_name}"
-        else:
-            return f"{self.cdn_base_url}/{site_id}/{asset_type}/{asset_name}"
+        return f"{self.url_prefix}/{site_id}/{asset_type}/{asset_name}"
 
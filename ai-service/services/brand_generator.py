@@ -1,95 +1,502 @@
-import openai
-import json
+import orjson
+import os
 import asyncio
 import logging
 import random
-from typing import Dict, List, Any, Optional
+import time
+from typing import Dict, List, Any, AsyncIterator, Mapping, Optional, Sequence, Tuple
 from datetime import datetime
 import colorsys
+import zlib
+import contextlib
+import functools
+from string import Template
+from types import MappingProxyType
+from urllib.parse import quote_plus
+import numpy as np
 from models.schemas import (
     BrandingData, 
+    BrandingRequest,
     ColorScheme, 
     Typography,
     IndustryType,
     StylePreference
 )
+from services.llm_cache import LLMCache
+from services.coalesce import coalesce
+from services.openai_client import (
+    get_openai_client,
+    with_retries,
+    OPENAI_MAX_RETRIES,
+    completion_timeout,
+    OPENAI_TIMEOUT,
+    OPENAI_LONG_GENERATION_TOKENS
+)
+from services.rate_limiter import openai_rate_limiter, count_tokens
 
 logger = logging.getLogger(__name__)
 
+INDUSTRY_ANALYSIS_TTL = int(os.getenv('INDUSTRY_ANALYSIS_TTL', 7 * 86400))
+OPENAI_CONCURRENCY = int(os.getenv('OPENAI_CONCURRENCY', 20))
+
+# Champs de la stratégie nécessaires à l'identité visuelle
+VISUAL_IDENTITY_INPUTS = frozenset({"brand_voice", "positioning"})
+
+# Blanc de référence D65 (conversion XYZ -> CIELAB)
+_D65_WHITE = np.array([0.95047, 1.0, 1.08883])
+_SRGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041]
+])
+
+
+def _parse_hex_color(value: str) -> Optional[Tuple[int, int, int]]:
+    """Convertit '#RRGGBB' / '#RGB' en triplet RGB; None si ce n'est pas une couleur hexadécimale"""
+    value = value.strip()
+    # Forme courte '#RGB' uniquement avec le '#' (sinon 'bad', 'ace'... seraient des couleurs)
+    if len(value) == 4 and value.startswith('#'):
+        value = "".join(c * 2 for c in value[1:])
+    value = value.lstrip('#')
+    if len(value) != 6:
+        return None
+    try:
+        return int(value[0:2], 16), int(value[2:4], 16), int(value[4:6], 16)
+    except ValueError:
+        return None
+
+
+def _rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """Conversion vectorisée sRGB (0-255, dernier axe = 3) -> CIELAB"""
+    c = rgb.astype(np.float64) / 255.0
+    linear = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+    xyz = (linear @ _SRGB_TO_XYZ.T) / _D65_WHITE
+    f = np.where(xyz > 216 / 24389, np.cbrt(xyz), (24389 / 27 * xyz + 16) / 116)
+    return np.stack([
+        116 * f[..., 1] - 16,
+        500 * (f[..., 0] - f[..., 1]),
+        200 * (f[..., 1] - f[..., 2])
+    ], axis=-1)
+
+
+class _TopLevelFieldsParser:
+    """
+    Parseur JSON incrémental minimal: renvoie chaque paire (clé, valeur) de l'objet
+    racine dès que sa valeur est fermée. Seule la valeur en cours est conservée,
+    sous forme de liste de tranches des fragments reçus
+    """
+    
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.reading_key = False
+        self.key_chars: List[str] = []
+        self.key: Optional[str] = None
+        self.value: Optional[List[str]] = None
+    
+    def feed(self, fragment: str) -> List[Tuple[str, Any]]:
+        """Consomme un fragment et renvoie les champs complétés"""
+        fields = []
+        # Début, dans ce fragment, de la valeur en cours
+        value_start = 0
+        
+        for index, char in enumerate(fragment):
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.reading_key:
+                        self.key = "".join(self.key_chars)
+                        self.reading_key = False
+                if self.reading_key:
+                    self.key_chars.append(char)
+                continue
+            
+            if char == '"':
+                self.in_string = True
+                if self.depth == 1 and self.value is None:
+                    self.reading_key = True
+                    self.key_chars = []
+            elif char == ":" and self.depth == 1 and self.value is None:
+                self.value = []
+                value_start = index + 1
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 0 and self.value is not None:
+                    fields.append(self._close_value(fragment[value_start:index]))
+            elif char == "," and self.depth == 1 and self.value is not None:
+                fields.append(self._close_value(fragment[value_start:index]))
+        
+        # Valeur inachevée: on garde la tranche restante pour le fragment suivant
+        if self.value is not None:
+            self.value.append(fragment[value_start:])
+        
+        return fields
+    
+    def _close_value(self, tail: str) -> Tuple[str, Any]:
+        """Termine la valeur en cours et la parse"""
+        self.value.append(tail)
+        value = orjson.loads("".join(self.value))
+        self.value = None
+        return orjson.loads(f'"{self.key}"'), value
+
+
+@functools.lru_cache(maxsize=64)
+def _palettes_lab(palettes_hex: Tuple[Tuple[str, ...], ...]) -> np.ndarray:
+    """Palettes converties une fois en CIELAB, tableau (P, couleurs, 3)"""
+    rgb = np.array(
+        [[_parse_hex_color(color) or (0, 0, 0) for color in palette] for palette in palettes_hex],
+        dtype=np.uint8
+    )
+    return _rgb_to_lab(rgb)
+
 class BrandGenerator:
     """Service de génération de branding complet (logo, couleurs, typographie)"""
     
+    # Palettes de couleurs prédéfinies par industrie (construites une seule fois à l'import, en lecture seule)
+    _INDUSTRY_COLOR_PALETTES: Dict[IndustryType, Tuple[Mapping[str, str], ...]] = {
+        IndustryType.FASHION: (
+            MappingProxyType({"primary": "#000000", "secondary": "#FFFFFF", "accent": "#FF6B6B"}),
+            MappingProxyType({"primary": "#2C3E50", "secondary": "#ECF0F1", "accent": "#E74C3C"}),
+            MappingProxyType({"primary": "#8E44AD", "secondary": "#F8F9FA", "accent": "#F39C12"})
+        ),
+        IndustryType.ELECTRONICS: (
+            MappingProxyType({"primary": "#2980B9", "secondary": "#ECF0F1", "accent": "#3498DB"}),
+            MappingProxyType({"primary": "#34495E", "secondary": "#BDC3C7", "accent": "#1ABC9C"}),
+            MappingProxyType({"primary": "#27AE60", "secondary": "#FFFFFF", "accent": "#F1C40F"})
+        ),
+        IndustryType.HEALTH_BEAUTY: (
+            MappingProxyType({"primary": "#E91E63", "secondary": "#FCE4EC", "accent": "#FF9800"}),
+            MappingProxyType({"primary": "#9C27B0", "secondary": "#F3E5F5", "accent": "#4CAF50"}),
+            MappingProxyType({"primary": "#00BCD4", "secondary": "#E0F2F1", "accent": "#FF5722"})
+        ),
+        IndustryType.HOME_GARDEN: (
+            MappingProxyType({"primary": "#4CAF50", "secondary": "#E8F5E8", "accent": "#FF9800"}),
+            MappingProxyType({"primary": "#795548", "secondary": "#EFEBE9", "accent": "#8BC34A"}),
+            MappingProxyType({"primary": "#607D8B", "secondary": "#ECEFF1", "accent": "#FFC107"})
+        ),
+        IndustryType.SPORTS_FITNESS: (
+            MappingProxyType({"primary": "#FF5722", "secondary": "#FFF3E0", "accent": "#4CAF50"}),
+            MappingProxyType({"primary": "#2196F3", "secondary": "#E3F2FD", "accent": "#FF9800"}),
+            MappingProxyType({"primary": "#9C27B0", "secondary": "#F3E5F5", "accent": "#CDDC39"})
+        )
+    }
+    
+    # Palette par défaut (industries sans palette dédiée, ex. OTHER)
+    _DEFAULT_PALETTE: Mapping[str, str] = MappingProxyType({"primary": "#2563EB", "secondary": "#F8FAFC", "accent": "#10B981"})
+    
+    # Polices par style
+    _FONT_COMBINATIONS: Dict[StylePreference, Dict[str, Any]] = {
+        StylePreference.MODERN: {
+            "heading": "Inter",
+            "body": "Inter",
+            "sizes": {"h1": "3rem", "h2": "2.5rem", "h3": "2rem", "body": "1rem"}
+        },
+        StylePreference.CLASSIC: {
+            "heading": "Playfair Display",
+            "body": "Source Sans Pro",
+            "sizes": {"h1": "3.5rem", "h2": "2.75rem", "h3": "2.25rem", "body": "1.1rem"}
+        },
+        StylePreference.MINIMALIST: {
+            "heading": "Poppins",
+            "body": "Poppins",
+            "sizes": {"h1": "2.5rem", "h2": "2rem", "h3": "1.75rem", "body": "1rem"}
+        },
+        StylePreference.BOLD: {
+            "heading": "Montserrat",
+            "body": "Open Sans",
+            "sizes": {"h1": "4rem", "h2": "3rem", "h3": "2.5rem", "body": "1.1rem"}
+        },
+        StylePreference.ELEGANT: {
+            "heading": "Cormorant Garamond",
+            "body": "Lato",
+            "sizes": {"h1": "3.5rem", "h2": "2.75rem", "h3": "2.25rem", "body": "1.1rem"}
+        }
+    }
+    
+    # Appels OpenAI simultanés du processus (toutes instances confondues)
+    _openai_sem = asyncio.Semaphore(OPENAI_CONCURRENCY)
+    
+    # Prompts compilés une seule fois (string.Template): seule la substitution est faite à chaque appel
+    _BRAND_STRATEGY_PROMPT = Template("""
+            Crée une stratégie de marque complète pour:
+            
+            Nom de l'entreprise: $business_name
+            Secteur: $industry
+            Description: $description
+            Audience cible: $target_audience
+            
+            Génère:
+            1. Ton de marque (personnalité de la marque)
+            2. 5 valeurs fondamentales de la marque
+            3. Un slogan accrocheur et mémorable
+            4. Positionnement sur le marché
+            5. Promesse de marque
+            
+            Format JSON:
+            {
+                "brand_voice": "description du ton (ex: moderne et accessible)",
+                "brand_values": ["valeur1", "valeur2", "valeur3", "valeur4", "valeur5"],
+                "tagline": "slogan accrocheur",
+                "positioning": "positionnement sur le marché",
+                "brand_promise": "promesse de marque"
+            }
+            """)
+    
+    _INDUSTRY_ANALYSIS_PROMPT = Template("""
+            Analyse le secteur $industry pour le e-commerce:
+            
+            Fournis:
+            1. Tendances actuelles du marché
+            2. Couleurs populaires dans ce secteur
+            3. Styles de design préférés
+            4. Attentes des consommateurs
+            5. Éléments de différenciation importants
+            
+            Format JSON:
+            {
+                "market_trends": ["tendance1", "tendance2"],
+                "popular_colors": ["#couleur1", "#couleur2"],
+                "design_styles": ["style1", "style2"],
+                "consumer_expectations": ["attente1", "attente2"],
+                "differentiation_factors": ["facteur1", "facteur2"]
+            }
+            """)
+    
+    _ADVANCED_STRATEGY_PROMPT = Template("""
+            Crée une stratégie de marque avancée pour $business_name dans le secteur $industry:
+            
+            Analyse du marché:
+            $industry_analysis
+            
+            Génère une stratégie qui:
+            1. Se différencie de la concurrence
+            2. Répond aux attentes des consommateurs
+            3. Capitalise sur les tendances du marché
+            4. Crée une connexion émotionnelle
+            
+            Format JSON:
+            {
+                "brand_voice": "ton de marque unique",
+                "brand_values": ["valeur1", "valeur2", "valeur3", "valeur4", "valeur5"],
+                "tagline": "slogan différenciant",
+                "positioning": "positionnement unique",
+                "brand_promise": "promesse de valeur",
+                "emotional_connection": "connexion émotionnelle",
+                "differentiation_strategy": "stratégie de différenciation"
+            }
+            """)
+    
+    _VISUAL_IDENTITY_PROMPT = Template("""
+            Crée l'identité visuelle (couleurs et typographie) pour:
+            
+            Secteur: $industry
+            Style préféré: $style
+            Couleurs préférées: $color_preferences
+            Ton de marque: $brand_voice
+            Positionnement: $positioning
+            
+            Génère une palette harmonieuse et professionnelle avec:
+            1. Couleur principale (primary) - couleur de marque forte
+            2. Couleur secondaire (secondary) - couleur de support
+            3. Couleur d'accent (accent) - pour les CTA et highlights
+            4. Couleur de fond (background)
+            5. Couleur de texte (text)
+            
+            Recommande une combinaison de polices Google Fonts populaires et accessibles:
+            1. Police pour les titres (heading_font)
+            2. Police pour le corps de texte (body_font)
+            3. Tailles de police optimales
+            
+            Format JSON:
+            {
+                "color_scheme": {
+                    "primary": "#hexcode",
+                    "secondary": "#hexcode",
+                    "accent": "#hexcode",
+                    "background": "#hexcode",
+                    "text": "#hexcode",
+                    "rationale": "explication des choix de couleurs"
+                },
+                "typography": {
+                    "heading_font": "nom de la police",
+                    "body_font": "nom de la police",
+                    "font_sizes": {
+                        "h1": "taille",
+                        "h2": "taille",
+                        "h3": "taille",
+                        "body": "taille"
+                    },
+                    "rationale": "explication des choix typographiques"
+                }
+            }
+            """)
+    
     def __init__(self):
         self.client = None
-        self.model = "gpt-4"
+        # Modèles compatibles avec le mode JSON (gpt-4 ne l'est pas), surchargeables par variable d'environnement:
+        # modèle léger par défaut, modèle premium réservé à la stratégie avancée
+        self.model = os.getenv('OPENAI_BRAND_MODEL', "gpt-4o-mini")
+        self.premium_model = os.getenv('OPENAI_BRAND_PREMIUM_MODEL', "gpt-4o")
+        # Graine fixe: réponses reproductibles pour des entrées identiques
+        self.seed = int(os.getenv('OPENAI_SEED', 42))
         
-        # Palettes de couleurs prédéfinies par industrie
-        self.industry_color_palettes = {
-            IndustryType.FASHION: [
-                {"primary": "#000000", "secondary": "#FFFFFF", "accent": "#FF6B6B"},
-                {"primary": "#2C3E50", "secondary": "#ECF0F1", "accent": "#E74C3C"},
-                {"primary": "#8E44AD", "secondary": "#F8F9FA", "accent": "#F39C12"}
-            ],
-            IndustryType.ELECTRONICS: [
-                {"primary": "#2980B9", "secondary": "#ECF0F1", "accent": "#3498DB"},
-                {"primary": "#34495E", "secondary": "#BDC3C7", "accent": "#1ABC9C"},
-                {"primary": "#27AE60", "secondary": "#FFFFFF", "accent": "#F1C40F"}
-            ],
-            IndustryType.HEALTH_BEAUTY: [
-                {"primary": "#E91E63", "secondary": "#FCE4EC", "accent": "#FF9800"},
-                {"primary": "#9C27B0", "secondary": "#F3E5F5", "accent": "#4CAF50"},
-                {"primary": "#00BCD4", "secondary": "#E0F2F1", "accent": "#FF5722"}
-            ],
-            IndustryType.HOME_GARDEN: [
-                {"primary": "#4CAF50", "secondary": "#E8F5E8", "accent": "#FF9800"},
-                {"primary": "#795548", "secondary": "#EFEBE9", "accent": "#8BC34A"},
-                {"primary": "#607D8B", "secondary": "#ECEFF1", "accent": "#FFC107"}
-            ],
-            IndustryType.SPORTS_FITNESS: [
-                {"primary": "#FF5722", "secondary": "#FFF3E0", "accent": "#4CAF50"},
-                {"primary": "#2196F3", "secondary": "#E3F2FD", "accent": "#FF9800"},
-                {"primary": "#9C27B0", "secondary": "#F3E5F5", "accent": "#CDDC39"}
-            ]
-        }
+        # Reprises sur erreurs transitoires (429, réseau/timeout, 5xx); délai par tentative: completion_timeout
+        self.max_retries = OPENAI_MAX_RETRIES
         
-        # Polices par style
-        self.font_combinations = {
-            StylePreference.MODERN: {
-                "heading": "Inter",
-                "body": "Inter",
-                "sizes": {"h1": "3rem", "h2": "2.5rem", "h3": "2rem", "body": "1rem"}
-            },
-            StylePreference.CLASSIC: {
-                "heading": "Playfair Display",
-                "body": "Source Sans Pro",
-                "sizes": {"h1": "3.5rem", "h2": "2.75rem", "h3": "2.25rem", "body": "1.1rem"}
-            },
-            StylePreference.MINIMALIST: {
-                "heading": "Poppins",
-                "body": "Poppins",
-                "sizes": {"h1": "2.5rem", "h2": "2rem", "h3": "1.75rem", "body": "1rem"}
-            },
-            StylePreference.BOLD: {
-                "heading": "Montserrat",
-                "body": "Open Sans",
-                "sizes": {"h1": "4rem", "h2": "3rem", "h3": "2.5rem", "body": "1.1rem"}
-            },
-            StylePreference.ELEGANT: {
-                "heading": "Cormorant Garamond",
-                "body": "Lato",
-                "sizes": {"h1": "3.5rem", "h2": "2.75rem", "h3": "2.25rem", "body": "1.1rem"}
-            }
-        }
+        # Brandings générés simultanément par generate_branding_batch (limite de concurrence OpenAI)
+        self.batch_concurrency = int(os.getenv('BRANDING_BATCH_CONCURRENCY', 50))
+        
+        # Réponses IA en cache (mêmes entrées = même stratégie / analyse / identité visuelle)
+        self.response_cache = LLMCache(prefix="llm:brand")
+        
+        # Analyse d'industrie: ne dépend que de l'IndustryType, conservée 7 jours (Redis survit aux redémarrages)
+        self.industry_cache = LLMCache(prefix="llm:industry", maxsize=64, ttl=INDUSTRY_ANALYSIS_TTL)
         
     async def initialize(self):
         """Initialise le service de génération de branding"""
         try:
-            self.client = openai.OpenAI()
+            # Client partagé du processus; reprises gérées par _request (with_retries: Retry-After, backoff avec jitter)
+            self.client = get_openai_client()
+            # Chargement des encodages tiktoken hors de la boucle (limiteur de débit)
+            for model in {self.model, self.premium_model}:
+                await asyncio.to_thread(count_tokens, "", model)
             logger.info("Service de branding initialisé avec succès")
         except Exception as e:
-            logger.error(f"Erreur lors de l'initialisation du branding: {e}")
+            logger.error("Erreur lors de l'initialisation du branding: %s", e)
             raise
 
+    async def _create_completion(self, **kwargs) -> Dict[str, Any]:
+        """
+        Appel chat.completions avec cache SHA256 des paramètres; retourne la réponse JSON parsée.
+        Seules les réponses complètes (finish_reason "stop") et parsables sont mises en cache
+        """
+        cache_key = LLMCache.make_key(kwargs)
+        cached = await self.response_cache.get(cache_key)
+        if cached is not None:
+            try:
+                return orjson.loads(cached)
+            except orjson.JSONDecodeError:
+                # Entrée illisible: traitée comme absente et remplacée par la nouvelle réponse
+                logger.warning("Réponse en cache invalide ignorée (%s)", cache_key)
+        
+        async with self._openai_sem:
+            response = await self._request(**kwargs)
+        
+        choice = response.choices[0]
+        data = orjson.loads(choice.message.content)
+        if choice.finish_reason == "stop":
+            await self.response_cache.set(cache_key, choice.message.content)
+        else:
+            logger.warning("Réponse OpenAI non mise en cache (finish_reason=%s)", choice.finish_reason)
+        return data
+
+    async def _request(self, stream: bool = False, **kwargs):
+        """
+        Appel chat.completions (mode JSON, graine fixe) avec reprises sur erreurs transitoires.
+        Réservation RPM/TPM auprès du limiteur partagé avant l'envoi; les en-têtes
+        x-ratelimit-* de la réponse le mettent en pause si le quota serveur s'épuise
+        """
+        prompt_tokens = sum(
+            count_tokens(message["content"], kwargs["model"]) for message in kwargs["messages"]
+        )
+        await openai_rate_limiter.acquire(prompt_tokens + kwargs.get("max_tokens", 0))
+        
+        max_tokens = kwargs.get("max_tokens", 0)
+        raw_response = await with_retries(
+            lambda: self.client.chat.completions.with_raw_response.create(
+                response_format={"type": "json_object"},
+                seed=self.seed,
+                # Flux: le délai borne l'attente de chaque fragment, pas la génération entière
+                timeout=OPENAI_TIMEOUT if stream else completion_timeout(max_tokens),
+                stream=stream,
+                **kwargs
+            ),
+            self.max_retries,
+            retry_timeouts=stream or max_tokens <= OPENAI_LONG_GENERATION_TOKENS
+        )
+        openai_rate_limiter.observe(raw_response.headers)
+        return raw_response.parse()
+
+    async def _stream_json_fields(self, **kwargs) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Variante en flux de _create_completion: renvoie chaque champ de premier niveau
+        de l'objet JSON dès qu'il est complet. Même cache que les appels non streamés;
+        seule l'ouverture du flux est reprise en cas d'erreur transitoire
+        """
+        cache_key = LLMCache.make_key(kwargs)
+        cached = await self.response_cache.get(cache_key)
+        if cached is not None:
+            try:
+                fields = orjson.loads(cached)
+            except orjson.JSONDecodeError:
+                # Entrée illisible: traitée comme absente et remplacée par la nouvelle réponse
+                logger.warning("Réponse en cache invalide ignorée (%s)", cache_key)
+            else:
+                for field in fields.items():
+                    yield field
+                return
+        
+        parser = _TopLevelFieldsParser()
+        fragments: List[str] = []
+        finish_reason = None
+        
+        # Le flux occupe une connexion jusqu'à sa fin: compté dans la concurrence
+        async with self._openai_sem:
+            stream = await self._request(stream=True, **kwargs)
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+                if choice.delta.content:
+                    fragment = choice.delta.content
+                    fragments.append(fragment)
+                    for field in parser.feed(fragment):
+                        yield field
+        
+        # Flux interrompu ou tronqué, ou JSON invalide: jamais rejoué depuis le cache
+        content = "".join(fragments)
+        try:
+            orjson.loads(content)
+        except orjson.JSONDecodeError as e:
+            logger.warning("Réponse OpenAI en flux invalide, non mise en cache: %s", e)
+            return
+        if finish_reason != "stop":
+            logger.warning("Réponse OpenAI non mise en cache (finish_reason=%s)", finish_reason)
+            return
+        await self.response_cache.set(cache_key, content)
+
+    async def _chat_json(
+        self,
+        *,
+        system: str,
+        user: str,
+        max_tokens: int,
+        temperature: float,
+        model: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Point d'entrée unique des appels IA: cache, reprises et mode JSON, réponse parsée"""
+        started = time.perf_counter()
+        data = await self._create_completion(
+            model=model or self.model,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": user}
+            ],
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        logger.debug("Appel IA branding terminé en %.2fs", time.perf_counter() - started)
+        return data
+
     async def generate_branding(
         self,
         business_name: str,
@@ -103,25 +510,22 @@ class BrandGenerator:
         Génère un branding complet pour une entreprise
         """
         try:
-            logger.info(f"Génération de branding pour: {business_name}")
-            
-            # Génération de la stratégie de marque
-            brand_strategy = await self._generate_brand_strategy(
-                business_name, industry, description, target_audience
-            )
-            
-            # Génération de la palette de couleurs
-            color_scheme = await self._generate_color_scheme(
-                industry, style_preferences, color_preferences, brand_strategy
-            )
-            
-            # Génération de la typographie
-            typography = await self._generate_typography(
-                style_preferences, brand_strategy
+            logger.info("Génération de branding pour: %s", business_name)
+            
+            # Stratégie de marque (appel IA) et palette sont indépendantes:
+            # les couleurs sont calculées pendant l'attente de la réponse IA
+            brand_strategy, color_scheme = await asyncio.gather(
+                self._generate_brand_strategy(
+                    business_name, industry, description, target_audience
+                ),
+                self._generate_color_scheme(
+                    industry, style_preferences, color_preferences
+                )
             )
+            typography = self._generate_typography(style_preferences)
             
             # Génération du logo (URL placeholder pour l'instant)
-            logo_url = await self._generate_logo_placeholder(business_name, color_scheme)
+            logo_url = self._generate_logo_placeholder(business_name, color_scheme)
             
             branding_data = BrandingData(
                 logo_url=logo_url,
@@ -132,11 +536,11 @@ class BrandGenerator:
                 tagline=brand_strategy["tagline"]
             )
             
-            logger.info(f"Branding généré avec succès pour {business_name}")
+            logger.info("Branding généré avec succès pour %s", business_name)
             return branding_data
             
         except Exception as e:
-            logger.error(f"Erreur lors de la génération de branding: {e}")
+            logger.error("Erreur lors de la génération de branding: %s", e)
             raise
 
     async def generate_complete_branding(
@@ -144,30 +548,42 @@ class BrandGenerator:
         business_name: str,
         industry: IndustryType,
         style_preferences: Optional[List[StylePreference]] = None,
-        color_preferences: Optional[List[str]] = None
+        color_preferences: Optional[List[str]] = None,
+        ai_visual_identity: bool = True
     ) -> BrandingData:
         """
-        Génère un branding complet avec analyse approfondie
+        Génère un branding complet avec analyse approfondie.
+        Identité visuelle générée par IA par défaut; ai_visual_identity=False pour une palette calculée (HSL)
         """
         try:
             # Analyse de l'industrie et génération de recommandations
             industry_analysis = await self._analyze_industry(industry)
             
-            # Génération de la stratégie de marque basée sur l'analyse
-            brand_strategy = await self._generate_advanced_brand_strategy(
-                business_name, industry, industry_analysis
-            )
-            
-            # Génération des éléments visuels
-            color_scheme = await self._generate_advanced_color_scheme(
-                industry, style_preferences, color_preferences, brand_strategy
-            )
-            
-            typography = await self._generate_advanced_typography(
-                style_preferences, brand_strategy, industry
-            )
-            
-            logo_url = await self._generate_logo_placeholder(business_name, color_scheme)
+            # Stratégie de marque en flux: l'identité visuelle ne dépend que du ton et du positionnement,
+            # elle est lancée dès qu'ils sont reçus, pendant que le reste de la stratégie est encore généré
+            brand_strategy: Dict[str, Any] = {}
+            visual_identity_task: Optional[asyncio.Task] = None
+            try:
+                async for key, value in self._stream_advanced_brand_strategy(
+                    business_name, industry, industry_analysis
+                ):
+                    brand_strategy[key] = value
+                    if visual_identity_task is None and VISUAL_IDENTITY_INPUTS <= brand_strategy.keys():
+                        visual_identity_task = asyncio.ensure_future(self._build_visual_identity(
+                            industry, style_preferences, color_preferences, dict(brand_strategy), ai_visual_identity
+                        ))
+            except BaseException:
+                if visual_identity_task is not None:
+                    visual_identity_task.cancel()
+                raise
+            
+            if visual_identity_task is None:
+                visual_identity_task = asyncio.ensure_future(self._build_visual_identity(
+                    industry, style_preferences, color_preferences, brand_strategy, ai_visual_identity
+                ))
+            color_scheme, typography = await visual_identity_task
+            
+            logo_url = self._generate_logo_placeholder(business_name, color_scheme)
             
             return BrandingData(
                 logo_url=logo_url,
@@ -179,7 +595,45 @@ class BrandGenerator:
             )
             
         except Exception as e:
-            logger.error(f"Erreur lors de la génération de branding avancé: {e}")
+            logger.error("Erreur lors de la génération de branding avancé: %s", e)
+            raise
+
+    async def generate_branding_batch(
+        self,
+        requests: List[BrandingRequest],
+        admission: Optional[asyncio.Semaphore] = None
+    ) -> List[BrandingData]:
+        """
+        Génère le branding de plusieurs entreprises en parallèle (ordre des requêtes conservé).
+        Requêtes identiques dédoublonnées; concurrence bornée par batch_concurrency, et
+        chaque génération prend une place de `admission` (limite globale du service)
+        """
+        try:
+            semaphore = asyncio.Semaphore(self.batch_concurrency)
+            admission = admission or contextlib.nullcontext()
+            in_flight: Dict[str, asyncio.Task] = {}
+            
+            async def generate(request: BrandingRequest) -> BrandingData:
+                async with semaphore, admission:
+                    return await self.generate_complete_branding(
+                        business_name=request.business_name,
+                        industry=request.industry,
+                        style_preferences=request.style_preferences,
+                        color_preferences=request.color_preferences,
+                        ai_visual_identity=request.ai_visual_identity
+                    )
+            
+            tasks = []
+            for request in requests:
+                key = request.model_dump_json()
+                if key not in in_flight:
+                    in_flight[key] = asyncio.ensure_future(generate(request))
+                tasks.append(in_flight[key])
+            
+            return list(await asyncio.gather(*tasks))
+            
+        except Exception as e:
+            logger.error("Erreur lors de la génération de branding par lot: %s", e)
             raise
 
     async def _generate_brand_strategy(
@@ -191,73 +645,35 @@ class BrandGenerator:
     ) -> Dict[str, Any]:
         """Génère la stratégie de marque via IA"""
         try:
-            prompt = f"""
-            Crée une stratégie de marque complète pour:
-            
-            Nom de l'entreprise: {business_name}
-            Secteur: {industry.value}
-            Description: {description}
-            Audience cible: {target_audience}
-            
-            Génère:
-            1. Ton de marque (personnalité de la marque)
-            2. 5 valeurs fondamentales de la marque
-            3. Un slogan accrocheur et mémorable
-            4. Positionnement sur le marché
-            5. Promesse de marque
-            
-            Format JSON:
-            {{
-                "brand_voice": "description du ton (ex: moderne et accessible)",
-                "brand_values": ["valeur1", "valeur2", "valeur3", "valeur4", "valeur5"],
-                "tagline": "slogan accrocheur",
-                "positioning": "positionnement sur le marché",
-                "brand_promise": "promesse de marque"
-            }}
-            """
+            prompt = self._BRAND_STRATEGY_PROMPT.substitute(
+                business_name=business_name,
+                industry=industry.value,
+                description=description,
+                target_audience=target_audience
+            )
             
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Tu es un expert en stratégie de marque et branding. Tu crées des identités de marque fortes et cohérentes."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=1500,
+            strategy_data = await self._chat_json(
+                system="Tu es un expert en stratégie de marque et branding. Tu crées des identités de marque fortes et cohérentes.",
+                user=prompt,
+                max_tokens=500,
                 temperature=0.7
             )
-            
-            strategy_data = json.loads(response.choices[0].message.content)
             return strategy_data
             
         except Exception as e:
-            logger.error(f"Erreur lors de la génération de stratégie: {e}")
+            logger.error("Erreur lors de la génération de stratégie: %s", e)
             raise
 
     async def _generate_color_scheme(
         self,
         industry: IndustryType,
         style_preferences: Optional[List[StylePreference]],
-        color_preferences: Optional[List[str]],
-        brand_strategy: Dict[str, Any]
+        color_preferences: Optional[List[str]]
     ) -> ColorScheme:
         """Génère une palette de couleurs adaptée"""
         try:
             # Sélection d'une palette de base selon l'industrie
-            base_palettes = self.industry_color_palettes.get(
-                industry, 
-                self.industry_color_palettes[IndustryType.OTHER]
-            )
-            
-            if not base_palettes:
-                base_palettes = [
-                    {"primary": "#2563EB", "secondary": "#F8FAFC", "accent": "#10B981"}
-                ]
+            base_palettes = self._INDUSTRY_COLOR_PALETTES.get(industry) or (self._DEFAULT_PALETTE,)
             
             # Sélection intelligente basée sur les préférences
             selected_palette = self._select_best_palette(
@@ -275,34 +691,56 @@ class BrandGenerator:
             elif style_preferences and StylePreference.BOLD in style_preferences:
                 text_color = "#111827"
             
-            return ColorScheme(
-                primary=selected_palette["primary"],
-                secondary=selected_palette["secondary"],
-                accent=selected_palette["accent"],
-                background=background_color,
-                text=text_color
+            return self._interned_color_scheme(
+                selected_palette["primary"],
+                selected_palette["secondary"],
+                selected_palette["accent"],
+                background_color,
+                text_color
             )
             
         except Exception as e:
-            logger.error(f"Erreur lors de la génération de couleurs: {e}")
+            logger.error("Erreur lors de la génération de couleurs: %s", e)
             raise
 
-    async def _generate_typography(
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _interned_color_scheme(
+        primary: str,
+        secondary: str,
+        accent: str,
+        background: str,
+        text: str
+    ) -> ColorScheme:
+        """ColorScheme (immuable) construit et validé une seule fois par combinaison de couleurs prédéfinies"""
+        return ColorScheme(
+            primary=primary,
+            secondary=secondary,
+            accent=accent,
+            background=background,
+            text=text
+        )
+
+    def _generate_typography(
         self,
-        style_preferences: Optional[List[StylePreference]],
-        brand_strategy: Dict[str, Any]
+        style_preferences: Optional[List[StylePreference]]
     ) -> Typography:
-        """Génère la typographie adaptée au style"""
+        """Génère la typographie adaptée au style (simple recherche, sans coroutine)"""
+        # Sélection du style principal
+        primary_style = StylePreference.MODERN
+        if style_preferences:
+            primary_style = style_preferences[0]
+        return self._typography_for_style(primary_style)
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _typography_for_style(cls, primary_style: StylePreference) -> Typography:
+        """Typographie d'un style, construite une seule fois par style puis partagée"""
         try:
-            # Sélection du style principal
-            primary_style = StylePreference.MODERN
-            if style_preferences:
-                primary_style = style_preferences[0]
-            
             # Récupération de la combinaison de polices
-            font_combo = self.font_combinations.get(
+            font_combo = cls._FONT_COMBINATIONS.get(
                 primary_style,
-                self.font_combinations[StylePreference.MODERN]
+                cls._FONT_COMBINATIONS[StylePreference.MODERN]
             )
             
             return Typography(
@@ -312,270 +750,217 @@ class BrandGenerator:
             )
             
         except Exception as e:
-            logger.error(f"Erreur lors de la génération de typographie: {e}")
+            logger.error("Erreur lors de la génération de typographie: %s", e)
             raise
 
-    async def _generate_logo_placeholder(
+    def _generate_logo_placeholder(
         self,
         business_name: str,
         color_scheme: ColorScheme
     ) -> str:
-        """Génère un placeholder pour le logo"""
+        """Génère un placeholder pour le logo (simple formatage: pas de coroutine)"""
         # Pour l'instant, retourne un placeholder
         # Dans une implémentation complète, ceci appellerait un service de génération d'images
-        return f"https://via.placeholder.com/200x80/{color_scheme.primary.replace('#', '')}/{color_scheme.text.replace('#', '')}?text={business_name.replace(' ', '+')}"
+        return f"https://via.placeholder.com/200x80/{color_scheme.primary.lstrip('#')}/{color_scheme.text.lstrip('#')}?text={quote_plus(business_name)}"
 
-    async def _analyze_industry(self, industry: IndustryType) -> Dict[str, Any]:
-        """Analyse les tendances et caractéristiques de l'industrie"""
+    async def _analyze_industry(self, industry: IndustryType) -> str:
+        """
+        Analyse les tendances et caractéristiques de l'industrie, renvoyée en JSON indenté
+        prêt à insérer dans le prompt (sérialisé une fois, avec l'analyse en cache).
+        Le résultat ne dépend que de l'industrie: mis en cache par IndustryType,
+        et une seule analyse en cours par industrie (appels simultanés partagés)
+        """
+        cached = await self.industry_cache.get(industry.value)
+        if cached is not None:
+            return cached
+        
+        return await coalesce(f"llm:industry:{industry.value}", lambda: self._load_industry_analysis(industry))
+
+    async def _load_industry_analysis(self, industry: IndustryType) -> str:
+        """Analyse d'industrie sérialisée, mise en cache si elle a abouti"""
+        analysis_data = await self._request_industry_analysis(industry)
+        analysis_text = orjson.dumps(analysis_data, option=orjson.OPT_INDENT_2).decode()
+        # Échec = analyse vide: non mise en cache pour retenter au prochain appel
+        if analysis_data:
+            await self.industry_cache.set(industry.value, analysis_text)
+        return analysis_text
+
+    async def _request_industry_analysis(self, industry: IndustryType) -> Dict[str, Any]:
+        """Appel IA d'analyse d'industrie; analyse vide en cas d'erreur"""
         try:
-            prompt = f"""
-            Analyse le secteur {industry.value} pour le e-commerce:
-            
-            Fournis:
-            1. Tendances actuelles du marché
-            2. Couleurs populaires dans ce secteur
-            3. Styles de design préférés
-            4. Attentes des consommateurs
-            5. Éléments de différenciation importants
+            prompt = self._INDUSTRY_ANALYSIS_PROMPT.substitute(industry=industry.value)
             
-            Format JSON:
-            {{
-                "market_trends": ["tendance1", "tendance2"],
-                "popular_colors": ["#couleur1", "#couleur2"],
-                "design_styles": ["style1", "style2"],
-                "consumer_expectations": ["attente1", "attente2"],
-                "differentiation_factors": ["facteur1", "facteur2"]
-            }}
-            """
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Tu es un analyste de marché expert en e-commerce et design."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=1000,
+            analysis_data = await self._chat_json(
+                system="Tu es un analyste de marché expert en e-commerce et design.",
+                user=prompt,
+                max_tokens=400,
                 temperature=0.6
             )
-            
-            analysis_data = json.loads(response.choices[0].message.content)
             return analysis_data
             
         except Exception as e:
-            logger.error(f"Erreur lors de l'analyse d'industrie: {e}")
+            logger.error("Erreur lors de l'analyse d'industrie: %s", e)
             return {}
 
-    async def _generate_advanced_brand_strategy(
+    async def _stream_advanced_brand_strategy(
         self,
         business_name: str,
         industry: IndustryType,
-        industry_analysis: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """Génère une stratégie de marque avancée basée sur l'analyse"""
+        industry_analysis: str
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Génère une stratégie de marque avancée basée sur l'analyse, champ par champ (flux)"""
         try:
-            prompt = f"""
-            Crée une stratégie de marque avancée pour {business_name} dans le secteur {industry.value}:
-            
-            Analyse du marché:
-            {json.dumps(industry_analysis, indent=2)}
-            
-            Génère une stratégie qui:
-            1. Se différencie de la concurrence
-            2. Répond aux attentes des consommateurs
-            3. Capitalise sur les tendances du marché
-            4. Crée une connexion émotionnelle
-            
-            Format JSON:
-            {{
-                "brand_voice": "ton de marque unique",
-                "brand_values": ["valeur1", "valeur2", "valeur3", "valeur4", "valeur5"],
-                "tagline": "slogan différenciant",
-                "positioning": "positionnement unique",
-                "brand_promise": "promesse de valeur",
-                "emotional_connection": "connexion émotionnelle",
-                "differentiation_strategy": "stratégie de différenciation"
-            }}
-            """
+            prompt = self._ADVANCED_STRATEGY_PROMPT.substitute(
+                business_name=business_name,
+                industry=industry.value,
+                industry_analysis=industry_analysis
+            )
             
-            response = self.client.chat.completions.create(
-                model=self.model,
+            started = time.perf_counter()
+            async for field in self._stream_json_fields(
+                model=self.premium_model,
                 messages=[
-                    {
-                        "role": "system",
-                        "content": "Tu es un stratège de marque expert qui crée des identités uniques et mémorables."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
+                    {"role": "system", "content": "Tu es un stratège de marque expert qui crée des identités uniques et mémorables."},
+                    {"role": "user", "content": prompt}
                 ],
-                max_tokens=1500,
+                max_tokens=700,
                 temperature=0.7
-            )
-            
-            strategy_data = json.loads(response.choices[0].message.content)
-            return strategy_data
+            ):
+                yield field
+            logger.debug("Stratégie avancée (flux) terminée en %.2fs", time.perf_counter() - started)
             
         except Exception as e:
-            logger.error(f"Erreur lors de la génération de stratégie avancée: {e}")
+            logger.error("Erreur lors de la génération de stratégie avancée: %s", e)
             raise
 
-    async def _generate_advanced_color_scheme(
+    async def _build_visual_identity(
         self,
         industry: IndustryType,
         style_preferences: Optional[List[StylePreference]],
         color_preferences: Optional[List[str]],
-        brand_strategy: Dict[str, Any]
+        brand_strategy: Dict[str, Any],
+        ai_visual_identity: bool
+    ) -> Tuple[ColorScheme, Typography]:
+        """Identité visuelle: appel IA (par défaut), ou calcul HSL + typographie du style si désactivé"""
+        if ai_visual_identity:
+            return await self._generate_advanced_visual_identity(
+                industry, style_preferences, color_preferences, brand_strategy
+            )
+        color_scheme = self._derive_color_scheme(
+            industry, brand_strategy.get("brand_voice", ""), color_preferences
+        )
+        return color_scheme, self._generate_typography(style_preferences)
+
+    @staticmethod
+    def _derive_color_scheme(
+        industry: IndustryType,
+        brand_voice: str,
+        color_preferences: Optional[List[str]]
     ) -> ColorScheme:
-        """Génère une palette de couleurs avancée via IA"""
+        """
+        Palette déterministe dérivée d'une teinte de base (HSL): teinte de la première
+        couleur préférée, sinon teinte stable issue de l'industrie et du ton de marque
+        """
+        preferred_rgb = next(
+            (rgb for rgb in map(_parse_hex_color, color_preferences or []) if rgb is not None), None
+        )
+        if preferred_rgb is not None:
+            hue = colorsys.rgb_to_hls(*(c / 255 for c in preferred_rgb))[0]
+        else:
+            # crc32 et non hash(): stable d'un processus à l'autre
+            hue = zlib.crc32(f"{industry.value}|{brand_voice}".encode()) % 360 / 360
+        
+        def hls(h: float, lightness: float, saturation: float) -> str:
+            r, g, b = colorsys.hls_to_rgb(h, lightness, saturation)
+            return "#{:02X}{:02X}{:02X}".format(round(r * 255), round(g * 255), round(b * 255))
+        
+        return ColorScheme(
+            primary=hls(hue, 0.4, 0.6),
+            secondary=hls(hue, 0.95, 0.1),
+            accent=hls((hue + 0.5) % 1, 0.55, 0.75),
+            background=hls(hue, 0.98, 0.02),
+            text=hls(hue, 0.15, 0.05)
+        )
+
+    async def _generate_advanced_visual_identity(
+        self,
+        industry: IndustryType,
+        style_preferences: Optional[List[StylePreference]],
+        color_preferences: Optional[List[str]],
+        brand_strategy: Dict[str, Any]
+    ) -> Tuple[ColorScheme, Typography]:
+        """Génère la palette de couleurs et la typographie via un seul appel IA"""
         try:
-            prompt = f"""
-            Crée une palette de couleurs unique pour:
-            
-            Secteur: {industry.value}
-            Style préféré: {style_preferences[0].value if style_preferences else 'moderne'}
-            Couleurs préférées: {color_preferences if color_preferences else 'aucune préférence'}
-            Ton de marque: {brand_strategy.get('brand_voice', '')}
-            Positionnement: {brand_strategy.get('positioning', '')}
-            
-            Génère une palette harmonieuse et professionnelle avec:
-            1. Couleur principale (primary) - couleur de marque forte
-            2. Couleur secondaire (secondary) - couleur de support
-            3. Couleur d'accent (accent) - pour les CTA et highlights
-            4. Couleur de fond (background)
-            5. Couleur de texte (text)
+            prompt = self._VISUAL_IDENTITY_PROMPT.substitute(
+                industry=industry.value,
+                style=style_preferences[0].value if style_preferences else 'moderne',
+                color_preferences=color_preferences if color_preferences else 'aucune préférence',
+                brand_voice=brand_strategy.get('brand_voice', ''),
+                positioning=brand_strategy.get('positioning', '')
+            )
             
-            Format JSON:
-            {{
-                "primary": "#hexcode",
-                "secondary": "#hexcode",
-                "accent": "#hexcode",
-                "background": "#hexcode",
-                "text": "#hexcode",
-                "rationale": "explication des choix de couleurs"
-            }}
-            """
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Tu es un expert en théorie des couleurs et design de marque."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=800,
+            visual_data = await self._chat_json(
+                system="Tu es un expert en théorie des couleurs, typographie et design de marque.",
+                user=prompt,
+                max_tokens=550,
                 temperature=0.6
             )
+            color_data = visual_data["color_scheme"]
+            typo_data = visual_data["typography"]
             
-            color_data = json.loads(response.choices[0].message.content)
-            
-            return ColorScheme(
+            color_scheme = ColorScheme(
                 primary=color_data["primary"],
                 secondary=color_data["secondary"],
                 accent=color_data["accent"],
                 background=color_data["background"],
                 text=color_data["text"]
             )
-            
-        except Exception as e:
-            logger.error(f"Erreur lors de la génération de couleurs avancée: {e}")
-            # Fallback vers la méthode simple
-            return await self._generate_color_scheme(
-                industry, style_preferences, color_preferences, brand_strategy
-            )
-
-    async def _generate_advanced_typography(
-        self,
-        style_preferences: Optional[List[StylePreference]],
-        brand_strategy: Dict[str, Any],
-        industry: IndustryType
-    ) -> Typography:
-        """Génère une typographie avancée adaptée à la marque"""
-        try:
-            prompt = f"""
-            Recommande une combinaison de polices pour:
-            
-            Style préféré: {style_preferences[0].value if style_preferences else 'moderne'}
-            Ton de marque: {brand_strategy.get('brand_voice', '')}
-            Secteur: {industry.value}
-            Positionnement: {brand_strategy.get('positioning', '')}
-            
-            Recommande:
-            1. Police pour les titres (heading_font)
-            2. Police pour le corps de texte (body_font)
-            3. Tailles de police optimales
-            
-            Utilise des polices Google Fonts populaires et accessibles.
-            
-            Format JSON:
-            {{
-                "heading_font": "nom de la police",
-                "body_font": "nom de la police",
-                "font_sizes": {{
-                    "h1": "taille",
-                    "h2": "taille",
-                    "h3": "taille",
-                    "body": "taille"
-                }},
-                "rationale": "explication des choix typographiques"
-            }}
-            """
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Tu es un expert en typographie et design web."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=600,
-                temperature=0.5
-            )
-            
-            typo_data = json.loads(response.choices[0].message.content)
-            
-            return Typography(
+            typography = Typography(
                 heading_font=typo_data["heading_font"],
                 body_font=typo_data["body_font"],
                 font_sizes=typo_data["font_sizes"]
             )
             
+            return color_scheme, typography
+            
         except Exception as e:
-            logger.error(f"Erreur lors de la génération de typographie avancée: {e}")
-            # Fallback vers la méthode simple
-            return await self._generate_typography(style_preferences, brand_strategy)
+            logger.error("Erreur lors de la génération de l'identité visuelle avancée: %s", e)
+            # Fallback vers les méthodes simples
+            color_scheme = await self._generate_color_scheme(industry, style_preferences, color_preferences)
+            return color_scheme, self._generate_typography(style_preferences)
 
     def _select_best_palette(
         self,
-        palettes: List[Dict],
+        palettes: Sequence[Mapping[str, str]],
         style_preferences: Optional[List[StylePreference]],
         color_preferences: Optional[List[str]]
-    ) -> Dict[str, str]:
+    ) -> Mapping[str, str]:
         """Sélectionne la meilleure palette selon les préférences"""
         if not palettes:
-            return {"primary": "#2563EB", "secondary": "#F8FAFC", "accent": "#10B981"}
+            return self._DEFAULT_PALETTE
         
         # Si des couleurs spécifiques sont préférées, essayer de les intégrer
         if color_preferences:
-            for palette in palettes:
-                for color_pref in color_preferences:
-                    if any(color_pref.lower() in color.lower() for color in palette.values()):
+            # Couleurs hexadécimales: palette la plus proche perceptuellement (ΔE CIELAB),
+            # distances calculées en une passe NumPy sur toutes les palettes
+            preferred_rgb = [rgb for rgb in map(_parse_hex_color, color_preferences) if rgb is not None]
+            if preferred_rgb:
+                palettes_lab = _palettes_lab(tuple(tuple(p.values()) for p in palettes))
+                preferred_lab = _rgb_to_lab(np.array(preferred_rgb, dtype=np.uint8))
+                # (P, préférences, couleurs): distance de chaque préférence à chaque couleur
+                delta_e = np.linalg.norm(
+                    palettes_lab[:, None, :, :] - preferred_lab[None, :, None, :], axis=-1
+                )
+                # Score = somme, pour chaque préférence, de la distance à la couleur la plus proche
+                scores = delta_e.min(axis=2).sum(axis=1)
+                return palettes[int(np.argmin(scores))]
+            
+            # Préférences textuelles: mise en minuscules une seule fois par appel
+            color_preferences_lower = [c.lower() for c in color_preferences]
+            palette_values_lower = [tuple(v.lower() for v in p.values()) for p in palettes]
+            for palette, values_lower in zip(palettes, palette_values_lower):
+                for color_pref in color_preferences_lower:
+                    if any(color_pref in color for color in values_lower):
                         return palette
         
         # Sélection basée sur le style
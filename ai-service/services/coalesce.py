@@ -0,0 +1,32 @@
+# coalesce.py
+
+import asyncio
+import functools
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+# Exécutions en cours par clé (une seule par clé dans le processus)
+_in_flight: Dict[Hashable, asyncio.Task] = {}
+
+
+async def coalesce(key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+    """
+    Partage une seule exécution de `factory()` entre les appels simultanés de même clé.
+    L'exécution tourne dans sa propre tâche: annuler un appelant n'interrompt pas
+    les autres, et une exception est propagée à tous les appelants en attente
+    """
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        _in_flight[key] = task
+        task.add_done_callback(functools.partial(_release, key))
+    return await asyncio.shield(task)
+
+
+def _release(key: Hashable, task: asyncio.Task):
+    """Libère la clé; consomme l'exception (pas d'avertissement sans appelant en attente)"""
+    if _in_flight.get(key) is task:
+        del _in_flight[key]
+    if not task.cancelled():
+        task.exception()
@@ -1,27 +1,353 @@
 # content_scraper.py
 
 import os
+import asyncio
+import functools
+import logging
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional
+from urllib.parse import urlparse
 from dotenv import load_dotenv
-import openai
+import httpx
+import orjson
+import lxml.etree
+import lxml.html
+from services.http_client import create_http_client, retry_delay
+from services.openai_client import get_openai_client, OPENAI_MAX_RETRIES
+from services.llm_cache import LLMCache
 
-# Charger les variables d'environnement depuis le fichier .env
+# Charger les variables d'environnement depuis le fichier .env (une seule fois, à l'import)
 load_dotenv()
 
+# Clé API lue une seule fois, et non à chaque instanciation
+_OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+logger = logging.getLogger(__name__)
+
+# Sites analysés simultanément par analyze_urls
+SCRAPER_CONCURRENCY = int(os.getenv('SCRAPER_CONCURRENCY', 8))
+
+# Politesse par hôte: téléchargements simultanés, requêtes par seconde et reprises sur 429/503
+SCRAPER_HOST_CONCURRENCY = int(os.getenv('SCRAPER_HOST_CONCURRENCY', 4))
+SCRAPER_HOST_RPS = float(os.getenv('SCRAPER_HOST_RPS', 2))
+SCRAPER_MAX_RETRIES = int(os.getenv('SCRAPER_MAX_RETRIES', 3))
+RETRYABLE_STATUS = frozenset({429, 503})
+
+# Parsing HTML: pool de processus si > 0 (tous les cœurs, hors GIL), sinon threads
+SCRAPER_PROCESS_WORKERS = int(os.getenv('SCRAPER_PROCESS_WORKERS', 0))
+
+# Taille maximale lue par page: au-delà, la lecture s'arrête et seul le début est analysé
+MAX_PAGE_BYTES = int(os.getenv('MAX_PAGE_BYTES', 5 << 20))
+PAGE_CHUNK_SIZE = 64 * 1024
+
+# Durée de conservation des analyses de pages (une page concurrente change peu en une heure)
+ANALYSIS_CACHE_TTL = int(os.getenv('ANALYSIS_CACHE_TTL', 3600))
+
+# Balises dont le texte n'est pas du contenu (sous-arbres ignorés, sans modifier l'arbre)
+_SKIP_TEXT_TAGS = frozenset({'script', 'style'})
+
+# Balises relevées en un seul parcours de l'arbre
+_HEADING_LEVELS = ('h1', 'h2', 'h3')
+_SCANNED_TAGS = ('title', 'meta', 'a', 'img') + _HEADING_LEVELS
+
+# Encodage déclaré dans le document (<meta charset>, http-equiv, déclaration XML) ou BOM,
+# recherché dans le début de la page comme le font les navigateurs
+_CHARSET_PRESCAN_BYTES = 1024
+_DECLARED_CHARSET = re.compile(
+    rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)|<\?xml[^>]+encoding\s*=\s*["\']([\w.:-]+)',
+    re.IGNORECASE
+)
+_BOMS = (b'\xef\xbb\xbf', b'\xff\xfe', b'\xfe\xff')
+
+
+@functools.lru_cache(maxsize=4096)
+def _href_netloc(href: str) -> str:
+    """Domaine d'un lien, mémorisé: les ancres d'une page pointent souvent vers les mêmes URL"""
+    return urlparse(href).netloc
+
+
 class ContentScraper:
     def __init__(self):
-        # Récupérer la clé API depuis l'environnement
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
+        # Vérifier la clé API chargée depuis l'environnement
+        if not _OPENAI_API_KEY:
             raise ValueError("La clé API OpenAI n'est pas définie dans le fichier .env")
 
-        # Initialiser le client OpenAI avec la clé
-        self.client = openai.OpenAI(api_key=api_key)
+        # Client OpenAI asynchrone partagé (même pool de connexions que les autres services),
+        # avec les reprises du SDK pour ce service (même nombre que les autres services)
+        self.client = get_openai_client().with_options(max_retries=OPENAI_MAX_RETRIES)
+        self.http_client = None
+        self.process_pool: Optional[ProcessPoolExecutor] = None
+        # Sémaphore et prochain créneau d'envoi par hôte (créés à la première requête vers l'hôte)
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._host_next_slot: Dict[str, float] = {}
+        # Réponses de generate_text: LRU en mémoire puis Redis (survit aux redémarrages)
+        self.text_cache = LLMCache(prefix="llm:scraper", maxsize=1024)
+        # Analyses de pages par (URL, type d'analyse): même cache à deux niveaux
+        self.analysis_cache = LLMCache(prefix="scrape:analysis", maxsize=512, ttl=ANALYSIS_CACHE_TTL)
+
+    async def initialize(self, http_client: Optional[httpx.AsyncClient] = None):
+        """Initialise le client HTTP (partagé avec l'application si fourni) et le pool de parsing"""
+        self.http_client = http_client or create_http_client()
+        if SCRAPER_PROCESS_WORKERS > 0 and self.process_pool is None:
+            self.process_pool = ProcessPoolExecutor(max_workers=SCRAPER_PROCESS_WORKERS)
+
+    async def shutdown(self):
+        """Arrête le pool de processus de parsing"""
+        if self.process_pool:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
+            self.process_pool = None
 
-    def generate_text(self, prompt: str):
+    async def generate_text(self, prompt: str):
         # Exemple de fonction pour générer du texte avec OpenAI
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=500
+        request = {
+            "model": "gpt-4o-mini",
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": 500
+        }
+        # Prompt identique (développement, reprises du scraper): réponse servie depuis le cache
+        cache_key = LLMCache.make_key(request)
+        cached = await self.text_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        response = await self.client.chat.completions.create(**request)
+        content = response.choices[0].message.content
+        if content is not None:
+            await self.text_cache.set(cache_key, content)
+        return content
+
+    async def analyze_website(self, url: str, analysis_type: str = "complete") -> Dict[str, Any]:
+        """
+        Analyse une page web: structure, SEO et recommandations
+        """
+        try:
+            cache_key = LLMCache.make_key({"url": url, "analysis_type": analysis_type})
+            cached = await self.analysis_cache.get(cache_key)
+            if cached is not None:
+                return orjson.loads(cached)
+
+            logger.info("Analyse du site: %s (%s)", url, analysis_type)
+
+            page = await self._fetch_and_parse(url)
+            insights, recommendations = self._build_insights(page)
+
+            analysis = {
+                **page,
+                "analysis_type": analysis_type,
+                "insights": insights,
+                "recommendations": recommendations
+            }
+            await self.analysis_cache.set(cache_key, orjson.dumps(analysis).decode())
+            return analysis
+
+        except Exception as e:
+            logger.error("Erreur lors de l'analyse du site %s: %s", url, e)
+            raise
+
+    async def analyze_urls(self, urls: List[str], analysis_type: str = "complete") -> List[Dict[str, Any]]:
+        """
+        Analyse plusieurs sites en parallèle (ex: URLs concurrentes), au plus
+        SCRAPER_CONCURRENCY à la fois. Un site en échec est renvoyé avec son erreur
+        sans bloquer les autres
+        """
+        semaphore = asyncio.BoundedSemaphore(SCRAPER_CONCURRENCY)
+
+        async def analyze(url: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.analyze_website(url, analysis_type)
+
+        results = await asyncio.gather(
+            *[analyze(url) for url in urls],
+            return_exceptions=True
         )
-        return response.choices[0].message.content
+
+        return [
+            {"url": url, "error": str(result)} if isinstance(result, Exception) else result
+            for url, result in zip(urls, results)
+        ]
+
+    async def _fetch_and_parse(self, url: str) -> Dict[str, Any]:
+        """Télécharge une page et en extrait les éléments clés"""
+        if self.http_client is None:
+            await self.initialize()
+
+        host = urlparse(url).netloc
+        semaphore = self._host_semaphores.setdefault(host, asyncio.Semaphore(SCRAPER_HOST_CONCURRENCY))
+
+        async with semaphore:
+            for attempt in range(SCRAPER_MAX_RETRIES + 1):
+                await self._wait_host_slot(host)
+                try:
+                    final_url, body, encoding = await self._download(url)
+                    break
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code not in RETRYABLE_STATUS or attempt == SCRAPER_MAX_RETRIES:
+                        raise
+                    delay = retry_delay(e.response.headers, attempt)
+                    logger.warning("Hôte %s saturé (%s), nouvelle tentative dans %.1fs", host, e.response.status_code, delay)
+                    await asyncio.sleep(delay)
+
+        # Parsing lxml (C) hors de la boucle d'événements: processus dédiés si configurés, sinon thread
+        if self.process_pool:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.process_pool, self._parse_html, final_url, body, encoding
+            )
+        return await asyncio.to_thread(self._parse_html, final_url, body, encoding)
+
+    async def _wait_host_slot(self, host: str):
+        """Limiteur par hôte: espace les requêtes d'au moins 1/SCRAPER_HOST_RPS seconde"""
+        now = time.monotonic()
+        slot = max(now, self._host_next_slot.get(host, 0.0))
+        self._host_next_slot[host] = slot + 1 / SCRAPER_HOST_RPS
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _download(self, url: str) -> tuple:
+        """Télécharge une page (URL finale, octets bruts, encodage déclaré par l'en-tête HTTP ou None)"""
+        # Lecture en flux, plafonnée à MAX_PAGE_BYTES (mémoire bornée sur les pages énormes)
+        body = bytearray()
+        async with self.http_client.stream("GET", url) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(PAGE_CHUNK_SIZE):
+                body.extend(chunk)
+                if len(body) >= MAX_PAGE_BYTES:
+                    logger.warning("Page tronquée à %s octets: %s", MAX_PAGE_BYTES, url)
+                    del body[MAX_PAGE_BYTES:]
+                    break
+            final_url = str(response.url)
+            encoding = response.charset_encoding
+
+        return final_url, bytes(body), encoding
+
+    @staticmethod
+    def _parse_html(url: str, body: bytes, encoding: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Extrait titre, méta, titres, liens et images d'un document HTML.
+        Octets bruts, décodés selon l'en-tête HTTP, sinon l'encodage déclaré dans la page
+        (<meta charset>, déclaration XML des pages XHTML), sinon le BOM; UTF-8 par défaut
+        """
+        if not encoding:
+            head = body[:_CHARSET_PRESCAN_BYTES]
+            declared = _DECLARED_CHARSET.search(head)
+            if declared:
+                encoding = (declared.group(1) or declared.group(2)).decode('ascii')
+            elif not head.startswith(_BOMS):
+                encoding = 'utf-8'
+        parser = None
+        if encoding:
+            try:
+                parser = lxml.html.HTMLParser(encoding=encoding)
+            except LookupError:
+                logger.warning("Encodage inconnu (%s), UTF-8 utilisé: %s", encoding, url)
+                parser = lxml.html.HTMLParser(encoding='utf-8')
+        try:
+            tree = lxml.html.fromstring(body, parser=parser)
+        except lxml.etree.ParserError:
+            # Document vide (ou sans aucun élément): page sans contenu, pas une erreur
+            tree = lxml.html.Element('html')
+        domain = urlparse(url).netloc
+
+        # Un seul parcours de l'arbre (et non une requête par type de balise)
+        title = None
+        meta_description = None
+        headings: Dict[str, List[str]] = {level: [] for level in _HEADING_LEVELS}
+        links_total = internal_links = 0
+        images_total = missing_alt = 0
+
+        for element in tree.iter(*_SCANNED_TAGS):
+            tag = element.tag
+            if tag == 'a':
+                href = element.get('href')
+                if href is not None:
+                    links_total += 1
+                    if _href_netloc(href) in ('', domain):
+                        internal_links += 1
+            elif tag == 'img':
+                images_total += 1
+                if not element.get('alt'):
+                    missing_alt += 1
+            elif tag in headings:
+                headings[tag].append(element.text_content().strip())
+            elif tag == 'meta':
+                if meta_description is None and element.get('name') == 'description':
+                    meta_description = element.get('content')
+            elif title is None:
+                title = element.text or ''
+
+        # Corps du document entier (fromstring renvoie le fragment si la page n'est qu'un fragment)
+        word_count = sum(
+            ContentScraper._count_words(body) for body in tree.getroottree().getroot().iter('body')
+        )
+
+        return {
+            "url": url,
+            "title": (title or '').strip(),
+            "meta_description": meta_description or '',
+            "headings": headings,
+            "word_count": word_count,
+            "links": {
+                "internal": internal_links,
+                "external": links_total - internal_links
+            },
+            "images": {
+                "total": images_total,
+                "missing_alt": missing_alt
+            }
+        }
+
+    @staticmethod
+    def _count_words(root) -> int:
+        """
+        Compte les mots du texte sous `root`, nœud par nœud (pas de concaténation du texte
+        de la page). Parcours non destructif: les sous-arbres _SKIP_TEXT_TAGS sont sautés
+        en un seul passage, sans test d'ancêtres pour chaque nœud texte
+        """
+        words = 0
+        stack = [root]
+        while stack:
+            element = stack.pop()
+            # Commentaires et instructions: tag non textuel, seul leur tail est du contenu
+            if not isinstance(element.tag, str) or element.tag in _SKIP_TEXT_TAGS:
+                continue
+            if element.text:
+                words += len(element.text.split())
+            for child in element:
+                if child.tail:
+                    words += len(child.tail.split())
+                stack.append(child)
+        return words
+
+    @staticmethod
+    def _build_insights(page: Dict[str, Any]) -> tuple:
+        """Déduit des constats et recommandations SEO de base"""
+        insights = []
+        recommendations = []
+
+        if not page["title"]:
+            recommendations.append("Ajouter une balise <title> descriptive")
+        else:
+            insights.append(f"Titre de la page: {page['title']}")
+
+        if not page["meta_description"]:
+            recommendations.append("Ajouter une meta description (150-160 caractères)")
+
+        h1_count = len(page["headings"]["h1"])
+        if h1_count != 1:
+            recommendations.append(f"Utiliser un seul titre H1 (actuellement {h1_count})")
+
+        if page["images"]["missing_alt"]:
+            recommendations.append(
+                f"Renseigner l'attribut alt de {page['images']['missing_alt']} image(s)"
+            )
+
+        if page["word_count"] < 300:
+            recommendations.append("Enrichir le contenu textuel (moins de 300 mots)")
+
+        insights.append(
+            f"{page['word_count']} mots, {page['links']['internal']} liens internes, "
+            f"{page['links']['external']} liens externes"
+        )
+
+        return insights, recommendations
@@ -0,0 +1,56 @@
+# http_client.py
+
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Mapping
+
+import httpx
+
+# Pool partagé par processus: évite une poignée de main TCP+TLS par appel sortant
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+# Pool dédié aux appels OpenAI (nombreux appels concurrents vers un seul hôte)
+OPENAI_HTTP_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=100)
+
+# Délai maximal entre deux tentatives (secondes)
+MAX_RETRY_DELAY = 30.0
+
+
+def create_http_client(limits: httpx.Limits = HTTP_LIMITS) -> httpx.AsyncClient:
+    """Crée le client HTTP asynchrone partagé (HTTP/2, keep-alive)"""
+    return httpx.AsyncClient(
+        http2=True,
+        limits=limits,
+        timeout=HTTP_TIMEOUT,
+        follow_redirects=True
+    )
+
+
+def retry_delay(headers: Mapping[str, str], attempt: int) -> float:
+    """
+    Délai avant reprise: Retry-After (secondes ou date HTTP) ou X-RateLimit-Reset,
+    sinon backoff exponentiel + jitter; plafonné à MAX_RETRY_DELAY
+    """
+    retry_after = headers.get("retry-after")
+    reset = headers.get("x-ratelimit-reset")
+    if retry_after is not None:
+        try:
+            return min(max(float(retry_after), 0.0), MAX_RETRY_DELAY)
+        except ValueError:
+            pass
+        try:
+            delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            return min(max(delay, 0.0), MAX_RETRY_DELAY)
+        except (TypeError, ValueError):
+            pass
+    if reset is not None:
+        try:
+            value = float(reset)
+            # Horodatage epoch ou nombre de secondes selon les serveurs
+            delay = value - time.time() if value > 1e9 else value
+            return min(max(delay, 0.0), MAX_RETRY_DELAY)
+        except ValueError:
+            pass
+    return min(2 ** attempt, MAX_RETRY_DELAY) + random.random()
@@ -0,0 +1,59 @@
+# llm_cache.py
+
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from cachetools import TTLCache
+
+from services.redis_cache import get_redis
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_SIZE = int(os.getenv('LLM_CACHE_SIZE', 2048))
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', 86400))
+
+
+class LLMCache:
+    """
+    Cache des réponses LLM à deux niveaux: LRU en mémoire (TTL) puis Redis
+    (partagé entre workers). Redis indisponible = cache mémoire seul
+    """
+
+    def __init__(self, prefix: str, maxsize: int = LLM_CACHE_SIZE, ttl: int = LLM_CACHE_TTL):
+        self.prefix = prefix
+        self.ttl = ttl
+        self._local: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def make_key(request: Dict[str, Any]) -> str:
+        """Clé SHA256 des paramètres normalisés de l'appel (modèle, messages, température...)"""
+        return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """Retourne la réponse en cache, ou None"""
+        value = self._local.get(key)
+        if value is not None:
+            return value
+
+        try:
+            cached = await get_redis().get(f"{self.prefix}:{key}")
+        except Exception as e:
+            logger.warning("Cache Redis indisponible (%s): %s", self.prefix, e)
+            return None
+
+        if cached is None:
+            return None
+        value = cached.decode()
+        self._local[key] = value
+        return value
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None):
+        """Enregistre une réponse dans les deux niveaux de cache"""
+        self._local[key] = value
+        try:
+            await get_redis().set(f"{self.prefix}:{key}", value, ex=ttl or self.ttl)
+        except Exception as e:
+            logger.warning("Écriture du cache Redis impossible (%s): %s", self.prefix, e)
@@ -0,0 +1,80 @@
+# openai_client.py
+
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import openai
+
+from services.http_client import create_http_client, retry_delay, OPENAI_HTTP_LIMITS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Erreurs transitoires reprises: limite de débit, réseau/timeout, erreur serveur
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+# Délai par tentative: base (connexion, file d'attente) + génération au débit minimal attendu
+OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', 60))
+OPENAI_MIN_TOKENS_PER_SECOND = float(os.getenv('OPENAI_MIN_TOKENS_PER_SECOND', 15))
+
+# Reprises sur erreurs transitoires (429, réseau/timeout, 5xx), communes à tous les services
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', 4))
+
+# Au-delà de ce nombre de tokens en sortie, un timeout n'est pas repris
+# (chaque nouvelle tentative d'une longue génération recoûte tous ses tokens)
+OPENAI_LONG_GENERATION_TOKENS = int(os.getenv('OPENAI_LONG_GENERATION_TOKENS', 1000))
+
+_client: Optional[openai.AsyncOpenAI] = None
+
+
+def get_openai_client() -> openai.AsyncOpenAI:
+    """
+    Retourne le client OpenAI asynchrone partagé par tous les services du processus
+    (un seul pool HTTP/2: connexions et sessions TLS réutilisées entre services).
+    Pas de reprises côté client: chaque service gère les siennes (Retry-After, backoff)
+    """
+    global _client
+    if _client is None:
+        _client = openai.AsyncOpenAI(
+            max_retries=0,
+            http_client=create_http_client(limits=OPENAI_HTTP_LIMITS)
+        )
+    return _client
+
+
+async def close_openai_client():
+    """Ferme le pool de connexions du client OpenAI partagé"""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def completion_timeout(max_tokens: int) -> float:
+    """Délai maximal d'un appel non streamé, proportionnel aux tokens de sortie demandés"""
+    return OPENAI_TIMEOUT + max_tokens / OPENAI_MIN_TOKENS_PER_SECOND
+
+
+async def with_retries(
+    call: Callable[[], Awaitable[T]],
+    max_retries: int,
+    retry_timeouts: bool = True
+) -> T:
+    """
+    Exécute un appel OpenAI avec reprises sur erreurs transitoires: délai indiqué
+    par les en-têtes de la réponse (Retry-After), sinon backoff exponentiel + jitter.
+    Sans `retry_timeouts`, un timeout est propagé immédiatement
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return await call()
+        except RETRYABLE_ERRORS as e:
+            if attempt == max_retries or (not retry_timeouts and isinstance(e, openai.APITimeoutError)):
+                raise
+            response = getattr(e, "response", None)
+            delay = retry_delay(response.headers if response is not None else {}, attempt)
+            logger.warning("Erreur OpenAI transitoire (%s), nouvelle tentative dans %.1fs", e, delay)
+            await asyncio.sleep(delay)
@@ -0,0 +1,120 @@
+# rate_limiter.py
+
+import asyncio
+import functools
+import logging
+import os
+import re
+import time
+from collections import deque
+from typing import Deque, Mapping, Optional, Tuple
+
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+# Durées des en-têtes x-ratelimit-reset-* ("6m0s", "1.5s", "120ms")
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+# Part minimale du quota de tokens restant avant de suspendre les envois
+RATE_LIMIT_LOW_WATERMARK = float(os.getenv('OPENAI_RATE_LIMIT_LOW_WATERMARK', 0.1))
+
+
+def _parse_duration(value: str) -> float:
+    """Convertit une durée d'en-tête OpenAI en secondes"""
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in _DURATION_PART.findall(value))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_encoding(model: str) -> Optional[tiktoken.Encoding]:
+    """Charge (une fois par modèle) l'encodage tiktoken; None si indisponible"""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception as e:
+        logger.warning("Encodage tiktoken indisponible pour %s, estimation approximative: %s", model, e)
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    """Compte les tokens d'un texte (≈ 4 caractères par token sans tiktoken)"""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+class RateLimiter:
+    """
+    Limiteur proactif requêtes/minute et tokens/minute sur fenêtre glissante.
+    Attend avant l'appel plutôt que de subir un 429
+    """
+
+    def __init__(self, rpm: int, tpm: int, window: float = 60.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window = window
+        self._requests: Deque[float] = deque()
+        self._tokens: Deque[Tuple[float, int]] = deque()
+        self._token_total = 0
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _purge(self, now: float):
+        """Retire les entrées sorties de la fenêtre"""
+        while self._requests and self._requests[0] <= now - self.window:
+            self._requests.popleft()
+        while self._tokens and self._tokens[0][0] <= now - self.window:
+            self._token_total -= self._tokens.popleft()[1]
+
+    async def acquire(self, tokens: int):
+        """Réserve une requête et `tokens` tokens, en attendant si la fenêtre est pleine"""
+        tokens = min(tokens, self.tpm)
+
+        # Le verrou sert les appelants dans l'ordre d'arrivée
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                # Quota serveur presque épuisé (en-têtes de réponse): attente de sa réinitialisation
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._purge(now)
+
+                rpm_ok = len(self._requests) < self.rpm
+                tpm_ok = self._token_total + tokens <= self.tpm
+                if rpm_ok and tpm_ok:
+                    self._requests.append(now)
+                    self._tokens.append((now, tokens))
+                    self._token_total += tokens
+                    return
+
+                waits = []
+                if not rpm_ok:
+                    waits.append(self._requests[0] + self.window - now)
+                if not tpm_ok:
+                    waits.append(self._tokens[0][0] + self.window - now)
+                await asyncio.sleep(max(max(waits), 0.01))
+
+    def observe(self, headers: Mapping[str, str]):
+        """
+        Ajuste le limiteur d'après les en-têtes x-ratelimit-* d'une réponse OpenAI:
+        sous RATE_LIMIT_LOW_WATERMARK du quota de tokens, les envois sont suspendus
+        jusqu'à sa réinitialisation (plutôt que de provoquer des 429)
+        """
+        try:
+            remaining = int(headers["x-ratelimit-remaining-tokens"])
+            limit = int(headers["x-ratelimit-limit-tokens"])
+            reset = _parse_duration(headers.get("x-ratelimit-reset-tokens", ""))
+        except (KeyError, ValueError):
+            return
+        if limit > 0 and remaining < limit * RATE_LIMIT_LOW_WATERMARK and reset > 0:
+            self._paused_until = max(self._paused_until, time.monotonic() + reset)
+            logger.warning("Quota de tokens OpenAI presque épuisé (%s/%s), pause de %.1fs", remaining, limit, reset)
+
+
+# Limiteur partagé par tous les appels OpenAI du processus
+openai_rate_limiter = RateLimiter(
+    rpm=int(os.getenv('OPENAI_RPM', 500)),
+    tpm=int(os.getenv('OPENAI_TPM', 150000))
+)
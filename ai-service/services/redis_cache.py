@@ -0,0 +1,88 @@
+# redis_cache.py
+
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+from typing import Optional, Type
+
+import redis.asyncio as aioredis
+from pydantic import BaseModel
+
+from services.coalesce import coalesce
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379')
+
+# Délais courts (secondes): un Redis injoignable ne doit pas bloquer les appels mis en cache
+REDIS_CONNECT_TIMEOUT = float(os.getenv('REDIS_CONNECT_TIMEOUT', 0.5))
+REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', 0.5))
+
+_redis: Optional[aioredis.Redis] = None
+
+
+def get_redis() -> aioredis.Redis:
+    """Retourne le client Redis asynchrone (pool de connexions partagé)"""
+    global _redis
+    if _redis is None:
+        pool = aioredis.ConnectionPool.from_url(
+            REDIS_URL,
+            max_connections=50,
+            socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+            socket_timeout=REDIS_SOCKET_TIMEOUT
+        )
+        _redis = aioredis.Redis(connection_pool=pool)
+    return _redis
+
+
+async def close_redis():
+    """Ferme le pool de connexions Redis"""
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+
+
+def redis_cache(ttl: int, model: Type[BaseModel]):
+    """
+    Met en cache dans Redis le résultat (modèle Pydantic) d'une méthode asynchrone.
+    La clé est un SHA1 des arguments normalisés; Redis indisponible = pas de cache.
+    Les appels identiques simultanés partagent une seule exécution (pas d'appels IA en double)
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        prefix = f"cache:{func.__qualname__}"
+
+        async def load(key: str, args, kwargs):
+            try:
+                cached = await get_redis().get(key)
+                if cached:
+                    return model.model_validate_json(cached)
+            except Exception as e:
+                logger.warning("Cache Redis indisponible (%s): %s", key, e)
+
+            result = await func(*args, **kwargs)
+
+            try:
+                await get_redis().set(key, result.model_dump_json(), ex=ttl)
+            except Exception as e:
+                logger.warning("Écriture du cache Redis impossible (%s): %s", key, e)
+
+            return result
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = {name: value for name, value in bound.arguments.items() if name != "self"}
+            digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+            key = f"{prefix}:{digest}"
+
+            # Appels identiques simultanés: une seule exécution partagée
+            return await coalesce(key, lambda: load(key, args, kwargs))
+
+        return wrapper
+    return decorator
@@ -1,13 +1,18 @@
 import asyncio
-import aiofiles
-import json
+import gzip
+import hashlib
 import logging
 import uuid
 import os
-from typing import Dict, List, Any, Optional
+from string import Template as StringTemplate
+from collections import defaultdict
+from types import MappingProxyType
+from typing import Dict, List, Any, Mapping, Optional, Tuple
 from datetime import datetime
-from jinja2 import Environment, FileSystemLoader, Template
+from cachetools import LRUCache, TTLCache
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
 import markdown
+import orjson
 from models.schemas import (
     SiteStructure, 
     BrandingData, 
@@ -18,18 +23,52 @@ from models.schemas import (
 
 logger = logging.getLogger(__name__)
 
+# Bytecode des templates compilés, conservé entre redémarrages des workers (vide = désactivé)
+JINJA_BYTECODE_CACHE_DIR = os.getenv('JINJA_BYTECODE_CACHE_DIR', '/tmp/jinja_bcc')
+
+# Options de l'environnement Jinja: espaces autour des balises de bloc supprimés (HTML plus compact)
+_JINJA_OPTIONS: Mapping[str, Any] = MappingProxyType({
+    'autoescape': True,
+    'trim_blocks': True,
+    'lstrip_blocks': True,
+    'keep_trailing_newline': False
+})
+
+# Rendus de pages simultanés par site (exécutés hors de la boucle d'événements)
+SITE_RENDER_CONCURRENCY = int(os.getenv('SITE_RENDER_CONCURRENCY', 8))
+
+# Données de templates conservées par (site, branding, assets): les prévisualisations reconstruisent souvent le même site
+TEMPLATE_DATA_CACHE_SIZE = int(os.getenv('TEMPLATE_DATA_CACHE_SIZE', 256))
+
+# Pages HTML rendues, indexées par empreinte (template, données): LRU en mémoire bornée en octets
+RENDER_CACHE_BYTES = int(os.getenv('RENDER_CACHE_BYTES', 64 << 20))
+
+# Statuts de construction conservés en mémoire (les plus anciens expirent, taille bornée)
+SITE_STATUS_CACHE_SIZE = int(os.getenv('SITE_STATUS_CACHE_SIZE', 10000))
+SITE_STATUS_TTL = int(os.getenv('SITE_STATUS_TTL', 3600))
+
+# Copie gzip (.gz) écrite à côté des fichiers texte du site, servie telle quelle selon Accept-Encoding
+# (niveau de compression, 0 = désactivé)
+SITE_GZIP_LEVEL = int(os.getenv('SITE_GZIP_LEVEL', 6))
+_COMPRESSIBLE_EXTENSIONS = frozenset({'.html', '.css', '.js', '.json', '.svg', '.xml', '.txt'})
+
+# Délai simulé du déploiement CDN en millisecondes (0 = aucun), en attendant le vrai déploiement
+SIMULATE_DEPLOY_MS = int(os.getenv('SIMULATE_DEPLOY_MS', 0))
+
+# URL par défaut de chaque emplacement d'asset, utilisées quand le site en fournit moins
+_DEFAULT_ASSET_URLS: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    'logo': ("/assets/logo.png",),
+    'hero': ("/assets/hero.jpg",),
+    'icon': ("/assets/icon1.png", "/assets/icon2.png", "/assets/icon3.png"),
+    'product': ("/assets/product1.jpg", "/assets/product2.jpg", "/assets/product3.jpg")
+})
+
 class SiteBuilder:
     """Service de construction et déploiement de sites statiques"""
     
-    def __init__(self):
-        self.templates_path = '/app/templates'
-        self.output_path = '/tmp/sites'
-        self.jinja_env = None
-        self.site_statuses = {}  # Cache des statuts de sites
-        
-        # Templates HTML de base
-        self.base_templates = {
-            'base': '''<!DOCTYPE html>
+    # Templates HTML de base (constantes partagées par toutes les instances, en lecture seule)
+    _BASE_TEMPLATES: Mapping[str, str] = MappingProxyType({
+        'base': '''<!DOCTYPE html>
 <html lang="fr">
 <head>
     <meta charset="UTF-8">
@@ -42,7 +81,7 @@ class SiteBuilder:
     <link rel="icon" type="image/x-icon" href="{{ favicon_url }}">
     
     <!-- Fonts -->
-    <link href="https://fonts.googleapis.com/css2?family={{ heading_font|replace(' ', '+') }}:wght@300;400;600;700&family={{ body_font|replace(' ', '+') }}:wght@300;400;500;600&display=swap" rel="stylesheet">
+    <link href="https://fonts.googleapis.com/css2?family={{ heading_font_url }}:wght@300;400;600;700&family={{ body_font_url }}:wght@300;400;500;600&display=swap" rel="stylesheet">
     
     <!-- Tailwind CSS -->
     <script src="https://cdn.tailwindcss.com"></script>
@@ -140,7 +179,7 @@ class SiteBuilder:
 </body>
 </html>''',
             
-            'home': '''{% extends "base.html" %}
+        'home': '''{% extends "base.html" %}
 
 {% block content %}
 <!-- Hero Section -->
@@ -164,7 +203,10 @@ class SiteBuilder:
                 </div>
             </div>
             <div class="animate-on-scroll">
-                <img src="{{ hero_image }}" alt="{{ hero_image_alt }}" class="w-full h-auto rounded-lg shadow-2xl">
+                <picture>
+                    {% if hero_image_webp %}<source srcset="{{ hero_image_webp }}" type="image/webp">{% endif %}
+                    <img src="{{ hero_image }}" alt="{{ hero_image_alt }}" class="w-full h-auto rounded-lg shadow-2xl">
+                </picture>
             </div>
         </div>
     </div>
@@ -266,7 +308,7 @@ class SiteBuilder:
 </section>
 {% endblock %}''',
             
-            'header': '''<header class="bg-white shadow-sm sticky top-0 z-50">
+        'header': '''<header class="bg-white shadow-sm sticky top-0 z-50">
     <nav class="container mx-auto px-4 py-4">
         <div class="flex justify-between items-center">
             <div class="flex items-center">
@@ -310,7 +352,7 @@ function toggleMobileMenu() {
 }
 </script>''',
             
-            'footer': '''<footer class="bg-gray-900 text-white section-padding">
+        'footer': '''<footer class="bg-gray-900 text-white section-padding">
     <div class="container mx-auto px-4">
         <div class="grid md:grid-cols-4 gap-8">
             <div>
@@ -370,7 +412,127 @@ function toggleMobileMenu() {
         </div>
     </div>
 </footer>'''
-        }
+    })
+
+    # CSS personnalisé: seules les couleurs du branding varient
+    _CUSTOM_CSS = StringTemplate("""
+/* CSS personnalisé généré automatiquement */
+:root {
+    --primary-color: $primary;
+    --secondary-color: $secondary;
+    --accent-color: $accent;
+    --background-color: $background;
+    --text-color: $text;
+}
+
+/* Animations */
+@keyframes fadeIn {
+    from { opacity: 0; transform: translateY(20px); }
+    to { opacity: 1; transform: translateY(0); }
+}
+
+.animate-fade-in {
+    animation: fadeIn 0.6s ease-out forwards;
+}
+
+/* Styles personnalisés */
+.gradient-bg {
+    background: linear-gradient(135deg, var(--primary-color), var(--accent-color));
+}
+
+.text-primary { color: var(--primary-color); }
+.bg-primary { background-color: var(--primary-color); }
+.border-primary { border-color: var(--primary-color); }
+
+/* Responsive */
+@media (max-width: 768px) {
+    .hero-section h1 {
+        font-size: 2.5rem;
+    }
+    
+    .section-padding {
+        padding: 40px 0;
+    }
+}
+""")
+
+    # JavaScript personnalisé: identique pour tous les sites (encodé une fois à l'import)
+    _CUSTOM_JS = """
+// JavaScript personnalisé généré automatiquement
+
+// Gestion du menu mobile
+function toggleMobileMenu() {
+    const menu = document.getElementById('mobile-menu');
+    if (menu) {
+        menu.classList.toggle('hidden');
+    }
+}
+
+// Smooth scrolling
+document.addEventListener('DOMContentLoaded', function() {
+    // Liens d'ancrage
+    document.querySelectorAll('a[href^="#"]').forEach(anchor => {
+        anchor.addEventListener('click', function (e) {
+            e.preventDefault();
+            const target = document.querySelector(this.getAttribute('href'));
+            if (target) {
+                target.scrollIntoView({ 
+                    behavior: 'smooth',
+                    block: 'start'
+                });
+            }
+        });
+    });
+    
+    // Animation au scroll
+    const observerOptions = {
+        threshold: 0.1,
+        rootMargin: '0px 0px -50px 0px'
+    };
+    
+    const observer = new IntersectionObserver((entries) => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                entry.target.classList.add('animate-fade-in');
+            }
+        });
+    }, observerOptions);
+    
+    // Observer tous les éléments avec la classe animate-on-scroll
+    document.querySelectorAll('.animate-on-scroll').forEach(el => {
+        observer.observe(el);
+    });
+    
+    // Gestion des formulaires
+    const forms = document.querySelectorAll('form');
+    forms.forEach(form => {
+        form.addEventListener('submit', function(e) {
+            e.preventDefault();
+            // Traitement du formulaire
+            console.log('Formulaire soumis');
+        });
+    });
+});
+
+// Utilitaires
+function showNotification(message, type = 'info') {
+    // Affichage de notifications
+    console.log(`${type.toUpperCase()}: ${message}`);
+}
+""".encode('utf-8')
+
+    def __init__(self):
+        self.templates_path = '/app/templates'
+        self.output_path = '/tmp/sites'
+        self.jinja_env = None
+        self.home_template: Optional[Template] = None
+        # Cache des statuts de sites
+        self.site_statuses: TTLCache = TTLCache(maxsize=SITE_STATUS_CACHE_SIZE, ttl=SITE_STATUS_TTL)
+        self.template_data_cache: LRUCache = LRUCache(maxsize=TEMPLATE_DATA_CACHE_SIZE)
+        self.render_cache: LRUCache = LRUCache(maxsize=RENDER_CACHE_BYTES, getsizeof=len)
+        self.render_cache_hits = 0
+        self.render_cache_misses = 0
+        self.templates_digest = ''
         
     async def initialize(self):
         """Initialise le service de construction de sites"""
@@ -379,19 +541,41 @@ function toggleMobileMenu() {
             os.makedirs(self.templates_path, exist_ok=True)
             os.makedirs(self.output_path, exist_ok=True)
             
+            # Empreinte des templates et des options de compilation: un changement de l'un
+            # ou de l'autre invalide les rendus en cache et le bytecode compilé
+            self.templates_digest = hashlib.sha256(orjson.dumps(
+                {"templates": dict(self._BASE_TEMPLATES), "options": dict(_JINJA_OPTIONS)},
+                option=orjson.OPT_SORT_KEYS
+            )).hexdigest()[:16]
+            
+            bytecode_cache = None
+            if JINJA_BYTECODE_CACHE_DIR:
+                os.makedirs(JINJA_BYTECODE_CACHE_DIR, exist_ok=True)
+                # Jinja ne vérifie que la source: les options sont distinguées par le nom de fichier
+                bytecode_cache = FileSystemBytecodeCache(
+                    JINJA_BYTECODE_CACHE_DIR, f"__jinja2_{self.templates_digest}_%s.cache"
+                )
+            
             # Création des templates de base
             await self._create_base_templates()
             
-            # Initialisation de Jinja2
+            # Initialisation de Jinja2: les templates sont écrits une fois au démarrage,
+            # inutile de vérifier leur date de modification à chaque rendu (ni d'en évincer du cache)
             self.jinja_env = Environment(
                 loader=FileSystemLoader(self.templates_path),
-                autoescape=True
+                auto_reload=False,
+                cache_size=-1,
+                bytecode_cache=bytecode_cache,
+                **_JINJA_OPTIONS
             )
+
+            # Compilation anticipée (base.html et composants inclus chargés au premier rendu, puis en cache)
+            self.home_template = self.jinja_env.get_template('home.html')
             
             logger.info("Service de construction de sites initialisé avec succès")
             
         except Exception as e:
-            logger.error(f"Erreur lors de l'initialisation du site builder: {e}")
+            logger.error("Erreur lors de l'initialisation du site builder: %s", e)
             raise
 
     async def build_site(
@@ -404,7 +588,7 @@ function toggleMobileMenu() {
         Construit un site complet à partir de la structure et du branding
         """
         try:
-            logger.info(f"Construction du site: {structure.site_id}")
+            logger.info("Construction du site: %s", structure.site_id)
             
             # Mise à jour du statut
             await self._update_site_status(structure.site_id, "building", 10, "Préparation de la construction")
@@ -422,8 +606,8 @@ function toggleMobileMenu() {
             await self._update_site_status(structure.site_id, "building", 60, "Génération des assets")
             
             # Génération des fichiers CSS et JS personnalisés
-            css_content = await self._generate_custom_css(branding)
-            js_content = await self._generate_custom_js(structure)
+            css_content = self._generate_custom_css(branding)
+            js_content = self._generate_custom_js(structure)
             
             site_files['assets/custom.css'] = css_content
             site_files['assets/custom.js'] = js_content
@@ -431,8 +615,10 @@ function toggleMobileMenu() {
             # Mise à jour du statut
             await self._update_site_status(structure.site_id, "building", 80, "Sauvegarde des fichiers")
             
-            # Sauvegarde des fichiers
+            # Sauvegarde des fichiers, puis libération de leur contenu (seuls les noms sont renvoyés)
+            filenames = list(site_files)
             site_path = await self._save_site_files(structure.site_id, site_files)
+            del site_files
             
             # Génération de l'URL de prévisualisation
             preview_url = f"https://preview.klmpegasus.com/{structure.site_id}"
@@ -444,27 +630,27 @@ function toggleMobileMenu() {
                 "site_id": structure.site_id,
                 "preview_url": preview_url,
                 "site_path": site_path,
-                "files": list(site_files.keys()),
+                "files": filenames,
                 "branding": branding,
                 "structure": structure,
                 "assets": assets,
                 "created_at": datetime.now().isoformat()
             }
             
-            logger.info(f"Site construit avec succès: {structure.site_id}")
+            logger.info("Site construit avec succès: %s", structure.site_id)
             return site_data
             
         except Exception as e:
-            logger.error(f"Erreur lors de la construction du site: {e}")
+            logger.error("Erreur lors de la construction du site: %s", e)
             await self._update_site_status(structure.site_id, "error", 0, f"Erreur: {str(e)}")
             raise
 
     async def get_site_status(self, site_id: str) -> SiteStatus:
         """Récupère le statut de construction d'un site"""
         try:
-            if site_id in self.site_statuses:
-                status_data = self.site_statuses[site_id]
-                return SiteStatus(**status_data)
+            site_status = self.site_statuses.get(site_id)
+            if site_status is not None:
+                return site_status
             else:
                 return SiteStatus(
                     site_id=site_id,
@@ -475,7 +661,7 @@ function toggleMobileMenu() {
                 )
                 
         except Exception as e:
-            logger.error(f"Erreur lors de la récupération du statut: {e}")
+            logger.error("Erreur lors de la récupération du statut: %s", e)
             raise
 
     async def save_site_to_database(self, site_data: Dict[str, Any], user_id: str):
@@ -484,32 +670,37 @@ function toggleMobileMenu() {
             # Dans une implémentation complète, ceci sauvegarderait en base de données
             # Pour l'instant, sauvegarde en fichier JSON
             
+            # Horodatage unique: création et mise à jour identiques pour un nouvel enregistrement
+            now = datetime.now().isoformat()
             db_data = {
                 "user_id": user_id,
                 "site_data": site_data,
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat()
+                "created_at": now,
+                "updated_at": now
             }
             
             db_file = f"{self.output_path}/{site_data['site_id']}/site_data.json"
-            async with aiofiles.open(db_file, 'w') as f:
-                await f.write(json.dumps(db_data, indent=2))
+            # Tâche Celery distincte du build: peut s'exécuter sur un worker sans le dossier du site
+            os.makedirs(os.path.dirname(db_file), exist_ok=True)
+            payload = orjson.dumps(db_data, option=orjson.OPT_INDENT_2, default=str)
+            await self._write_text(db_file, payload.decode())
             
-            logger.info(f"Données du site sauvegardées: {site_data['site_id']}")
+            logger.info("Données du site sauvegardées: %s", site_data['site_id'])
             
         except Exception as e:
-            logger.error(f"Erreur lors de la sauvegarde en base: {e}")
+            logger.error("Erreur lors de la sauvegarde en base: %s", e)
             raise
 
     async def deploy_site(self, site_data: Dict[str, Any]):
         """Déploie le site sur CDN"""
         try:
-            logger.info(f"Déploiement du site: {site_data['site_id']}")
+            logger.info("Déploiement du site: %s", site_data['site_id'])
             
             # Dans une implémentation complète, ceci déploierait sur un CDN
-            # Pour l'instant, simulation du déploiement
+            # Pour l'instant, simulation du déploiement (sans attente par défaut)
             
-            await asyncio.sleep(2)  # Simulation du temps de déploiement
+            if SIMULATE_DEPLOY_MS:
+                await asyncio.sleep(SIMULATE_DEPLOY_MS / 1000)
             
             # Mise à jour du statut
             await self._update_site_status(
@@ -519,10 +710,10 @@ function toggleMobileMenu() {
                 "Site déployé avec succès"
             )
             
-            logger.info(f"Site déployé avec succès: {site_data['site_id']}")
+            logger.info("Site déployé avec succès: %s", site_data['site_id'])
             
         except Exception as e:
-            logger.error(f"Erreur lors du déploiement: {e}")
+            logger.error("Erreur lors du déploiement: %s", e)
             raise
 
     async def _create_base_templates(self):
@@ -533,33 +724,66 @@ function toggleMobileMenu() {
             os.makedirs(components_path, exist_ok=True)
             
             # Sauvegarde des templates
-            for template_name, content in self.base_templates.items():
+            for template_name, content in self._BASE_TEMPLATES.items():
                 if template_name in ['header', 'footer']:
                     file_path = os.path.join(components_path, f"{template_name}.html")
                 else:
                     file_path = os.path.join(self.templates_path, f"{template_name}.html")
                 
-                async with aiofiles.open(file_path, 'w') as f:
-                    await f.write(content)
+                # Réécriture seulement si le contenu a changé (workers démarrant ensemble sur le même dossier)
+                if await asyncio.to_thread(self._replace_if_changed, file_path, content):
+                    logger.info("Template mis à jour: %s", file_path)
             
         except Exception as e:
-            logger.error(f"Erreur lors de la création des templates: {e}")
+            logger.error("Erreur lors de la création des templates: %s", e)
             raise
 
+    @classmethod
+    def _replace_if_changed(cls, file_path: str, content: str) -> bool:
+        """Écrit le fichier s'il est absent ou différent. Retourne True si écrit"""
+        try:
+            with open(file_path, encoding='utf-8') as f:
+                if f.read() == content:
+                    return False
+        except (FileNotFoundError, UnicodeDecodeError):
+            pass
+        
+        cls._atomic_write(file_path, content.encode('utf-8'))
+        return True
+
     async def _prepare_template_data(
         self,
         structure: SiteStructure,
         branding: BrandingData,
         assets: List[AssetData]
     ) -> Dict[str, Any]:
-        """Prépare les données pour les templates"""
+        """Prépare les données pour les templates (mises en cache par site, branding et assets)"""
         try:
-            # Création d'un dictionnaire d'assets par type
-            assets_by_type = {}
+            current_year = datetime.now().year
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(f"{structure.site_id}:{current_year}".encode())
+            digest.update(branding.model_dump_json().encode())
             for asset in assets:
-                if asset.asset_type not in assets_by_type:
-                    assets_by_type[asset.asset_type] = []
-                assets_by_type[asset.asset_type].append(asset)
+                digest.update(asset.model_dump_json().encode())
+            cache_key = digest.hexdigest()
+            
+            cached = self.template_data_cache.get(cache_key)
+            if cached is not None:
+                # Copie superficielle: les surcharges par page ne touchent pas l'entrée partagée
+                return dict(cached)
+            
+            # URL des assets par type, en un seul passage, complétées par les valeurs par défaut
+            urls_by_type: Dict[str, List[str]] = defaultdict(list)
+            hero_image_webp = None
+            for asset in assets:
+                if asset.asset_type == 'hero' and not urls_by_type['hero']:
+                    hero_image_webp = asset.url_webp
+                urls_by_type[asset.asset_type].append(asset.url)
+            
+            slots = {
+                asset_type: [*urls_by_type[asset_type], *defaults[len(urls_by_type[asset_type]):]]
+                for asset_type, defaults in _DEFAULT_ASSET_URLS.items()
+            }
             
             # Données de base
             template_data = {
@@ -576,13 +800,17 @@ function toggleMobileMenu() {
                 "text_color": branding.color_scheme.text,
                 "heading_font": branding.typography.heading_font,
                 "body_font": branding.typography.body_font,
+                # Noms de polices au format d'URL Google Fonts, calculés une fois par site
+                "heading_font_url": branding.typography.heading_font.replace(' ', '+'),
+                "body_font_url": branding.typography.body_font.replace(' ', '+'),
                 "brand_values": branding.brand_values,
                 "tagline": branding.tagline,
                 
                 # Assets
-                "logo_url": assets_by_type.get('logo', [{}])[0].url if assets_by_type.get('logo') else "/assets/logo.png",
+                "logo_url": slots['logo'][0],
                 "favicon_url": "/assets/favicon.ico",
-                "hero_image": assets_by_type.get('hero', [{}])[0].url if assets_by_type.get('hero') else "/assets/hero.jpg",
+                "hero_image": slots['hero'][0],
+                "hero_image_webp": hero_image_webp,
                 
                 # Navigation
                 "navigation": [
@@ -606,17 +834,17 @@ function toggleMobileMenu() {
                     {
                         "title": "Qualité Premium",
                         "description": "Des produits de la plus haute qualité",
-                        "icon": assets_by_type.get('icon', [{}])[0].url if assets_by_type.get('icon') else "/assets/icon1.png"
+                        "icon": slots['icon'][0]
                     },
                     {
                         "title": "Livraison Rapide",
                         "description": "Livraison en 24-48h partout en France",
-                        "icon": assets_by_type.get('icon', [{}])[1].url if len(assets_by_type.get('icon', [])) > 1 else "/assets/icon2.png"
+                        "icon": slots['icon'][1]
                     },
                     {
                         "title": "Support Client",
                         "description": "Une équipe dédiée à votre service",
-                        "icon": assets_by_type.get('icon', [{}])[2].url if len(assets_by_type.get('icon', [])) > 2 else "/assets/icon3.png"
+                        "icon": slots['icon'][2]
                     }
                 ],
                 
@@ -628,19 +856,19 @@ function toggleMobileMenu() {
                         "name": "Produit 1",
                         "description": "Description du produit 1",
                         "price": "29,99 €",
-                        "image": assets_by_type.get('product', [{}])[0].url if assets_by_type.get('product') else "/assets/product1.jpg"
+                        "image": slots['product'][0]
                     },
                     {
                         "name": "Produit 2",
                         "description": "Description du produit 2",
                         "price": "39,99 €",
-                        "image": assets_by_type.get('product', [{}])[1].url if len(assets_by_type.get('product', [])) > 1 else "/assets/product2.jpg"
+                        "image": slots['product'][1]
                     },
                     {
                         "name": "Produit 3",
                         "description": "Description du produit 3",
                         "price": "49,99 €",
-                        "image": assets_by_type.get('product', [{}])[2].url if len(assets_by_type.get('product', [])) > 2 else "/assets/product3.jpg"
+                        "image": slots['product'][2]
                     }
                 ],
                 
@@ -657,205 +885,190 @@ function toggleMobileMenu() {
                 "contact_address": "123 Rue de la Paix, 75001 Paris",
                 
                 # Meta
-                "current_year": datetime.now().year,
+                "current_year": current_year,
                 "page_title": "Accueil",
                 "page_description": "Bienvenue sur notre site",
                 "page_keywords": "entreprise, produits, services"
             }
             
-            return template_data
+            self.template_data_cache[cache_key] = template_data
+            return dict(template_data)
             
         except Exception as e:
-            logger.error(f"Erreur lors de la préparation des données: {e}")
+            logger.error("Erreur lors de la préparation des données: %s", e)
             raise
 
     async def _generate_pages(
         self,
         structure: SiteStructure,
         template_data: Dict[str, Any]
-    ) -> Dict[str, str]:
-        """Génère les pages HTML"""
+    ) -> Dict[str, bytes]:
+        """Génère les pages HTML (encodées en UTF-8)"""
         try:
-            site_files = {}
+            # Génération de la page d'accueil (template compilé à l'initialisation)
+            home_template = self.home_template
+            pages_overrides: Dict[str, Dict[str, Any]] = {'index.html': {}}
             
-            # Génération de la page d'accueil
-            home_template = self.jinja_env.get_template('home.html')
-            home_html = home_template.render(**template_data)
-            site_files['index.html'] = home_html
-            
-            # Génération des pages additionnelles
+            # Génération des pages additionnelles: seules les métadonnées de page diffèrent,
+            # elles sont passées à part au lieu de recopier toutes les données du site par page
             for page in structure.pages:
                 if page.page_type != 'home':
                     # Pour l'instant, utilisation du template home pour toutes les pages
                     # Dans une implémentation complète, chaque type de page aurait son template
-                    page_template_data = {**template_data}
-                    page_template_data.update({
+                    pages_overrides[f"{page.page_id}.html"] = {
                         "page_title": page.page_name,
-                        "page_description": page.meta_data.get('description', ''),
-                        "page_keywords": ', '.join(page.meta_data.get('keywords', []))
-                    })
-                    
-                    page_html = home_template.render(**page_template_data)
-                    site_files[f"{page.page_id}.html"] = page_html
+                        "page_description": page.meta_data.description,
+                        "page_keywords": ', '.join(page.meta_data.keywords)
+                    }
+            
+            # Données communes sérialisées une seule fois pour les clés du cache de rendu
+            data_blob = orjson.dumps(template_data, option=orjson.OPT_SORT_KEYS, default=str)
+            
+            # Rendus en parallèle dans des threads: la boucle reste disponible pour les autres sites
+            semaphore = asyncio.Semaphore(SITE_RENDER_CONCURRENCY)
+            
+            async def render(overrides: Dict[str, Any]) -> bytes:
+                async with semaphore:
+                    return await self._render_page(home_template, template_data, data_blob, overrides)
+            
+            pages_html = await asyncio.gather(*(render(overrides) for overrides in pages_overrides.values()))
+            site_files = dict(zip(pages_overrides, pages_html))
+            
+            lookups = self.render_cache_hits + self.render_cache_misses
+            logger.debug(
+                "Cache de rendu: %s succès sur %s (%.0f%%)",
+                self.render_cache_hits, lookups, 100 * self.render_cache_hits / lookups
+            )
             
             return site_files
             
         except Exception as e:
-            logger.error(f"Erreur lors de la génération des pages: {e}")
+            logger.error("Erreur lors de la génération des pages: %s", e)
             raise
 
-    async def _generate_custom_css(self, branding: BrandingData) -> str:
+    def _generate_custom_css(self, branding: BrandingData) -> bytes:
         """Génère le CSS personnalisé"""
-        try:
-            css_content = f"""
-/* CSS personnalisé généré automatiquement */
-:root {{
-    --primary-color: {branding.color_scheme.primary};
-    --secondary-color: {branding.color_scheme.secondary};
-    --accent-color: {branding.color_scheme.accent};
-    --background-color: {branding.color_scheme.background};
-    --text-color: {branding.color_scheme.text};
-}}
-
-/* Animations */
-@keyframes fadeIn {{
-    from {{ opacity: 0; transform: translateY(20px); }}
-    to {{ opacity: 1; transform: translateY(0); }}
-}}
+        colors = branding.color_scheme
+        return self._CUSTOM_CSS.substitute(
+            primary=colors.primary,
+            secondary=colors.secondary,
+            accent=colors.accent,
+            background=colors.background,
+            text=colors.text
+        ).encode('utf-8')
 
-.animate-fade-in {{
-    animation: fadeIn 0.6s ease-out forwards;
-}}
-
-/* Styles personnalisés */
-.gradient-bg {{
-    background: linear-gradient(135deg, var(--primary-color), var(--accent-color));
-}}
-
-.text-primary {{ color: var(--primary-color); }}
-.bg-primary {{ background-color: var(--primary-color); }}
-.border-primary {{ border-color: var(--primary-color); }}
-
-/* Responsive */
-@media (max-width: 768px) {{
-    .hero-section h1 {{
-        font-size: 2.5rem;
-    }}
-    
-    .section-padding {{
-        padding: 40px 0;
-    }}
-}}
-"""
-            return css_content
-            
-        except Exception as e:
-            logger.error(f"Erreur lors de la génération du CSS: {e}")
-            return ""
-
-    async def _generate_custom_js(self, structure: SiteStructure) -> str:
-        """Génère le JavaScript personnalisé"""
-        try:
-            js_content = """
-// JavaScript personnalisé généré automatiquement
-
-// Gestion du menu mobile
-function toggleMobileMenu() {
-    const menu = document.getElementById('mobile-menu');
-    if (menu) {
-        menu.classList.toggle('hidden');
-    }
-}
-
-// Smooth scrolling
-document.addEventListener('DOMContentLoaded', function() {
-    // Liens d'ancrage
-    document.querySelectorAll('a[href^="#"]').forEach(anchor => {
-        anchor.addEventListener('click', function (e) {
-            e.preventDefault();
-            const target = document.querySelector(this.getAttribute('href'));
-            if (target) {
-                target.scrollIntoView({ 
-                    behavior: 'smooth',
-                    block: 'start'
-                });
-            }
-        });
-    });
-    
-    // Animation au scroll
-    const observerOptions = {
-        threshold: 0.1,
-        rootMargin: '0px 0px -50px 0px'
-    };
-    
-    const observer = new IntersectionObserver((entries) => {
-        entries.forEach(entry => {
-            if (entry.isIntersecting) {
-                entry.target.classList.add('animate-fade-in');
-            }
-        });
-    }, observerOptions);
-    
-    // Observer tous les éléments avec la classe animate-on-scroll
-    document.querySelectorAll('.animate-on-scroll').forEach(el => {
-        observer.observe(el);
-    });
-    
-    // Gestion des formulaires
-    const forms = document.querySelectorAll('form');
-    forms.forEach(form => {
-        form.addEventListener('submit', function(e) {
-            e.preventDefault();
-            // Traitement du formulaire
-            console.log('Formulaire soumis');
-        });
-    });
-});
-
-// Utilitaires
-function showNotification(message, type = 'info') {
-    // Affichage de notifications
-    console.log(`${type.toUpperCase()}: ${message}`);
-}
-"""
-            return js_content
-            
-        except Exception as e:
-            logger.error(f"Erreur lors de la génération du JS: {e}")
-            return ""
+    def _generate_custom_js(self, structure: SiteStructure) -> bytes:
+        """Génère le JavaScript personnalisé (constant pour l'instant)"""
+        return self._CUSTOM_JS
 
     async def _save_site_files(
         self,
         site_id: str,
-        site_files: Dict[str, str]
+        site_files: Dict[str, bytes]
     ) -> str:
-        """Sauvegarde les fichiers du site"""
+        """Sauvegarde les fichiers du site (contenus déjà encodés)"""
         try:
             site_path = os.path.join(self.output_path, site_id)
-            os.makedirs(site_path, exist_ok=True)
+            full_paths = {file_path: os.path.join(site_path, file_path) for file_path in site_files}
             
-            # Création du dossier assets
-            assets_path = os.path.join(site_path, 'assets')
-            os.makedirs(assets_path, exist_ok=True)
+            # Dossier du site, dossier assets et dossiers parents des fichiers: chacun créé une seule fois,
+            # les moins profonds d'abord (chaque makedirs n'a alors plus qu'un mkdir à faire)
+            directories = {site_path, os.path.join(site_path, 'assets')}
+            directories.update(os.path.dirname(full_path) for full_path in full_paths.values())
+            for directory in sorted(directories, key=len):
+                os.makedirs(directory, exist_ok=True)
             
-            # Sauvegarde de chaque fichier
-            for file_path, content in site_files.items():
-                full_path = os.path.join(site_path, file_path)
-                
-                # Création des dossiers parents si nécessaire
-                os.makedirs(os.path.dirname(full_path), exist_ok=True)
-                
-                async with aiofiles.open(full_path, 'w', encoding='utf-8') as f:
-                    await f.write(content)
+            # Écritures soumises ensemble plutôt qu'une à une
+            await asyncio.gather(*(
+                asyncio.to_thread(self._write_site_file, full_paths[file_path], content)
+                for file_path, content in site_files.items()
+            ))
             
-            logger.info(f"Fichiers sauvegardés dans: {site_path}")
+            logger.info("Fichiers sauvegardés dans: %s", site_path)
             return site_path
             
         except Exception as e:
-            logger.error(f"Erreur lors de la sauvegarde des fichiers: {e}")
+            logger.error("Erreur lors de la sauvegarde des fichiers: %s", e)
+            raise
+
+    async def _render_page(
+        self,
+        template: Template,
+        data: Dict[str, Any],
+        data_blob: bytes,
+        overrides: Dict[str, Any]
+    ) -> bytes:
+        """
+        Rend une page en UTF-8 (données du site surchargées par celles de la page), ou la reprend depuis
+        le cache si le même rendu a déjà été fait (reconstructions et prévisualisations successives).
+        data_blob est la sérialisation de data, calculée une fois par site
+        """
+        digest = hashlib.sha256(f"{self.templates_digest}|{template.name}|".encode())
+        digest.update(data_blob)
+        digest.update(orjson.dumps(overrides, option=orjson.OPT_SORT_KEYS, default=str))
+        key = digest.hexdigest()[:32]
+        
+        html = self.render_cache.get(key)
+        if html is None:
+            self.render_cache_misses += 1
+            # render() fusionne lui-même les deux dictionnaires dans le contexte Jinja
+            html = await asyncio.to_thread(lambda: template.render(data, **overrides).encode('utf-8'))
+            # Une page plus grande que tout le budget n'est pas mise en cache
+            if len(html) <= RENDER_CACHE_BYTES:
+                self.render_cache[key] = html
+        else:
+            self.render_cache_hits += 1
+        
+        return html
+
+    @staticmethod
+    def _atomic_write(path: str, data: bytes):
+        """
+        Écrit un fichier via un fichier temporaire puis un renommage atomique:
+        un autre worker ne lit jamais un fichier à moitié écrit
+        """
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    async def clear_render_cache(self):
+        """Vide le cache des pages rendues"""
+        try:
+            self.render_cache.clear()
+            self.render_cache_hits = self.render_cache_misses = 0
+            logger.info("Cache de rendu vidé")
+            
+        except Exception as e:
+            logger.error("Erreur lors du vidage du cache de rendu: %s", e)
             raise
 
+    @staticmethod
+    async def _write_text(path: str, content: str):
+        """
+        Écrit un petit fichier texte en un seul aller-retour de thread
+        (aiofiles délègue chaque opération à un thread: ouverture, écriture, fermeture)
+        """
+        def write():
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        
+        await asyncio.to_thread(write)
+
+    @staticmethod
+    def _write_site_file(path: str, data: bytes):
+        """
+        Écrit un fichier du site et, pour les formats texte, sa version gzip précompressée
+        (compressée une fois à la construction plutôt qu'à chaque requête)
+        """
+        with open(path, 'wb') as f:
+            f.write(data)
+        
+        if SITE_GZIP_LEVEL and os.path.splitext(path)[1] in _COMPRESSIBLE_EXTENSIONS:
+            # mtime=0: fichier identique d'une construction à l'autre (ETag stables côté CDN)
+            with open(f"{path}.gz", 'wb') as f:
+                f.write(gzip.compress(data, compresslevel=SITE_GZIP_LEVEL, mtime=0))
+
     async def _update_site_status(
         self,
         site_id: str,
@@ -866,15 +1079,16 @@ function showNotification(message, type = 'info') {
     ):
         """Met à jour le statut de construction d'un site"""
         try:
-            self.site_statuses[site_id] = {
-                "site_id": site_id,
-                "status": status,
-                "progress_percentage": progress,
-                "current_step": current_step,
-                "error_message": error_message,
-                "last_updated": datetime.now()
-            }
+            # Modèle validé une fois à l'écriture, renvoyé tel quel à chaque lecture
+            self.site_statuses[site_id] = SiteStatus(
+                site_id=site_id,
+                status=status,
+                progress_percentage=progress,
+                current_step=current_step,
+                error_message=error_message,
+                last_updated=datetime.now()
+            )
             
         except Exception as e:
-            logger.error(f"Erreur lors de la mise à jour du statut: {e}")
+            logger.error("Erreur lors de la mise à jour du statut: %s", e)
 
@@ -0,0 +1,373 @@
+# tasks.py
+#
+# File de tâches Celery pour la génération de sites.
+# Lancement des workers (dimensionnables indépendamment) :
+#   celery -A tasks.celery_app worker -Q ai --loglevel=info
+#   celery -A tasks.celery_app worker -Q assets --loglevel=info
+
+import asyncio
+import logging
+import os
+import uuid
+from typing import Dict, List, Any, Optional
+from datetime import datetime
+
+import redis
+import uvloop
+from celery import Celery, chain, group
+from celery.result import AsyncResult
+
+from services.ai_generator import AIGenerator
+from services.brand_generator import BrandGenerator
+from services.site_builder import SiteBuilder
+from services.asset_manager import AssetManager
+from services.http_client import create_http_client
+from models.schemas import (
+    SiteGenerationRequest,
+    BrandingData,
+    SiteStructure,
+    AssetData,
+    SiteStatus
+)
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379')
+PROGRESS_TTL = 86400  # Durée de conservation de la progression (secondes)
+
+# Configuration de Celery (broker et backend Redis)
+celery_app = Celery(
+    'klm',
+    broker=os.getenv('CELERY_BROKER_URL', REDIS_URL),
+    backend=os.getenv('CELERY_RESULT_BACKEND', REDIS_URL)
+)
+celery_app.conf.update(
+    task_serializer='json',
+    result_serializer='json',
+    accept_content=['json'],
+    task_track_started=True,
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    # Texte IA et génération d'images sur des files séparées
+    task_routes={
+        'klm.generate_branding': {'queue': 'ai'},
+        'klm.generate_structure': {'queue': 'ai'},
+        'klm.generate_assets': {'queue': 'assets'},
+        'klm.build_site': {'queue': 'assets'},
+        'klm.save_site': {'queue': 'assets'},
+        'klm.deploy_site': {'queue': 'assets'},
+    }
+)
+
+# Services propres au processus worker
+ai_generator = AIGenerator()
+brand_generator = BrandGenerator()
+site_builder = SiteBuilder()
+asset_manager = AssetManager()
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_services_ready = False
+_redis: Optional[redis.Redis] = None
+
+
+def _get_redis() -> redis.Redis:
+    """Retourne le client Redis partagé du processus"""
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+    return _redis
+
+
+def _run(coro):
+    """Exécute une coroutine sur la boucle persistante du worker (uvloop, comme l'API)"""
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = uvloop.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop.run_until_complete(coro)
+
+
+async def _ensure_services():
+    """Initialise les services une seule fois par processus worker"""
+    global _services_ready
+    if not _services_ready:
+        await ai_generator.initialize()
+        await brand_generator.initialize()
+        await asset_manager.initialize(http_client=create_http_client())
+        await site_builder.initialize()
+        _services_ready = True
+
+
+def report_progress(
+    site_id: str,
+    status: str,
+    progress: float,
+    current_step: str,
+    error_message: Optional[str] = None
+):
+    """Enregistre la progression d'une génération dans Redis"""
+    try:
+        key = f"site:{site_id}:progress"
+        # Écriture et expiration envoyées ensemble: un seul aller-retour Redis par mise à jour
+        pipe = _get_redis().pipeline(transaction=False)
+        pipe.hset(key, mapping={
+            "site_id": site_id,
+            "status": status,
+            "progress_percentage": progress,
+            "current_step": current_step,
+            "error_message": error_message or "",
+            "last_updated": datetime.now().isoformat()
+        })
+        pipe.expire(key, PROGRESS_TTL)
+        pipe.execute()
+
+    except Exception as e:
+        logger.error("Erreur lors de l'enregistrement de la progression: %s", e)
+
+
+def get_site_status(site_id: str) -> Optional[SiteStatus]:
+    """Lit la progression Redis et l'état Celery d'une génération"""
+    data = _get_redis().hgetall(f"site:{site_id}:progress")
+    if not data:
+        return None
+
+    status = SiteStatus(
+        site_id=site_id,
+        status=data["status"],
+        progress_percentage=float(data["progress_percentage"]),
+        current_step=data["current_step"],
+        error_message=data.get("error_message") or None,
+        last_updated=data["last_updated"]
+    )
+
+    # Dernière étape en échec sans progression "error" (errback non exécuté)
+    result = AsyncResult(site_id, app=celery_app)
+    if result.state == "FAILURE" and status.status != "error":
+        status.status = "error"
+        status.error_message = str(result.result)
+
+    return status
+
+
+def enqueue_site_generation(request: SiteGenerationRequest) -> str:
+    """Met en file d'attente la génération complète d'un site"""
+    site_id = str(uuid.uuid4())
+    report_progress(site_id, "queued", 0, "En file d'attente")
+
+    # Errback attaché à chaque étape (y compris celles du chord: un link_error
+    # sur la chaîne n'atteint pas les tâches parallèles)
+    on_error = report_failure_task.s(site_id)
+
+    # Structure et assets ne dépendent que du branding: exécution en parallèle
+    # (chord), puis construction, sauvegarde et déploiement.
+    # L'identifiant de la dernière tâche sert de site_id
+    chain(
+        generate_branding_task.s(request.model_dump(mode="json"), site_id).on_error(on_error),
+        group(
+            generate_structure_task.s().on_error(on_error),
+            generate_assets_task.s().on_error(on_error)
+        ),
+        build_site_task.s().on_error(on_error),
+        save_site_task.s(request.user_id).on_error(on_error),
+        deploy_site_task.s().on_error(on_error)
+    ).apply_async(task_id=site_id)
+
+    return site_id
+
+
+@celery_app.task(name='klm.report_failure')
+def report_failure_task(request, exc, traceback, site_id: str):
+    """
+    Errback des étapes: une étape morte sans avoir enregistré son erreur
+    (worker tué, WorkerLostError...) passe la génération en erreur
+    """
+    if _get_redis().hget(f"site:{site_id}:progress", "status") != "error":
+        report_progress(site_id, "error", 0, "Erreur de génération", str(exc))
+
+
+@celery_app.task(name='klm.generate_branding')
+def generate_branding_task(request_data: Dict[str, Any], site_id: str) -> Dict[str, Any]:
+    """Étape 1: branding du site"""
+    return _run(_generate_branding(request_data, site_id))
+
+
+@celery_app.task(name='klm.generate_structure')
+def generate_structure_task(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Étape 2: structure du site (en parallèle des assets)"""
+    return _run(_generate_structure(payload))
+
+
+@celery_app.task(name='klm.generate_assets')
+def generate_assets_task(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Étape 3: génération des assets (en parallèle de la structure)"""
+    return _run(_generate_assets(payload))
+
+
+@celery_app.task(name='klm.build_site')
+def build_site_task(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Étape 4: construction du site"""
+    payload = {}
+    for result in results:
+        payload.update(result)
+    return _run(_build_site(payload))
+
+
+@celery_app.task(
+    name='klm.save_site',
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    max_retries=5
+)
+def save_site_task(self, site_data: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+    """Étape 5: sauvegarde du site (reprises automatiques)"""
+    return _run(_save_site(site_data, user_id, _is_last_attempt(self)))
+
+
+@celery_app.task(
+    name='klm.deploy_site',
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    max_retries=5
+)
+def deploy_site_task(self, site_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Étape 6: déploiement du site (reprises automatiques)"""
+    return _run(_deploy_site(site_data, _is_last_attempt(self)))
+
+
+def _is_last_attempt(task) -> bool:
+    """Indique si l'exécution courante est la dernière tentative autorisée"""
+    return task.request.retries >= task.max_retries
+
+
+async def _generate_branding(request_data: Dict[str, Any], site_id: str) -> Dict[str, Any]:
+    try:
+        await _ensure_services()
+        request = SiteGenerationRequest.model_validate(request_data)
+        logger.info("Génération de site pour: %s", request.business_name)
+
+        report_progress(site_id, "generating", 5, "Génération du branding")
+        branding_data = await brand_generator.generate_branding(
+            business_name=request.business_name,
+            industry=request.industry,
+            description=request.description,
+            target_audience=request.target_audience
+        )
+
+        report_progress(site_id, "generating", 25, "Génération de la structure et des assets")
+        return {
+            "site_id": site_id,
+            "user_id": request.user_id,
+            "request": request_data,
+            "branding": branding_data.model_dump(mode="json")
+        }
+
+    except Exception as e:
+        logger.error("Erreur lors de la génération du branding: %s", e)
+        report_progress(site_id, "error", 0, "Erreur de génération", str(e))
+        raise
+
+
+async def _generate_structure(payload: Dict[str, Any]) -> Dict[str, Any]:
+    site_id = payload["site_id"]
+    try:
+        await _ensure_services()
+
+        site_structure = await ai_generator.generate_site_structure(
+            business_info=SiteGenerationRequest.model_validate(payload["request"]),
+            branding=BrandingData.model_validate(payload["branding"])
+        )
+        site_structure.site_id = site_id
+
+        return {**payload, "structure": site_structure.model_dump(mode="json")}
+
+    except Exception as e:
+        logger.error("Erreur lors de la génération de la structure: %s", e)
+        report_progress(site_id, "error", 0, "Erreur de génération", str(e))
+        raise
+
+
+async def _generate_assets(payload: Dict[str, Any]) -> Dict[str, Any]:
+    site_id = payload["site_id"]
+    try:
+        await _ensure_services()
+
+        assets = await asset_manager.generate_assets(
+            branding_data=BrandingData.model_validate(payload["branding"]),
+            site_id=site_id
+        )
+
+        return {**payload, "assets": [asset.model_dump(mode="json") for asset in assets]}
+
+    except Exception as e:
+        logger.error("Erreur lors de la génération des assets: %s", e)
+        report_progress(site_id, "error", 0, "Erreur de génération", str(e))
+        raise
+
+
+async def _build_site(payload: Dict[str, Any]) -> Dict[str, Any]:
+    site_id = payload["site_id"]
+    try:
+        await _ensure_services()
+        report_progress(site_id, "building", 70, "Construction du site")
+
+        site_data = await site_builder.build_site(
+            structure=SiteStructure.model_validate(payload["structure"]),
+            branding=BrandingData.model_validate(payload["branding"]),
+            assets=[AssetData.model_validate(asset) for asset in payload["assets"]]
+        )
+
+        # Données JSON transmises aux étapes de sauvegarde et de déploiement
+        return {
+            **site_data,
+            "branding": payload["branding"],
+            "structure": payload["structure"],
+            "assets": payload["assets"]
+        }
+
+    except Exception as e:
+        logger.error("Erreur lors de la construction du site: %s", e)
+        report_progress(site_id, "error", 0, "Erreur de construction", str(e))
+        raise
+
+
+async def _save_site(site_data: Dict[str, Any], user_id: str, last_attempt: bool) -> Dict[str, Any]:
+    site_id = site_data["site_id"]
+    try:
+        await _ensure_services()
+        report_progress(site_id, "saving", 85, "Sauvegarde du site")
+
+        await site_builder.save_site_to_database(site_data, user_id)
+        return site_data
+
+    except Exception as e:
+        logger.error("Erreur lors de la sauvegarde du site %s: %s", site_id, e)
+        # Les tentatives intermédiaires sont reprises par Celery
+        if last_attempt:
+            report_progress(site_id, "error", 0, "Erreur de sauvegarde", str(e))
+        raise
+
+
+async def _deploy_site(site_data: Dict[str, Any], last_attempt: bool) -> Dict[str, Any]:
+    site_id = site_data["site_id"]
+    try:
+        await _ensure_services()
+        report_progress(site_id, "deploying", 90, "Déploiement du site")
+
+        await site_builder.deploy_site(site_data)
+
+        report_progress(site_id, "deployed", 100, "Site déployé avec succès")
+        logger.info("Site déployé avec succès: %s", site_id)
+
+        return {
+            "site_id": site_id,
+            "preview_url": site_data["preview_url"],
+            "files": site_data["files"]
+        }
+
+    except Exception as e:
+        logger.error("Erreur lors du déploiement du site %s: %s", site_id, e)
+        if last_attempt:
+            report_progress(site_id, "error", 0, "Erreur de déploiement", str(e))
+        raise
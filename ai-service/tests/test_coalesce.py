@@ -0,0 +1,162 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from services import redis_cache as redis_cache_module
+from services.coalesce import _in_flight, coalesce
+from services.redis_cache import redis_cache
+
+
+def test_concurrent_callers_share_one_execution():
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "résultat"
+
+    async def run():
+        return await asyncio.gather(*(coalesce("clé", factory) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["résultat"] * 5
+    assert calls == [1]
+    assert not _in_flight
+
+
+def test_cancelled_caller_does_not_cancel_others():
+    calls = []
+    release = None
+
+    async def factory():
+        calls.append(1)
+        await release.wait()
+        return 42
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        first = asyncio.ensure_future(coalesce("clé", factory))
+        second = asyncio.ensure_future(coalesce("clé", factory))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == 42
+    assert calls == [1]
+    assert not _in_flight
+
+
+def test_all_callers_cancelled_execution_completes():
+    done = []
+
+    async def factory():
+        await asyncio.sleep(0.01)
+        done.append(1)
+
+    async def run():
+        caller = asyncio.ensure_future(coalesce("clé", factory))
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+    assert done == [1]
+    assert not _in_flight
+
+
+def test_exception_reaches_every_caller_and_releases_key():
+    async def failing():
+        await asyncio.sleep(0)
+        raise ValueError("échec")
+
+    async def succeeding():
+        return "ok"
+
+    async def run():
+        results = await asyncio.gather(
+            coalesce("clé", failing), coalesce("clé", failing), return_exceptions=True
+        )
+        # La clé est libérée: un nouvel appel relance une exécution
+        return results, await coalesce("clé", succeeding)
+
+    results, retried = asyncio.run(run())
+    assert [type(result) for result in results] == [ValueError, ValueError]
+    assert retried == "ok"
+
+
+class _Result(BaseModel):
+    value: int
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+class _DownRedis:
+    async def get(self, key):
+        raise ConnectionError("Redis injoignable")
+
+    async def set(self, key, value, ex=None):
+        raise ConnectionError("Redis injoignable")
+
+
+class _Service:
+    def __init__(self):
+        self.calls = 0
+
+    @redis_cache(ttl=60, model=_Result)
+    async def compute(self, value: int, factor: int = 2) -> _Result:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return _Result(value=value * factor)
+
+
+def test_redis_cache_round_trip(monkeypatch):
+    redis = _FakeRedis()
+    monkeypatch.setattr(redis_cache_module, "get_redis", lambda: redis)
+    service = _Service()
+
+    async def run():
+        first = await service.compute(3)
+        # Arguments par défaut explicites: même clé
+        second = await service.compute(3, factor=2)
+        other = await service.compute(4)
+        return first, second, other
+
+    first, second, other = asyncio.run(run())
+    assert first == second == _Result(value=6)
+    assert other == _Result(value=8)
+    assert service.calls == 2
+    assert len(redis.data) == 2
+
+
+def test_redis_cache_coalesces_concurrent_misses(monkeypatch):
+    monkeypatch.setattr(redis_cache_module, "get_redis", lambda: _FakeRedis())
+    service = _Service()
+
+    async def run():
+        return await asyncio.gather(*(service.compute(5) for _ in range(4)))
+
+    assert asyncio.run(run()) == [_Result(value=10)] * 4
+    assert service.calls == 1
+
+
+def test_redis_cache_without_redis(monkeypatch):
+    monkeypatch.setattr(redis_cache_module, "get_redis", lambda: _DownRedis())
+    service = _Service()
+
+    assert asyncio.run(service.compute(2)) == _Result(value=4)
+    assert asyncio.run(service.compute(2)) == _Result(value=4)
+    assert service.calls == 2
@@ -0,0 +1,72 @@
+import asyncio
+
+from services import llm_cache as llm_cache_module
+from services.llm_cache import LLMCache
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    async def get(self, key):
+        value = self.data.get(key)
+        return value.encode() if value is not None else None
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.ttls[key] = ex
+
+
+class _DownRedis:
+    async def get(self, key):
+        raise ConnectionError("Redis injoignable")
+
+    async def set(self, key, value, ex=None):
+        raise ConnectionError("Redis injoignable")
+
+
+def test_key_ignores_parameter_order():
+    first = LLMCache.make_key({"model": "gpt-4", "messages": [{"role": "user", "content": "a"}]})
+    second = LLMCache.make_key({"messages": [{"role": "user", "content": "a"}], "model": "gpt-4"})
+    assert first == second
+    assert first != LLMCache.make_key({"model": "gpt-4", "messages": []})
+
+
+def test_set_writes_both_tiers(monkeypatch):
+    redis = _FakeRedis()
+    monkeypatch.setattr(llm_cache_module, "get_redis", lambda: redis)
+    cache = LLMCache("llm:test", ttl=120)
+
+    asyncio.run(cache.set("clé", "réponse"))
+
+    assert redis.data == {"llm:test:clé": "réponse"}
+    assert redis.ttls == {"llm:test:clé": 120}
+    assert asyncio.run(cache.get("clé")) == "réponse"
+
+
+def test_redis_hit_fills_memory_tier(monkeypatch):
+    redis = _FakeRedis()
+    redis.data["llm:test:clé"] = "réponse d'un autre worker"
+    monkeypatch.setattr(llm_cache_module, "get_redis", lambda: redis)
+    cache = LLMCache("llm:test")
+
+    assert asyncio.run(cache.get("clé")) == "réponse d'un autre worker"
+
+    # Servi depuis la mémoire, sans Redis
+    monkeypatch.setattr(llm_cache_module, "get_redis", lambda: _DownRedis())
+    assert asyncio.run(cache.get("clé")) == "réponse d'un autre worker"
+
+
+def test_miss(monkeypatch):
+    monkeypatch.setattr(llm_cache_module, "get_redis", lambda: _FakeRedis())
+    assert asyncio.run(LLMCache("llm:test").get("absente")) is None
+
+
+def test_memory_only_without_redis(monkeypatch):
+    monkeypatch.setattr(llm_cache_module, "get_redis", lambda: _DownRedis())
+    cache = LLMCache("llm:test")
+
+    assert asyncio.run(cache.get("clé")) is None
+    asyncio.run(cache.set("clé", "réponse"))
+    assert asyncio.run(cache.get("clé")) == "réponse"
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from email.utils import formatdate
+
+import httpx
+import openai
+import pytest
+
+from services.http_client import MAX_RETRY_DELAY, retry_delay
+from services.openai_client import with_retries
+from services.rate_limiter import RateLimiter, _parse_duration
+
+REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+
+def _rate_limit_error(headers):
+    response = httpx.Response(429, headers=headers, request=REQUEST)
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def test_retry_after_seconds():
+    assert retry_delay({"retry-after": "2.5"}, 0) == 2.5
+
+
+def test_retry_after_http_date():
+    delay = retry_delay({"retry-after": formatdate(time.time() + 10, usegmt=True)}, 0)
+    assert 8 <= delay <= 10
+
+
+def test_retry_after_past_date_is_zero():
+    assert retry_delay({"retry-after": formatdate(time.time() - 60, usegmt=True)}, 0) == 0.0
+
+
+def test_ratelimit_reset_seconds():
+    assert retry_delay({"x-ratelimit-reset": "3"}, 0) == 3.0
+
+
+def test_ratelimit_reset_epoch():
+    delay = retry_delay({"x-ratelimit-reset": str(int(time.time()) + 5)}, 0)
+    assert 3 <= delay <= 5
+
+
+def test_delay_is_capped():
+    assert retry_delay({"retry-after": "3600"}, 0) == MAX_RETRY_DELAY
+    assert retry_delay({}, 20) <= MAX_RETRY_DELAY + 1
+
+
+def test_exponential_backoff_without_headers():
+    for attempt in range(4):
+        assert 2 ** attempt <= retry_delay({}, attempt) < 2 ** attempt + 1
+
+
+def test_invalid_retry_after_falls_back_to_reset():
+    assert retry_delay({"retry-after": "bientôt", "x-ratelimit-reset": "4"}, 0) == 4.0
+
+
+def test_parse_duration():
+    assert _parse_duration("6m0s") == 360.0
+    assert _parse_duration("1.5s") == 1.5
+    assert _parse_duration("120ms") == pytest.approx(0.12)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    return delays
+
+
+def test_with_retries_uses_retry_after(sleeps):
+    errors = [_rate_limit_error({"retry-after": "7"})]
+
+    async def call():
+        if errors:
+            raise errors.pop()
+        return "ok"
+
+    assert asyncio.run(with_retries(call, max_retries=2)) == "ok"
+    assert sleeps == [7.0]
+
+
+def test_with_retries_gives_up(sleeps):
+    async def call():
+        raise _rate_limit_error({"retry-after": "1"})
+
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(with_retries(call, max_retries=2))
+    assert sleeps == [1.0, 1.0]
+
+
+def test_with_retries_does_not_retry_long_timeouts(sleeps):
+    async def call():
+        raise openai.APITimeoutError(request=REQUEST)
+
+    with pytest.raises(openai.APITimeoutError):
+        asyncio.run(with_retries(call, max_retries=3, retry_timeouts=False))
+    assert sleeps == []
+
+
+def test_rate_limiter_waits_for_window():
+    async def run():
+        limiter = RateLimiter(rpm=2, tpm=1000, window=0.2)
+        start = time.monotonic()
+        await limiter.acquire(10)
+        await limiter.acquire(10)
+        first = time.monotonic() - start
+        await limiter.acquire(10)
+        return first, time.monotonic() - start
+
+    first, total = asyncio.run(run())
+    assert first < 0.1
+    assert total >= 0.19
+
+
+def test_rate_limiter_pauses_on_low_quota():
+    async def run():
+        limiter = RateLimiter(rpm=100, tpm=1000)
+        limiter.observe({
+            "x-ratelimit-remaining-tokens": "10",
+            "x-ratelimit-limit-tokens": "1000",
+            "x-ratelimit-reset-tokens": "200ms",
+        })
+        start = time.monotonic()
+        await limiter.acquire(10)
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.19
@@ -0,0 +1,48 @@
+import orjson
+import pytest
+
+from services.brand_generator import _TopLevelFieldsParser
+
+DOCUMENT = {
+    "strategy": {"mission": "Servir {vite}, bien", "values": ["qualité", "prix: juste"]},
+    "tagline": "L'\"excellence\" \\ au quotidien",
+    "score": 12.5,
+    "ready": True,
+    "clé \"échappée\"": None,
+    "colors": [["#112233", "#445566"], []],
+}
+TEXT = orjson.dumps(DOCUMENT).decode()
+
+
+def _feed_all(fragments):
+    parser = _TopLevelFieldsParser()
+    fields = []
+    for fragment in fragments:
+        fields.extend(parser.feed(fragment))
+    return fields
+
+
+def test_single_fragment():
+    assert _feed_all([TEXT]) == list(DOCUMENT.items())
+
+
+@pytest.mark.parametrize("split", range(1, len(TEXT)))
+def test_split_anywhere(split):
+    # Coupure au milieu d'une clé, d'une chaîne, d'un échappement ou d'un nombre
+    assert _feed_all([TEXT[:split], TEXT[split:]]) == list(DOCUMENT.items())
+
+
+def test_character_by_character():
+    assert _feed_all(TEXT) == list(DOCUMENT.items())
+
+
+def test_fields_emitted_as_soon_as_closed():
+    parser = _TopLevelFieldsParser()
+    assert parser.feed('{"a": {"b": [1, ') == []
+    assert parser.feed('2]}, "c"') == [("a", {"b": [1, 2]})]
+    assert parser.feed(': "d"}') == [("c", "d")]
+
+
+def test_pretty_printed_document():
+    text = orjson.dumps(DOCUMENT, option=orjson.OPT_INDENT_2).decode()
+    assert _feed_all(text[i:i + 7] for i in range(0, len(text), 7)) == list(DOCUMENT.items())